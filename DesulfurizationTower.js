@@ -2,6 +2,39 @@
  * 3D脱硫塔工艺流程图 - 脱硫塔类
  * 精细化建模，包含外部结构和内部设施
  */
+
+/**
+ * 加载塔的配置数据，返回与 sources 键名相同的对象
+ * 优先使用构建时内联到页面中的数据块 (<script type="application/json" id="tower-data">)，
+ * 其次是合并后的数据文件 (<link rel="preload" id="tower-data-bundle">)，
+ * 开发环境下并行请求各个文件。多个塔共用同一次加载。
+ */
+function loadTowerData(sources) {
+    if (!loadTowerData.pending) {
+        loadTowerData.pending = (async () => {
+            const inline = document.getElementById('tower-data');
+            if (inline) {
+                return JSON.parse(inline.textContent);
+            }
+            const bundle = document.getElementById('tower-data-bundle');
+            if (bundle) {
+                // 与预加载请求保持一致的完整性校验，才能复用预加载的响应
+                const response = await fetch(bundle.href, { integrity: bundle.integrity });
+                return response.json();
+            }
+            const names = Object.keys(sources);
+            const values = await Promise.all(names.map(async (name) => {
+                const response = await fetch(sources[name]);
+                return response.json();
+            }));
+            return Object.fromEntries(names.map((name, i) => [name, values[i]]));
+        })();
+        // 加载失败时允许下一次调用重试
+        loadTowerData.pending.catch(() => { loadTowerData.pending = null; });
+    }
+    return loadTowerData.pending;
+}
+
 class DesulfurizationTower {
     constructor(config = {}) {
         this.group = new THREE.Group();
@@ -100,13 +133,13 @@ class DesulfurizationTower {
 
     async loadConfiguration() {
         try {
-            // 加载配置文件
-            const configResponse = await fetch('./config/tower-config.json');
-            this.config = await configResponse.json();
-            
-            // 加载工艺流程数据
-            const processResponse = await fetch('./data/process-flow.json');
-            this.processFlow = await processResponse.json();
+            // 加载配置文件和工艺流程数据
+            const data = await loadTowerData({
+                config: './config/tower-config.json',
+                processFlow: './data/process-flow.json'
+            });
+            this.config = data.config || this.getDefaultConfig();
+            this.processFlow = data.processFlow || this.getDefaultProcessFlow();
             
             console.log('配置文件加载成功');
         } catch (error) {
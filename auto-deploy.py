@@ -11,12 +11,28 @@ import subprocess
 import json
 from pathlib import Path
 
+from ghpages import GitError, PagesPublisher
+from multideploy import DEFAULT_RETRIES, DEFAULT_TIMEOUT, DeployTarget, Step, deploy_all
+
+def find_vercel_url(lines):
+    for line in lines:
+        if 'https://' in line and 'vercel.app' in line:
+            return line.strip()
+    return None
+
+def find_netlify_url(lines):
+    for line in lines:
+        if 'Live Draft URL:' in line or 'Website URL:' in line:
+            return line.split(': ')[-1].strip()
+    return None
+
 class AutoDeployer:
     """自动化部署器"""
     
     def __init__(self):
         self.project_root = Path(__file__).parent
         self.dist_dir = self.project_root / 'dist'
+        self.config_file = self.project_root / 'deploy-config.json'
         
     def check_prerequisites(self):
         """检查部署前置条件"""
@@ -58,12 +74,9 @@ class AutoDeployer:
             
             if result.returncode == 0:
                 print("✅ Vercel部署成功！")
-                # 提取部署URL
-                output_lines = result.stdout.strip().split('\n')
-                for line in output_lines:
-                    if 'https://' in line and 'vercel.app' in line:
-                        print(f"🌐 访问地址: {line.strip()}")
-                        break
+                url = find_vercel_url(result.stdout.strip().split('\n'))
+                if url:
+                    print(f"🌐 访问地址: {url}")
                 return True
             else:
                 print(f"❌ Vercel部署失败: {result.stderr}")
@@ -92,13 +105,9 @@ class AutoDeployer:
             
             if result.returncode == 0:
                 print("✅ Netlify部署成功！")
-                # 提取部署URL
-                output_lines = result.stdout.strip().split('\n')
-                for line in output_lines:
-                    if 'Live Draft URL:' in line or 'Website URL:' in line:
-                        url = line.split(': ')[-1].strip()
-                        print(f"🌐 访问地址: {url}")
-                        break
+                url = find_netlify_url(result.stdout.strip().split('\n'))
+                if url:
+                    print(f"🌐 访问地址: {url}")
                 return True
             else:
                 print(f"❌ Netlify部署失败: {result.stderr}")
@@ -162,66 +171,55 @@ class AutoDeployer:
             return False
         
         try:
-            # 检查是否在Git仓库中
-            git_check = subprocess.run(['git', 'status'], 
-                                     capture_output=True, text=True)
-            
-            if git_check.returncode != 0:
-                print("❌ 当前目录不是Git仓库")
-                print("💡 请先初始化Git仓库并推送到GitHub")
-                return False
-            
-            # 切换到项目根目录
-            os.chdir(self.project_root)
-            
-            # 创建gh-pages分支并推送
+            # 直接从dist目录生成gh-pages分支的提交，不切换分支，不改动工作区
             print("📤 推送到gh-pages分支...")
+            publisher = PagesPublisher(self.project_root, self.dist_dir)
+            publisher.publish()
             
-            # 检查是否有gh-pages分支
-            branch_check = subprocess.run(['git', 'branch', '-r'], 
-                                        capture_output=True, text=True)
-            
-            if 'origin/gh-pages' not in branch_check.stdout:
-                # 创建新的gh-pages分支
-                subprocess.run(['git', 'checkout', '--orphan', 'gh-pages'], 
-                             capture_output=True)
-                subprocess.run(['git', 'rm', '-rf', '.'], capture_output=True)
-            else:
-                # 切换到现有gh-pages分支
-                subprocess.run(['git', 'checkout', 'gh-pages'], capture_output=True)
-                subprocess.run(['git', 'pull', 'origin', 'gh-pages'], capture_output=True)
-            
-            # 复制dist目录内容到根目录
-            import shutil
-            for item in self.dist_dir.iterdir():
-                if item.is_file():
-                    shutil.copy2(item, self.project_root)
-                else:
-                    dst = self.project_root / item.name
-                    if dst.exists():
-                        shutil.rmtree(dst)
-                    shutil.copytree(item, dst)
-            
-            # 提交并推送
-            subprocess.run(['git', 'add', '.'], capture_output=True)
-            subprocess.run(['git', 'commit', '-m', 'Deploy to GitHub Pages'], 
-                         capture_output=True)
-            push_result = subprocess.run(['git', 'push', 'origin', 'gh-pages'], 
-                                       capture_output=True, text=True)
-            
-            if push_result.returncode == 0:
-                print("✅ GitHub Pages部署成功！")
-                print("💡 请在GitHub仓库设置中启用GitHub Pages")
-                print("🌐 访问地址: https://username.github.io/repository-name")
-                return True
-            else:
-                print(f"❌ GitHub Pages推送失败: {push_result.stderr}")
-                return False
-                
+            print("✅ GitHub Pages部署成功！")
+            print("💡 请在GitHub仓库设置中启用GitHub Pages")
+            print("🌐 访问地址: https://username.github.io/repository-name")
+            return True
+        except GitError as e:
+            print(f"❌ GitHub Pages部署失败: {e}")
+            return False
         except Exception as e:
             print(f"❌ GitHub Pages部署异常: {e}")
             return False
     
+    def load_deployment_config(self):
+        """读取deploy-config.json中的deployment配置"""
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('deployment', {})
+        except (OSError, ValueError):
+            return {}
+    
+    def deploy_targets(self):
+        """全部部署时的各平台命令，每条命令显式指定工作目录"""
+        deployment = self.load_deployment_config()
+        options = {
+            'timeout': deployment.get('timeout', DEFAULT_TIMEOUT),
+            'retries': deployment.get('retries', DEFAULT_RETRIES),
+        }
+        root, dist = self.project_root, self.dist_dir
+        return [
+            DeployTarget('Vercel', [Step(['vercel', '--prod', '--yes'], root)],
+                         find_url=find_vercel_url, **options),
+            DeployTarget('Netlify', [Step(['netlify', 'deploy', '--prod', '--dir', '.'], root)],
+                         find_url=find_netlify_url, **options),
+            DeployTarget('Docker', [
+                Step(['docker', 'build', '-t', '3d-desulfurization-tower', '.'], dist),
+                Step(['docker', 'stop', '3d-tower'], dist, check=False),
+                Step(['docker', 'rm', '3d-tower'], dist, check=False),
+                Step(['docker', 'run', '-d', '--name', '3d-tower',
+                      '-p', '80:80', '3d-desulfurization-tower'], dist),
+            ], find_url=lambda lines: 'http://localhost', **options),
+            DeployTarget('GitHub Pages', [
+                Step([sys.executable, root / 'deploy-to-github-pages.py', '--skip-build'], root),
+            ], requires='git', **options),
+        ]
+    
     def show_menu(self):
         """显示部署菜单"""
         print("\n" + "=" * 50)
@@ -257,26 +255,8 @@ class AutoDeployer:
             elif choice == '4':
                 self.deploy_to_github_pages()
             elif choice == '5':
-                print("🚀 开始全平台部署...")
-                platforms = [
-                    ('Vercel', self.deploy_to_vercel),
-                    ('Netlify', self.deploy_to_netlify),
-                    ('Docker', self.deploy_to_docker),
-                    ('GitHub Pages', self.deploy_to_github_pages)
-                ]
-                
-                results = []
-                for name, deploy_func in platforms:
-                    print(f"\n📦 部署到 {name}...")
-                    success = deploy_func()
-                    results.append((name, success))
-                
-                print("\n" + "=" * 30)
-                print("📊 部署结果汇总:")
-                for name, success in results:
-                    status = "✅ 成功" if success else "❌ 失败"
-                    print(f"  {name}: {status}")
-                print("=" * 30)
+                print("🚀 开始全平台并发部署...")
+                deploy_all(self.deploy_targets())
             else:
                 print("❌ 无效选择，请重新输入")
             
@@ -289,8 +269,15 @@ def main():
             print("3D脱硫塔工艺流程图 - 自动化部署工具")
             print("\n用法:")
             print("  python auto-deploy.py        # 交互式部署")
+            print("  python auto-deploy.py --all  # 并发部署到全部平台")
             print("  python auto-deploy.py --help # 显示帮助")
             return
+        if sys.argv[1] == '--all':
+            deployer = AutoDeployer()
+            if deployer.check_prerequisites():
+                results = deploy_all(deployer.deploy_targets())
+                sys.exit(0 if all(result.success for result in results) else 1)
+            sys.exit(1)
     
     deployer = AutoDeployer()
     deployer.run()
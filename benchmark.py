@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - 服务器压测工具
+解析页面的脚本/样式/fetch依赖，模拟多个浏览器并发加载完整的请求瀑布，
+对比不同服务器模式 (线程池、asyncio、缓存、压缩等) 的延迟与吞吐量
+"""
+
+import http.client
+import json
+import math
+import os
+import platform
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+
+from server import parse_int_option, parse_value_option
+
+PROJECT_ROOT = Path(__file__).parent
+RESULTS_DIR = PROJECT_ROOT / 'bench-results'
+CONNECTIONS_PER_BROWSER = 6     # 浏览器对同一主机的HTTP/1.1并发连接数
+SERVER_START_TIMEOUT = 10
+
+# 预设的服务器模式: server.py 参数，以及客户端是否声明支持压缩
+MODES = {
+    'threaded': {'args': [], 'compressed': False},
+    'asyncio': {'args': ['--engine', 'asyncio'], 'compressed': False},
+    'prefork': {'args': ['--workers', '4', '--threads', '8'], 'compressed': False},
+    'no-cache': {'args': ['--cache-size', '0'], 'compressed': False},
+    'compressed': {'args': [], 'compressed': True},
+    'asyncio-compressed': {'args': ['--engine', 'asyncio'], 'compressed': True},
+    # 以下三种模式关闭内存缓存，所有文件都经由指定的发送路径，用于比较零拷贝吞吐量
+    'sendfile': {'args': ['--cache-size', '0', '--zero-copy', 'sendfile',
+                          '--zero-copy-threshold', '0'], 'compressed': False},
+    'mmap': {'args': ['--cache-size', '0', '--zero-copy', 'mmap',
+                      '--zero-copy-threshold', '0'], 'compressed': False},
+    'copy': {'args': ['--cache-size', '0', '--zero-copy', 'off'], 'compressed': False},
+}
+
+FETCH_PATTERN = re.compile(r'''fetch\(\s*['"`]([^'"`$]+)['"`]''')
+
+class DependencyParser(HTMLParser):
+    """收集页面中的 <script src>、<link href> 以及内联脚本里的 fetch() 地址"""
+
+    LINK_RELS = {'stylesheet', 'preload', 'modulepreload', 'icon'}
+
+    def __init__(self):
+        super().__init__()
+        self.resources = []
+        self.inline_scripts = []
+        self.in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script':
+            if attrs.get('src'):
+                self.resources.append(attrs['src'])
+            else:
+                self.in_script = True
+        elif tag == 'link' and attrs.get('href'):
+            rels = set((attrs.get('rel') or '').lower().split())
+            if rels & self.LINK_RELS:
+                self.resources.append(attrs['href'])
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self.in_script = False
+
+    def handle_data(self, data):
+        if self.in_script:
+            self.inline_scripts.append(data)
+
+class Waterfall:
+    """一个页面的请求瀑布: HTML -> 脚本/样式 -> 脚本中 fetch 的数据文件"""
+
+    def __init__(self, page, resources, fetches, third_party):
+        self.page = page
+        self.resources = resources
+        self.fetches = fetches
+        self.third_party = third_party
+
+    def to_dict(self):
+        return {
+            'page': self.page,
+            'resources': len(self.resources),
+            'fetches': self.fetches,
+            'third_party': self.third_party,
+        }
+
+def same_origin_path(page_path, reference):
+    """把页面中的引用解析为同源路径，第三方或 data: 地址返回None"""
+    if reference.startswith('data:'):
+        return None
+    parts = urllib.parse.urlsplit(reference)
+    if parts.scheme or parts.netloc:
+        return None
+    return urllib.parse.urljoin(page_path, reference).split('#', 1)[0]
+
+def discover_waterfall(host, port, page):
+    """从服务器下载页面及其脚本，解析出完整的依赖列表"""
+    page_path = '/' + page.lstrip('/')
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        connection.request('GET', page_path)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"页面 {page_path} 返回 {response.status}")
+
+        parser = DependencyParser()
+        parser.feed(body.decode('utf-8', errors='replace'))
+
+        resources, third_party = [], []
+        for reference in parser.resources:
+            path = same_origin_path(page_path, reference)
+            if path is None:
+                if not reference.startswith('data:'):
+                    third_party.append(reference)
+            elif path not in resources:
+                resources.append(path)
+
+        # 脚本执行后才会发出的 fetch 请求
+        sources = list(parser.inline_scripts)
+        for path in resources:
+            if path.endswith('.js'):
+                connection.request('GET', path)
+                script = connection.getresponse()
+                content = script.read()
+                if script.status == 200:
+                    sources.append(content.decode('utf-8', errors='replace'))
+        fetches = []
+        for source in sources:
+            for reference in FETCH_PATTERN.findall(source):
+                path = same_origin_path(page_path, reference)
+                if path and path not in fetches and path not in resources:
+                    fetches.append(path)
+        return Waterfall(page_path, resources, fetches, third_party)
+    finally:
+        connection.close()
+
+def percentile(values, pct):
+    """最近秩法百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class BrowserSession:
+    """模拟一个浏览器: 每个工作线程一条长连接，自带按 ETag/Cache-Control 工作的HTTP缓存"""
+
+    def __init__(self, host, port, compressed):
+        self.host = host
+        self.port = port
+        self.compressed = compressed
+        self.cache = {}
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return self.local.connection
+
+    def fresh(self, entry):
+        """缓存条目在 max-age 内且未要求重新验证时，浏览器不发请求"""
+        cache_control = entry['cache_control']
+        if 'no-cache' in cache_control or 'no-store' in cache_control:
+            return False
+        match = re.search(r'max-age=(\d+)', cache_control)
+        return bool(match) and time.time() - entry['stored'] < int(match.group(1))
+
+    def fetch(self, path):
+        """请求一个资源，返回 (延迟秒数, 传输字节数, 状态码)"""
+        entry = self.cache.get(path)
+        if entry is not None and self.fresh(entry):
+            return 0.0, 0, 'cache'
+
+        headers = {}
+        if self.compressed:
+            headers['Accept-Encoding'] = 'gzip, br'
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        started = time.perf_counter()
+        for attempt in range(2):
+            connection = self.connection()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException, OSError):
+                # 服务器关闭了空闲长连接时重连一次
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+        elapsed = time.perf_counter() - started
+
+        if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+            connection.close()
+            self.local.connection = None
+        if response.status == 200:
+            self.cache[path] = {
+                'etag': response.getheader('ETag'),
+                'last_modified': response.getheader('Last-Modified'),
+                'cache_control': (response.getheader('Cache-Control') or '').lower(),
+                'stored': time.time(),
+            }
+        elif response.status == 304 and entry is not None:
+            entry['stored'] = time.time()
+        return elapsed, len(body), response.status
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+
+def load_page(session, pool, waterfall):
+    """按瀑布顺序加载一个页面，返回每个请求的记录和首字节到最后字节的总耗时"""
+    started = time.perf_counter()
+    records = [session.fetch(waterfall.page)]
+    for stage in (waterfall.resources, waterfall.fetches):
+        if stage:
+            records.extend(pool.map(session.fetch, stage))
+    return records, time.perf_counter() - started
+
+def run_pass(host, port, waterfalls, browsers, sessions, compressed):
+    """让所有浏览器同时加载全部页面，sessions 为None时使用空缓存的新浏览器"""
+    if sessions is None:
+        sessions = [BrowserSession(host, port, compressed) for _ in range(browsers)]
+
+    def browse(session):
+        results = []
+        with ThreadPoolExecutor(CONNECTIONS_PER_BROWSER) as pool:
+            for waterfall in waterfalls:
+                results.append((waterfall.page,) + load_page(session, pool, waterfall))
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(len(sessions)) as pool:
+        outcomes = list(pool.map(browse, sessions))
+    wall = time.perf_counter() - started
+    return sessions, outcomes, wall
+
+def summarize(outcomes, wall):
+    """汇总一轮压测: 延迟百分位、吞吐量、字节数、各页面的TTLB"""
+    latencies, statuses, page_times = [], {}, {}
+    total_bytes = 0
+    requests = 0
+    for browser in outcomes:
+        for page, records, elapsed in browser:
+            page_times.setdefault(page, []).append(elapsed)
+            for latency, nbytes, status in records:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if status == 'cache':
+                    continue
+                requests += 1
+                latencies.append(latency)
+                total_bytes += nbytes
+
+    def ms(value):
+        return round(value * 1000, 2)
+
+    return {
+        'requests': requests,
+        'statuses': statuses,
+        'wall_seconds': round(wall, 4),
+        'requests_per_second': round(requests / wall, 1) if wall else 0.0,
+        'bytes': total_bytes,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(max(latencies)) if latencies else 0.0,
+        },
+        'ttlb_ms': {
+            page: {'p50': ms(percentile(times, 50)), 'p95': ms(percentile(times, 95))}
+            for page, times in page_times.items()
+        },
+    }
+
+def fetch_server_stats(host, port):
+    """读取 /__stats，获取缓存、压缩和各发送路径的吞吐量"""
+    try:
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        connection.request('GET', '/__stats')
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        if response.status == 200:
+            return json.loads(body)
+    except (OSError, http.client.HTTPException, ValueError):
+        pass
+    return None
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def start_server(mode_args, root, port):
+    """以子进程方式启动 server.py，端口可连接后返回"""
+    command = [sys.executable, str(PROJECT_ROOT / 'server.py'), '--port', str(port),
+               '--no-browser', '--root', str(root)] + mode_args
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务器启动失败: {' '.join(command)}")
+        try:
+            socket.create_connection(('localhost', port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError("等待服务器启动超时")
+
+def stop_server(process):
+    """与Ctrl+C相同的方式停止服务器"""
+    if process.poll() is None:
+        if os.name == 'posix':
+            process.send_signal(signal.SIGINT)
+        else:
+            process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+def benchmark_server(host, port, pages, browsers, rounds, compressed):
+    """对一个已启动的服务器执行冷启动和热加载压测"""
+    waterfalls = [discover_waterfall(host, port, page) for page in pages]
+    cold_outcomes, warm_outcomes = [], []
+    cold_wall = warm_wall = 0.0
+    for _ in range(rounds):
+        sessions, outcomes, wall = run_pass(host, port, waterfalls, browsers, None, compressed)
+        cold_outcomes += outcomes
+        cold_wall += wall
+        sessions, outcomes, wall = run_pass(host, port, waterfalls, browsers, sessions, compressed)
+        warm_outcomes += outcomes
+        warm_wall += wall
+        for session in sessions:
+            session.close()
+    return {
+        'waterfalls': [waterfall.to_dict() for waterfall in waterfalls],
+        'cold': summarize(cold_outcomes, cold_wall),
+        'warm': summarize(warm_outcomes, warm_wall),
+        'server_stats': fetch_server_stats(host, port),
+    }
+
+def resolve_pages(root, patterns):
+    """展开页面参数，支持 test-*.html 这样的通配符"""
+    pages = []
+    for pattern in patterns:
+        matches = sorted(path.name for path in Path(root).glob(pattern)) if '*' in pattern else [pattern]
+        for page in matches:
+            if page not in pages:
+                pages.append(page)
+    return pages
+
+def git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def print_summary(mode, result):
+    """打印单个模式的结果"""
+    print(f"\n📊 {mode}")
+    for phase in ('cold', 'warm'):
+        data = result[phase]
+        latency = data['latency_ms']
+        print(f"  {phase:<5} 请求 {data['requests']:>5}  {data['requests_per_second']:>8.1f} req/s  "
+              f"p50 {latency['p50']:>7.2f}ms  p95 {latency['p95']:>7.2f}ms  "
+              f"p99 {latency['p99']:>7.2f}ms  传输 {data['bytes'] / 1024:>9.1f} KB")
+        for page, ttlb in data['ttlb_ms'].items():
+            print(f"        {page}: TTLB p50 {ttlb['p50']:.1f}ms  p95 {ttlb['p95']:.1f}ms")
+    stats = result.get('server_stats') or {}
+    for method, transfer in (stats.get('transfers') or {}).items():
+        print(f"  发送路径 {method:<14} {transfer['responses']:>6} 次  "
+              f"{transfer['bytes'] / 1024 / 1024:>8.1f} MB  {transfer['mb_per_s'] or 0:>8.1f} MB/s")
+
+def compare_results(paths):
+    """并排比较多次压测结果 (例如不同提交)"""
+    runs = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            runs.append((Path(path).name, json.load(f)))
+    modes = []
+    for _, data in runs:
+        for mode in data['results']:
+            if mode not in modes:
+                modes.append(mode)
+
+    print(f"{'模式':<20}{'结果文件':<36}{'冷 p95(ms)':>12}{'冷 req/s':>10}{'热 p95(ms)':>12}{'热 KB':>10}")
+    for mode in modes:
+        for name, data in runs:
+            result = data['results'].get(mode)
+            if result is None:
+                continue
+            cold, warm = result['cold'], result['warm']
+            print(f"{mode:<20}{name:<36}{cold['latency_ms']['p95']:>12.2f}"
+                  f"{cold['requests_per_second']:>10.1f}{warm['latency_ms']['p95']:>12.2f}"
+                  f"{warm['bytes'] / 1024:>10.1f}")
+
+def main():
+    """主函数"""
+    if '--help' in sys.argv or '-h' in sys.argv:
+        print("3D脱硫塔工艺流程图 - 服务器压测工具")
+        print("\n用法:")
+        print("  python benchmark.py                          # 压测默认模式 (threaded)")
+        print("  python benchmark.py --modes threaded,asyncio,compressed")
+        print("  python benchmark.py --browsers 20 --rounds 3 # 并发浏览器数与轮数")
+        print("  python benchmark.py --pages 'index.html,test-*.html'")
+        print("  python benchmark.py --root dist              # 压测构建产物")
+        print("  python benchmark.py --url http://localhost:8000  # 压测已运行的服务器")
+        print("  python benchmark.py --output result.json     # 指定结果文件")
+        print("  python benchmark.py --compare a.json b.json  # 比较多次结果")
+        print(f"\n可用模式: {', '.join(MODES)}")
+        return
+
+    if '--compare' in sys.argv:
+        compare_results(sys.argv[sys.argv.index('--compare') + 1:])
+        return
+
+    browsers = parse_int_option('--browsers', 10)
+    rounds = parse_int_option('--rounds', 1)
+    root = Path(parse_value_option('--root', str(PROJECT_ROOT))).resolve()
+    pages = resolve_pages(root, parse_value_option('--pages', 'index.html').split(','))
+    modes = parse_value_option('--modes', 'threaded').split(',')
+    url = parse_value_option('--url', None)
+    output = parse_value_option('--output', None)
+
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown and url is None:
+        print(f"❌ 未知模式: {', '.join(unknown)}")
+        sys.exit(1)
+
+    print("🚀 开始压测...")
+    print(f"📄 页面: {', '.join(pages)}")
+    print(f"👥 并发浏览器: {browsers}  轮数: {rounds}")
+    print("=" * 60)
+
+    results = {}
+    if url is not None:
+        parts = urllib.parse.urlsplit(url)
+        compressed = '--compressed' in sys.argv
+        results['external'] = benchmark_server(parts.hostname, parts.port or 80, pages,
+                                               browsers, rounds, compressed)
+        print_summary('external', results['external'])
+    else:
+        for mode in modes:
+            port = free_port()
+            process = start_server(MODES[mode]['args'], root, port)
+            try:
+                results[mode] = benchmark_server('localhost', port, pages, browsers, rounds,
+                                                 MODES[mode]['compressed'])
+            finally:
+                stop_server(process)
+            print_summary(mode, results[mode])
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'root': str(root),
+        'pages': pages,
+        'browsers': browsers,
+        'rounds': rounds,
+        'results': results,
+    }
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("=" * 60)
+    print(f"✅ 压测结果已保存: {output}")
+
+if __name__ == '__main__':
+    main()
@@ -6,26 +6,28 @@
 
 此脚本用于将项目部署到GitHub Pages，包括：
 1. 构建项目
-2. 创建gh-pages分支
-3. 复制文件到gh-pages分支
-4. 添加.nojekyll文件
-5. 推送到GitHub
+2. 用git底层命令从dist目录生成gh-pages分支的提交 (含.nojekyll文件)
+3. 推送到GitHub
+
+用法: python deploy-to-github-pages.py [--remote 远程名称或仓库路径] [--branch 分支] [--skip-build]
 """
 
 import os
 import sys
 import subprocess
-import shutil
 from pathlib import Path
-import time
+
+from ghpages import GitError, PagesPublisher
+from server import parse_value_option
 
 
 class GitHubPagesDeployer:
-    def __init__(self):
+    def __init__(self, remote='origin', branch='gh-pages', skip_build=False):
         self.project_root = Path(os.getcwd()).resolve()
         self.dist_dir = self.project_root / 'dist'
-        self.temp_dir = self.project_root / 'temp_gh_pages'
-        self.branch_name = 'gh-pages'
+        self.branch_name = branch
+        self.remote = remote
+        self.skip_build = skip_build
         
         print("\n" + "=" * 60)
         print("🚀 3D脱硫塔工艺流程图 - GitHub Pages 部署工具")
@@ -50,7 +52,12 @@ class GitHubPagesDeployer:
             return True
         except subprocess.SubprocessError:
             print("❌ 当前目录不是Git仓库")
-            choice = input("是否初始化Git仓库? (y/n): ").strip().lower()
+            try:
+                choice = input("是否初始化Git仓库? (y/n): ").strip().lower()
+            except EOFError:
+                # 非交互运行 (例如由auto-deploy.py并发部署启动) 时不初始化
+                print()
+                return False
             if choice == 'y':
                 try:
                     subprocess.run(['git', 'init'], check=True)
@@ -93,140 +100,19 @@ class GitHubPagesDeployer:
             print(f"❌ 构建项目失败: {e}")
             return False
     
-    def prepare_gh_pages(self):
-        """准备gh-pages分支"""
-        print("\n🔄 准备gh-pages分支...")
-        
-        try:
-            # 获取当前分支
-            current_branch = subprocess.run(
-                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                capture_output=True, text=True, check=True
-            ).stdout.strip()
-            
-            # 检查远程分支
-            remote_branches = subprocess.run(
-                ['git', 'branch', '-r'],
-                capture_output=True, text=True, check=True
-            ).stdout
-            
-            # 检查本地分支
-            local_branches = subprocess.run(
-                ['git', 'branch'],
-                capture_output=True, text=True, check=True
-            ).stdout
-            
-            # 创建临时目录
-            if self.temp_dir.exists():
-                shutil.rmtree(self.temp_dir)
-            self.temp_dir.mkdir(parents=True)
-            
-            # 复制dist目录内容到临时目录
-            for item in self.dist_dir.iterdir():
-                if item.is_file():
-                    shutil.copy2(item, self.temp_dir)
-                else:
-                    dst = self.temp_dir / item.name
-                    if dst.exists():
-                        shutil.rmtree(dst)
-                    shutil.copytree(item, dst)
-            
-            # 创建.nojekyll文件
-            (self.temp_dir / '.nojekyll').touch()
-            
-            # 如果远程或本地存在gh-pages分支
-            if f'origin/{self.branch_name}' in remote_branches or self.branch_name in local_branches:
-                # 切换到gh-pages分支
-                if self.branch_name in local_branches:
-                    subprocess.run(['git', 'checkout', self.branch_name], check=True)
-                else:
-                    subprocess.run(['git', 'checkout', '-b', self.branch_name, f'origin/{self.branch_name}'], check=True)
-                
-                # 清空当前目录（保留.git）
-                for item in self.project_root.iterdir():
-                    if item.name != '.git' and item.name != str(self.temp_dir.name):
-                        if item.is_file():
-                            item.unlink()
-                        else:
-                            shutil.rmtree(item)
-            else:
-                # 创建新的gh-pages分支
-                subprocess.run(['git', 'checkout', '--orphan', self.branch_name], check=True)
-                # 清空工作目录
-                subprocess.run(['git', 'rm', '-rf', '.'], check=True)
-            
-            # 复制临时目录内容到项目根目录
-            for item in self.temp_dir.iterdir():
-                if item.is_file():
-                    shutil.copy2(item, self.project_root)
-                else:
-                    dst = self.project_root / item.name
-                    if dst.exists():
-                        shutil.rmtree(dst)
-                    shutil.copytree(item, dst)
-            
-            print("✅ gh-pages分支准备完成")
-            return current_branch
-        except subprocess.SubprocessError as e:
-            print(f"❌ 准备gh-pages分支失败: {e}")
-            return None
-        finally:
-            # 清理临时目录
-            if self.temp_dir.exists():
-                shutil.rmtree(self.temp_dir)
-    
-    def commit_and_push(self):
-        """提交并推送到GitHub"""
-        print("\n📤 提交并推送到GitHub...")
+    def publish(self):
+        """从dist目录直接生成gh-pages分支的提交并推送 (不切换分支，不改动工作区)"""
+        print(f"\n📤 发布到 {self.remote} {self.branch_name} 分支...")
         
         try:
-            # 添加所有文件
-            subprocess.run(['git', 'add', '.'], check=True)
-            
-            # 提交更改
-            commit_msg = f"Deploy to GitHub Pages - {time.strftime('%Y-%m-%d %H:%M:%S')}"
-            subprocess.run(['git', 'commit', '-m', commit_msg], check=True)
-            
-            # 推送到GitHub
-            push_result = subprocess.run(
-                ['git', 'push', 'origin', self.branch_name],
-                capture_output=True, text=True
-            )
-            
-            if push_result.returncode == 0:
-                print("✅ 成功推送到GitHub")
-                return True
-            else:
-                print(f"❌ 推送失败: {push_result.stderr}")
-                
-                # 询问是否强制推送
-                choice = input("是否强制推送? (y/n): ").strip().lower()
-                if choice == 'y':
-                    force_push = subprocess.run(
-                        ['git', 'push', '-f', 'origin', self.branch_name],
-                        capture_output=True, text=True
-                    )
-                    if force_push.returncode == 0:
-                        print("✅ 强制推送成功")
-                        return True
-                    else:
-                        print(f"❌ 强制推送失败: {force_push.stderr}")
-                        return False
-                else:
-                    return False
-        except subprocess.SubprocessError as e:
-            print(f"❌ 提交并推送失败: {e}")
+            publisher = PagesPublisher(self.project_root, self.dist_dir,
+                                       branch=self.branch_name, remote=self.remote)
+            publisher.publish()
+            return True
+        except GitError as e:
+            print(f"❌ 发布失败: {e}")
             return False
     
-    def switch_back(self, original_branch):
-        """切换回原始分支"""
-        if original_branch:
-            try:
-                subprocess.run(['git', 'checkout', original_branch], check=True)
-                print(f"✅ 已切换回 {original_branch} 分支")
-            except subprocess.SubprocessError as e:
-                print(f"❌ 切换回原始分支失败: {e}")
-    
     def show_instructions(self):
         """显示GitHub Pages设置说明"""
         print("\n" + "=" * 60)
@@ -245,38 +131,32 @@ class GitHubPagesDeployer:
         print("=" * 60)
     
     def run(self):
-        """运行部署流程"""
+        """运行部署流程，返回是否成功"""
         # 检查Git
         if not self.check_git():
-            return
+            return False
         
         # 检查Git仓库
         if not self.check_git_repo():
-            return
+            return False
         
         # 构建项目
-        if not self.build_project():
-            return
-        
-        # 准备gh-pages分支
-        original_branch = self.prepare_gh_pages()
-        if original_branch is None:
-            return
-        
-        # 提交并推送
-        success = self.commit_and_push()
-        
-        # 切换回原始分支
-        self.switch_back(original_branch)
+        if not self.skip_build and not self.build_project():
+            return False
         
-        # 显示说明
-        if success:
-            self.show_instructions()
+        # 发布到gh-pages分支
+        if not self.publish():
+            return False
+        self.show_instructions()
+        return True
 
 
 def main():
-    deployer = GitHubPagesDeployer()
-    deployer.run()
+    deployer = GitHubPagesDeployer(remote=parse_value_option('--remote', 'origin'),
+                                   branch=parse_value_option('--branch', 'gh-pages'),
+                                   skip_build='--skip-build' in sys.argv)
+    if not deployer.run():
+        sys.exit(1)
 
 
 if __name__ == '__main__':
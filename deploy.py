@@ -6,20 +6,778 @@
 """
 
 import os
+import re
+import posixpath
 import sys
+import time
 import shutil
+import fnmatch
 import json
+import gzip
+import zlib
+import base64
+import hashlib
 import subprocess
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from jsdeps import critical_scripts
+from jsminify import minify_file
+from server import (ENCODING_SUFFIXES, HASHED_NAME, MIN_COMPRESSION_GAIN, SERVICE_WORKER,
+                    is_compressible, parse_int_option)
+
+try:
+    import brotli  # 可选依赖，没有安装时清单中只记录gzip压缩后的大小
+except ImportError:
+    brotli = None
+
+# 内容哈希文件名中哈希的长度 (十六进制字符)
+HASH_LENGTH = 8
+
+def rewrite_asset_references(content, asset_map):
+    """把引号中的资源路径替换为哈希文件名
+
+    匹配 "js/main.js"、'./config/tower-config.json' 等写法，保留原有的 ./ 前缀和引号。
+    """
+    if not asset_map:
+        return content
+    pattern = re.compile(
+        rb"""(["'`])(\./)?(""" +
+        b'|'.join(re.escape(path.encode('utf-8')) for path in sorted(asset_map, key=len, reverse=True)) +
+        rb""")([?#][^"'`]*)?\1""")
+    
+    def replace(match):
+        quote, prefix, path, suffix = match.groups()
+        hashed = asset_map[path.decode('utf-8')].encode('utf-8')
+        return quote + (prefix or b'') + hashed + (suffix or b'') + quote
+    
+    return pattern.sub(replace, content)
+
+# 增量构建缓存目录 (位于项目根目录)
+BUILD_CACHE_DIR = '.build-cache'
+
+# 部署阶段生成的文件，不属于页面资源，不写入部署清单
+GENERATED_FILES = {
+    'manifest.json', 'nginx.conf', 'Dockerfile', 'docker-compose.yml',
+    'deploy.sh', 'README_DEPLOY.md'
+}
+
+# index.html 中单独占一行的 <script src="..."></script>
+SCRIPT_TAG = re.compile(r'^[ \t]*<script\s+src="([^"]+)"\s*>\s*</script>[ \t]*\r?\n?', re.M)
+
+# 首帧之后再加载延迟分块的脚本，插入到 </body> 之前
+DEFERRED_LOADER = """    <script>
+    // 首帧之后再加载的设备脚本 (由 deploy.py 生成)
+    window.addEventListener('load', function () {{
+        (window.requestIdleCallback || setTimeout)(function () {{
+            var script = document.createElement('script');
+            script.src = '{src}';
+            document.body.appendChild(script);
+        }});
+    }});
+    </script>
+"""
+
+# 配置数据内联到 index.html 时的数据块 id，以及合并数据文件的预加载链接 id
+# (DesulfurizationTower.js 中的 loadTowerData 按这两个 id 查找)
+DATA_BLOCK_ID = 'tower-data'
+DATA_BUNDLE_ID = 'tower-data-bundle'
+
+JSON_TYPES = {
+    'object': dict, 'array': list, 'string': str, 'boolean': bool,
+    'null': type(None), 'number': (int, float), 'integer': int,
+}
+
+def schema_errors(value, schema, path='$'):
+    """按 JSON Schema 的常用子集校验数据，返回错误列表
+
+    支持 type、enum、required、properties、items、minItems、minimum、exclusiveMinimum、maximum。
+    """
+    expected = schema.get('type')
+    if expected:
+        python_type = JSON_TYPES[expected]
+        # bool 是 int 的子类，但在 JSON 中不是数字
+        if not isinstance(value, python_type) or (isinstance(value, bool) and expected != 'boolean'):
+            return [f"{path}: 应为 {expected}，实际为 {json.dumps(value, ensure_ascii=False)[:40]}"]
+    
+    errors = []
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f"{path}: 取值必须是 {schema['enum']} 之一")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if 'minimum' in schema and value < schema['minimum']:
+            errors.append(f"{path}: 不能小于 {schema['minimum']}")
+        if 'exclusiveMinimum' in schema and value <= schema['exclusiveMinimum']:
+            errors.append(f"{path}: 必须大于 {schema['exclusiveMinimum']}")
+        if 'maximum' in schema and value > schema['maximum']:
+            errors.append(f"{path}: 不能大于 {schema['maximum']}")
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{path}: 缺少字段 {key}")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors += schema_errors(value[key], subschema, f"{path}.{key}")
+    if isinstance(value, list):
+        if len(value) < schema.get('minItems', 0):
+            errors.append(f"{path}: 至少需要 {schema['minItems']} 项")
+        if 'items' in schema:
+            for index, item in enumerate(value):
+                errors += schema_errors(item, schema['items'], f"{path}[{index}]")
+    return errors
+
+def inline_json(data):
+    """序列化为可以放进 <script type="application/json"> 的紧凑JSON"""
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    # 避免数据中的 </script> 或 <!-- 提前结束脚本块
+    return text.replace('</', '<\\/').replace('<!--', '<\\u0021--')
+
+# 注册 Service Worker 的脚本，插入到 </body> 之前
+SERVICE_WORKER_REGISTRATION = """    <script>
+    // 注册 Service Worker，重复访问时从本地缓存加载资源 (由 deploy.py 生成)
+    if ('serviceWorker' in navigator) {{
+        window.addEventListener('load', function () {{
+            navigator.serviceWorker.register('{src}').catch(function (error) {{
+                console.warn('Service Worker 注册失败:', error);
+            }});
+        }});
+    }}
+    </script>
+"""
+
+# Service Worker 模板，/*__NAME__*/ 由 generate_service_worker 替换为JSON数据
+SERVICE_WORKER_TEMPLATE = """// 3D脱硫塔工艺流程图 - Service Worker
+// 由 deploy.py 根据部署清单生成，请勿手动修改
+const CACHE_PREFIX = /*__PREFIX__*/;
+const CACHE_NAME = CACHE_PREFIX + /*__VERSION__*/;
+// 安装时预缓存的部署文件 (相对于 Service Worker 所在目录)
+const PRECACHE = /*__PRECACHE__*/;
+// 文件名带内容哈希的资源，内容不会变化，优先使用缓存
+const IMMUTABLE = /*__IMMUTABLE__*/;
+// 页面引用的CDN脚本，URL中带版本号，优先使用缓存
+const CDN = /*__CDN__*/;
+
+const scoped = (path) => new URL(path, self.registration.scope).href;
+const immutable = new Set(IMMUTABLE.map(scoped));
+
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(CACHE_NAME);
+        // 绕过HTTP缓存，保证缓存的是本次部署的文件
+        await cache.addAll(PRECACHE.map((path) => new Request(scoped(path), { cache: 'reload' })));
+        // CDN暂时不可用不影响安装，首次请求时再缓存
+        await Promise.all(CDN.map((url) => cache.add(url).catch(() => {})));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        // 删除旧版本的缓存
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter((name) => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME)
+            .map((name) => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+async function cacheFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    // 跨域脚本没有CORS时响应为 opaque，同样可以缓存
+    if (response.ok || response.type === 'opaque') {
+        cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function networkFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        // 离线时使用缓存，页面导航回退到首页
+        const cached = await cache.match(request, { ignoreSearch: request.mode === 'navigate' })
+            || (request.mode === 'navigate' && await cache.match(scoped('./')));
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    // 只处理普通GET请求，Range请求交给浏览器
+    if (request.method !== 'GET' || request.headers.has('range')) {
+        return;
+    }
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        if (CDN.includes(request.url)) {
+            event.respondWith(cacheFirst(request));
+        }
+        return;
+    }
+    if (immutable.has(url.origin + url.pathname)) {
+        event.respondWith(cacheFirst(request));
+    } else {
+        // HTML 及其他未加哈希的文件优先从网络获取，离线时使用缓存
+        event.respondWith(networkFirst(request));
+    }
+});
+"""
+
+VLQ_DIGITS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+def vlq_encode(value):
+    """Source Map v3 使用的 Base64 VLQ 编码"""
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ''
+    while True:
+        digit = value & 0x1f
+        value >>= 5
+        encoded += VLQ_DIGITS[digit | (0x20 if value else 0)]
+        if not value:
+            return encoded
+
+def is_local_script(src):
+    return not re.match(r'^(?:[a-z]+:)?//', src, re.I)
+
+def plan_bundles(html, chunks):
+    """根据 index.html 中的脚本顺序和 bundle.chunks 配置划分分块
+
+    每个分块从配置的 "from" 脚本开始，到下一个分块的起点为止，保证分块按顺序加载后
+    与原来逐个加载的执行顺序相同。第一个分块之前的脚本保持原样。
+    返回 [(分块文件的相对路径, [脚本相对路径, ...]), ...]。
+    """
+    scripts = [match.group(1) for match in SCRIPT_TAG.finditer(html)]
+    local = [posixpath.normpath(src) for src in scripts if is_local_script(src)]
+    
+    starts = []
+    for chunk in chunks:
+        start = posixpath.normpath(chunk['from'])
+        if start not in local:
+            raise BuildError(f"bundle.chunks: {chunk['from']} 不在 index.html 的脚本中")
+        starts.append(local.index(start))
+    if starts != sorted(starts) or len(set(starts)) != len(starts):
+        raise BuildError("bundle.chunks: 分块起点必须按 index.html 中的脚本顺序排列")
+    
+    plan = []
+    for index, (chunk, start) in enumerate(zip(chunks, starts)):
+        end = starts[index + 1] if index + 1 < len(starts) else len(local)
+        members = local[start:end]
+        # 分块内夹着的外部脚本 (CDN) 会改变执行顺序
+        first, last = scripts.index(chunk['from']), scripts.index(members[-1])
+        outside = [src for src in scripts[first:last + 1] if not is_local_script(src)]
+        if outside:
+            raise BuildError(f"bundle.chunks: 分块 {chunk['name']} 中间包含外部脚本 {outside[0]}")
+        output = chunk.get('output', f"js/{chunk['name']}.bundle.js")
+        plan.append((output, members))
+    return plan
+
+def concat_scripts(output, members):
+    """按顺序拼接经典脚本，返回 (分块代码, Source Map)
+
+    各脚本之间插入单独一行的 ; 防止自动分号插入把相邻文件连在一起；
+    顶层声明仍在同一个全局作用域中，语义与逐个 <script> 加载相同。
+    Source Map 按行映射回各个原始文件，并附带 sourcesContent。
+    """
+    lines = []
+    mappings = []
+    previous_source = previous_line = 0
+    for index, (rel, text) in enumerate(members):
+        source_lines = text.split('\n')
+        if source_lines and source_lines[-1] == '':
+            source_lines.pop()
+        for number, line in enumerate(source_lines):
+            mappings.append('A' + vlq_encode(index - previous_source)
+                            + vlq_encode(number - previous_line) + 'A')
+            previous_source, previous_line = index, number
+            lines.append(line)
+        lines.append(';')
+        mappings.append('')
+    
+    name = posixpath.basename(output)
+    lines.append(f'//# sourceMappingURL={name}.map')
+    source_map = {
+        'version': 3,
+        'file': name,
+        'sources': [posixpath.relpath(rel, posixpath.dirname(output)) for rel, _ in members],
+        'sourcesContent': [text for _, text in members],
+        'names': [],
+        'mappings': ';'.join(mappings),
+    }
+    return '\n'.join(lines) + '\n', source_map
+
+class BuildError(Exception):
+    """构建任务失败，消息中包含出错的文件"""
+
+class BudgetError(BuildError):
+    """构建结果超出性能预算；构建目录本身是完整的"""
+
+class BuildPool:
+    """构建任务执行器
+
+    哈希、改写引用等CPU密集的任务交给进程池，复制文件等IO任务交给线程池；
+    jobs 为1时在当前进程中顺序执行。结果总是按提交顺序返回，构建输出与并行度无关。
+    """
+    
+    def __init__(self, jobs=1):
+        self.jobs = max(1, jobs)
+        self.processes = None
+        self.threads = None
+    
+    def map(self, func, tasks, cpu=True):
+        """执行 [(文件, 参数元组), ...]，任何一个任务失败都抛出带文件名的 BuildError"""
+        tasks = list(tasks)
+        if self.jobs == 1 or len(tasks) <= 1:
+            return [self.run(label, func, args) for label, args in tasks]
+        
+        if cpu:
+            if self.processes is None:
+                self.processes = ProcessPoolExecutor(max_workers=self.jobs)
+            executor = self.processes
+        else:
+            if self.threads is None:
+                self.threads = ThreadPoolExecutor(max_workers=self.jobs)
+            executor = self.threads
+        
+        futures = [(label, executor.submit(func, *args)) for label, args in tasks]
+        try:
+            return [self.result(label, future) for label, future in futures]
+        except BuildError:
+            for _, future in futures:
+                future.cancel()
+            raise
+    
+    @staticmethod
+    def run(label, func, args):
+        try:
+            return func(*args)
+        except Exception as e:
+            raise BuildError(f"{label}: {e}") from e
+    
+    @staticmethod
+    def result(label, future):
+        try:
+            return future.result()
+        except Exception as e:
+            raise BuildError(f"{label}: {e}") from e
+    
+    def close(self):
+        for executor in (self.processes, self.threads):
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        self.processes = self.threads = None
+
+def copy_file(src, dst):
+    """复制单个文件并保留mtime"""
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(src, dst)
+
+# 文件末尾指向同目录 Source Map 的注释
+SOURCE_MAP_COMMENT = re.compile(rb'//# sourceMappingURL=([^\s/]+\.map)\s*\Z')
+
+def fingerprint_file(file_path, asset_map=None):
+    """把文件重命名为带内容哈希的文件名，返回新路径
+
+    asset_map 不为空时先改写文件中引用的资源路径，哈希基于改写后的内容。
+    文件末尾引用了同目录的 Source Map 时，Source Map 一起改为 <哈希文件名>.map，
+    并更新引用注释和 Source Map 的 file 字段。
+    """
+    file_path = Path(file_path)
+    content = file_path.read_bytes()
+    if asset_map:
+        content = rewrite_asset_references(content, asset_map)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    hashed_path = file_path.with_name(f"{file_path.stem}.{digest}{file_path.suffix}")
+    
+    match = SOURCE_MAP_COMMENT.search(content)
+    map_path = file_path.with_name(match.group(1).decode('utf-8')) if match else None
+    if map_path is not None and map_path.is_file():
+        hashed_map = hashed_path.with_name(hashed_path.name + '.map')
+        content = content[:match.start(1)] + hashed_map.name.encode('utf-8') + content[match.end(1):]
+        source_map = json.loads(map_path.read_text(encoding='utf-8'))
+        source_map['file'] = hashed_path.name
+        with open(hashed_map, 'w', encoding='utf-8') as f:
+            json.dump(source_map, f, ensure_ascii=False)
+        shutil.copystat(map_path, hashed_map)
+        map_path.unlink()
+    
+    hashed_path.write_bytes(content)
+    shutil.copystat(file_path, hashed_path)
+    file_path.unlink()
+    return hashed_path
+
+def file_digest(path):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# CDN依赖的本地缓存目录 (位于项目根目录)，按 主机/路径 存放，预先放入文件即可离线构建
+VENDOR_CACHE_DIR = '.vendor-cache'
+
+# CDN地址中的 Three.js 版本号: three.js/r128、three@0.128.0
+THREE_RELEASE = re.compile(r'three(?:\.js)?(?:/r|@0\.)(\d+)', re.I)
+
+def three_release(url):
+    """返回URL中的 Three.js 版本号 (r128 与 0.128.x 都返回128)，没有时返回None"""
+    match = THREE_RELEASE.search(url)
+    return int(match.group(1)) if match else None
+
+def vendor_cache_path(cache_dir, url):
+    parts = urllib.parse.urlsplit(url)
+    return Path(cache_dir) / parts.netloc / parts.path.lstrip('/')
+
+def fetch_vendor_file(url, cache_dir, timeout=30):
+    """返回CDN文件的内容，缓存中没有时下载并写入缓存"""
+    path = vendor_cache_path(cache_dir, url)
+    if path.is_file():
+        return path.read_bytes()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            content = response.read()
+    except OSError as e:
+        raise BuildError(f"下载失败 ({e})，离线构建时请预先把文件放到 {path}") from e
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    return content
+
+# 性能预算检查时列出的最大文件数 (关键路径上的文件总是列出)
+BUDGET_TOP_FILES = 10
+
+# 预压缩文件 (.gz / .br) 的后缀
+SIDECAR_SUFFIXES = tuple(ENCODING_SUFFIXES.values())
+
+def asset_digest(path):
+    """返回 (SHA-256, SRI integrity, {编码: 压缩后大小})，压缩级别与服务器一致
+
+    预压缩文件本身不再统计压缩后的大小。
+    """
+    content = Path(path).read_bytes()
+    digest = hashlib.sha256(content)
+    compressed = {}
+    if not str(path).endswith(SIDECAR_SUFFIXES):
+        compressed['gzip'] = len(gzip.compress(content, compresslevel=6, mtime=0))
+        if brotli is not None:
+            compressed['br'] = len(brotli.compress(content))
+    integrity = 'sha256-' + base64.b64encode(digest.digest()).decode('ascii')
+    return digest.hexdigest(), integrity, compressed
+
+# 预压缩时尝试的 zlib 参数组合 (压缩级别, memLevel, 策略)，保留结果最小的一个；
+# 窗口固定为最大的32KB (wbits=31 表示gzip格式)，更小的窗口只会让结果变大
+GZIP_STRATEGIES = [
+    (level, mem_level, strategy)
+    for level in (6, 9)
+    for mem_level in (8, 9)
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+]
+
+def gzip_best(content):
+    """用多组 zlib 参数压缩为gzip格式，返回最小的结果 (头部mtime为0，输出可重现)"""
+    best = None
+    for level, mem_level, strategy in GZIP_STRATEGIES:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31, mem_level, strategy)
+        data = compressor.compress(content) + compressor.flush()
+        if best is None or len(data) < len(best):
+            best = data
+    return best
+
+def precompress_file(path, use_brotli=True):
+    """在文件旁生成 .gz (brotli可用时还有 .br) 预压缩文件，返回 {编码: 压缩后大小}
+
+    压缩后不小于原大小的 MIN_COMPRESSION_GAIN 时不生成，并删除旧的预压缩文件。
+    预压缩文件的mtime与原文件相同，服务器据此判断它是否过期。
+    """
+    path = Path(path)
+    content = path.read_bytes()
+    compressors = {'gzip': gzip_best}
+    if use_brotli and brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=11)
+    
+    written = {}
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        sidecar = path.with_name(path.name + suffix)
+        data = compressors[encoding](content) if encoding in compressors else None
+        if data is None or len(data) >= len(content) * MIN_COMPRESSION_GAIN:
+            sidecar.unlink(missing_ok=True)
+            continue
+        sidecar.write_bytes(data)
+        shutil.copystat(path, sidecar)
+        written[encoding] = len(data)
+    return written
+
+# index.html 中引用本地资源的 <script src> / <link href> 标签
+RESOURCE_TAG = re.compile(r'<(?:script|link)\b[^>]*?\s(?:src|href)="([^"]+)"[^>]*>', re.I)
+# 延迟分块加载脚本中的 script.src = '...';
+LOADER_SRC = re.compile(r"^([ \t]*)(\w+)\.src = '([^']+)';$", re.M)
+
+def local_path(src):
+    """标签中引用的本地资源路径 (去掉查询参数)，外部资源返回None"""
+    if not is_local_script(src) or src.startswith(('data:', '#')):
+        return None
+    return posixpath.normpath(src.split('?')[0].split('#')[0]).lstrip('/')
+
+def referenced_paths(html):
+    """index.html 中通过标签或延迟加载脚本引用的本地资源"""
+    sources = [match.group(1) for match in RESOURCE_TAG.finditer(html)]
+    sources += [match.group(3) for match in LOADER_SRC.finditer(html)]
+    return {path for path in map(local_path, sources) if path}
+
+def critical_resources(html):
+    """index.html 中首次渲染前必须下载的资源地址 (按出现顺序去重)
+
+    包括没有 async/defer 的经典脚本、样式表，以及 preload 的资源；延迟加载的分块不计入。
+    """
+    found = []
+    for match in RESOURCE_TAG.finditer(html):
+        tag = match.group(0).lower()
+        if tag.startswith('<script'):
+            if re.search(r'\s(?:async|defer)\b|\stype="module"', tag):
+                continue
+        elif not re.search(r'\srel="(?:stylesheet|preload|modulepreload)"', tag):
+            continue
+        if match.group(1) not in found:
+            found.append(match.group(1))
+    return found
+
+def add_integrity(html, integrity_of):
+    """为引用本地资源的标签加上 integrity 属性，integrity_of 为 路径 -> SRI字符串"""
+    def lookup(src):
+        path = local_path(src)
+        return integrity_of.get(path) if path else None
+    
+    def tag(match):
+        integrity = lookup(match.group(1))
+        if not integrity or re.search(r'\sintegrity=', match.group(0), re.I):
+            return match.group(0)
+        end = -2 if match.group(0).endswith('/>') else -1
+        return match.group(0)[:end].rstrip() + f' integrity="{integrity}"' + match.group(0)[end:]
+    
+    def loader(match):
+        integrity = lookup(match.group(3))
+        if not integrity:
+            return match.group(0)
+        indent, name = match.group(1), match.group(2)
+        return f"{match.group(0)}\n{indent}{name}.integrity = '{integrity}';"
+    
+    return LOADER_SRC.sub(loader, RESOURCE_TAG.sub(tag, html))
+
+def diff_manifests(old, new):
+    """比较两份部署清单，返回 (新增, 内容变化, 删除) 的路径列表
+
+    旧清单中没有记录哈希的文件无法确认内容，一律视为变化。
+    """
+    old_files = {entry['path']: entry for entry in old.get('files', [])}
+    new_files = {entry['path']: entry for entry in new.get('files', [])}
+    added = sorted(set(new_files) - set(old_files))
+    removed = sorted(set(old_files) - set(new_files))
+    changed = []
+    for path in sorted(set(old_files) & set(new_files)):
+        before, after = old_files[path], new_files[path]
+        if 'sha256' not in before or before['sha256'] != after.get('sha256'):
+            changed.append(path)
+    return added, changed, removed
+
+def build_fingerprint(builder, config, *scripts):
+    """构建器、配置和构建脚本本身的指纹，任何一项变化都需要完整重建"""
+    digest = hashlib.sha256(builder.encode('utf-8'))
+    digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+    for script in scripts:
+        digest.update(Path(script).read_bytes())
+    return digest.hexdigest()
+
+def collect_sources(project_root, items, exclude_patterns=()):
+    """列出需要复制的源文件，返回 {构建目录中的相对路径: 源文件}
+
+    exclude_patterns 与 shutil.ignore_patterns 一样匹配文件名和目录名。
+    """
+    def excluded(name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in exclude_patterns)
+    
+    sources = {}
+    for item in items:
+        src_path = project_root / item
+        if src_path.is_file():
+            sources[Path(item).as_posix()] = src_path
+        elif src_path.is_dir():
+            for dirpath, dirnames, filenames in os.walk(src_path):
+                dirnames[:] = sorted(d for d in dirnames if not excluded(d))
+                for name in sorted(filenames):
+                    if not excluded(name):
+                        path = Path(dirpath) / name
+                        sources[path.relative_to(project_root).as_posix()] = path
+    return sources
+
+class BuildCache:
+    """增量构建缓存
+
+    在 .build-cache/ 中记录每个源文件的大小、mtime、内容哈希以及它在构建目录中的输出文件，
+    并记录各构建阶段的输入指纹。源文件未变化且输出仍在时不再复制，输出文件的mtime保持不变。
+    构建器、配置或构建脚本变化时缓存整体失效。
+
+    不同的构建脚本用 name 区分各自的状态文件 (<name>.json)；它们写入同一个构建目录，
+    所以 last-build 记录最后一次成功构建所用的状态，构建目录由其他脚本生成时缓存同样失效。
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, project_root, fingerprint, name='state'):
+        self.name = name
+        self.path = project_root / BUILD_CACHE_DIR / f'{name}.json'
+        self.owner_path = project_root / BUILD_CACHE_DIR / 'last-build'
+        self.fingerprint = fingerprint
+        self.files = {}
+        self.stages = {}
+        # scan 得到的源文件状态，sync 时写入 files
+        self.pending = {}
+        self.valid = False
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            owner = self.owner_path.read_text(encoding='utf-8').strip()
+        except (OSError, ValueError):
+            state, owner = {}, None
+        if (owner == name and state.get('version') == self.VERSION
+                and state.get('fingerprint') == fingerprint):
+            self.files = state.get('files', {})
+            self.stages = state.get('stages', {})
+            self.valid = True
+        # 构建目录即将被修改，成功保存之前它不属于任何一个状态文件
+        self.owner_path.unlink(missing_ok=True)
+    
+    def reset(self):
+        self.files = {}
+        self.stages = {}
+        self.pending = {}
+    
+    def content_hash(self, rel, path, stat):
+        """大小和mtime都未变化时直接使用缓存的哈希，不读取文件
+
+        path 为None时只查缓存，缓存失效返回None。
+        """
+        entry = self.files.get(rel)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        return file_digest(path) if path is not None else None
+    
+    def output_of(self, rel):
+        entry = self.files.get(rel)
+        return entry.get('output', rel) if entry else rel
+    
+    def set_output(self, rel, output):
+        self.files[rel]['output'] = output
+    
+    def scan(self, sources, build_dir, pool=None):
+        """比较源文件与缓存，返回 (需要重新处理的相对路径, 已删除的相对路径)"""
+        pool = pool or BuildPool()
+        stats = {rel: src.stat() for rel, src in sorted(sources.items())}
+        # 只有大小或mtime变化的文件才需要重新计算哈希
+        unknown = [rel for rel, stat in stats.items() if self.content_hash(rel, None, stat) is None]
+        digests = dict(zip(unknown, pool.map(file_digest, [(rel, (sources[rel],)) for rel in unknown])))
+        
+        changed = set()
+        self.pending.clear()
+        for rel, stat in stats.items():
+            sha256 = digests.get(rel) or self.content_hash(rel, None, stat)
+            entry = self.files.get(rel)
+            if not entry or entry['sha256'] != sha256 or not (build_dir / self.output_of(rel)).exists():
+                changed.add(rel)
+            self.pending[rel] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        removed = set(self.files) - set(sources)
+        return changed, removed
+    
+    def remove_output(self, build_dir, rel):
+        """删除源文件上次的输出；哈希文件名或分块的 Source Map 一并删除"""
+        output = self.output_of(rel)
+        (build_dir / output).unlink(missing_ok=True)
+        if output != rel:
+            (build_dir / f'{output}.map').unlink(missing_ok=True)
+    
+    def sync(self, sources, build_dir, dirty, removed, pool=None):
+        """复制 dirty 中的源文件，删除已不存在的源文件对应的输出，其余文件保持原样"""
+        pool = pool or BuildPool()
+        for rel in sorted(removed):
+            self.remove_output(build_dir, rel)
+        
+        files = {}
+        copies = []
+        for rel, src in sorted(sources.items()):
+            entry = dict(self.pending[rel], output=self.output_of(rel))
+            if rel in dirty:
+                # 旧的输出 (例如带旧哈希的文件名) 不再需要
+                if entry['output'] != rel:
+                    self.remove_output(build_dir, rel)
+                copies.append((rel, (src, build_dir / rel)))
+                entry['output'] = rel
+            files[rel] = entry
+        pool.map(copy_file, copies, cpu=False)
+        self.files = files
+    
+    def stage_fresh(self, name, inputs, outputs):
+        """阶段的输入指纹未变化且输出文件都存在时返回True"""
+        return self.stages.get(name) == inputs and all(path.exists() for path in outputs)
+    
+    def record_stage(self, name, inputs):
+        self.stages[name] = inputs
+    
+    def discard(self):
+        """构建失败时删除缓存，构建目录可能处于中间状态，下次需要完整重建"""
+        self.path.unlink(missing_ok=True)
+    
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'version': self.VERSION,
+            'fingerprint': self.fingerprint,
+            'files': self.files,
+            'stages': self.stages,
+        }
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.owner_path.write_text(self.name, encoding='utf-8')
+
 class ProjectDeployer:
     """项目部署器"""
     
-    def __init__(self):
+    def __init__(self, clean=False, jobs=1):
         self.project_root = Path(__file__).parent
         self.build_dir = self.project_root / 'dist'
         self.config = self.load_config()
+        # 原始路径 -> 带内容哈希的文件名，例如 js/main.js -> js/main.3f9a1c2b.js
+        self.asset_map = {}
+        # clean 为True时忽略增量构建缓存，完整重建
+        self.clean = clean
+        self.build_cache = None
+        # 本次构建需要重新处理的源文件 / 已删除的源文件
+        self.dirty = set()
+        self.removed = set()
+        self.sources = {}
+        self.pool = BuildPool(jobs)
+        # 分块文件 -> 其中的脚本，以及脚本 -> 所在分块
+        self.bundles = []
+        self.bundle_of = {}
+        self.deferred_bundle = None
         
     def load_config(self):
         """加载部署配置"""
@@ -40,13 +798,50 @@ class ProjectDeployer:
                 "debug-*.html", "test-*.html", "minimal-debug.html"
             ],
             "cdn": {
-                "three_js": "https://cdn.skypack.dev/three@0.132.2",
-                "orbit_controls": "https://cdn.skypack.dev/three@0.132.2/examples/jsm/controls/OrbitControls.js"
+                "three_js": "https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js",
+                "orbit_controls": "https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/controls/OrbitControls.js",
+                "gltf_loader": "https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/GLTFLoader.js"
+            },
+            "vendor": {
+                "enabled": False,
+                "cache_dir": VENDOR_CACHE_DIR,
+                "output_dir": "vendor",
+                "timeout": 30
             },
             "optimization": {
                 "minify_js": False,
+                "drop_console": False,
+                "verify_minify": True,
                 "compress_assets": True,
-                "generate_manifest": True
+                "brotli": True,
+                "generate_manifest": True,
+                "hash_filenames": True,
+                "subresource_integrity": True
+            },
+            "bundle": {
+                "enabled": False,
+                "chunks": [],
+                "critical_split": {
+                    "enabled": False,
+                    "entry": "js/main.js",
+                    "setup_function": "init",
+                    "first_frame_call": "animate"
+                }
+            },
+            "service_worker": {
+                "enabled": False,
+                "precache_max_kb": 5120
+            },
+            "data": {
+                "mode": "off",
+                "max_inline_kb": 32,
+                "files": {}
+            },
+            "performance": {
+                "budgets": {
+                    "enabled": False,
+                    "mode": "fail"
+                }
             }
         }
     
@@ -54,8 +849,18 @@ class ProjectDeployer:
         """创建构建目录"""
         print(f"🏗️  创建构建目录: {self.build_dir}")
         
+        # 数据校验用的 Schema 也是构建输入
+        schemas = [self.project_root / entry['schema']
+                   for entry in self.config.get('data', {}).get('files', {}).values()
+                   if entry.get('schema') and (self.project_root / entry['schema']).is_file()]
+        self.build_cache = BuildCache(self.project_root,
+                                      build_fingerprint('deploy', self.config, __file__, *schemas))
         if self.build_dir.exists():
-            shutil.rmtree(self.build_dir)
+            if self.clean or not self.build_cache.valid:
+                shutil.rmtree(self.build_dir)
+                self.build_cache.reset()
+            else:
+                print("♻️  复用上次的构建结果，只处理有变化的文件")
         
         self.build_dir.mkdir(parents=True, exist_ok=True)
         print("✅ 构建目录创建完成")
@@ -75,22 +880,315 @@ class ProjectDeployer:
             'config/',
             'data/'
         ]
+        sources = collect_sources(self.project_root, files_to_copy, exclude_patterns)
+        self.sources = sources
         
-        for item in files_to_copy:
-            src_path = self.project_root / item
-            if src_path.exists():
-                if src_path.is_file():
-                    dst_path = self.build_dir / item
-                    dst_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(src_path, dst_path)
-                    print(f"  ✓ 复制文件: {item}")
-                else:
-                    dst_path = self.build_dir / item
-                    shutil.copytree(src_path, dst_path, ignore=shutil.ignore_patterns(*exclude_patterns))
-                    print(f"  ✓ 复制目录: {item}")
+        changed, self.removed = self.build_cache.scan(sources, self.build_dir, self.pool)
+        self.dirty = set(changed)
+        if self.config.get('optimization', {}).get('hash_filenames', True):
+            # JSON 的哈希文件名变化后，引用它的 JS 需要重新改写
+            if any(rel.endswith('.json') for rel in changed | self.removed):
+                self.dirty |= {rel for rel in sources if rel.endswith('.js')}
+        # 分块中任何一个脚本变化，整个分块都需要重新拼接
+        self.plan_bundles()
+        for _, members in self.bundles:
+            if 'index.html' in changed or any(rel in changed | self.removed for rel in members):
+                self.dirty |= set(members)
+        # index.html 引用所有资源，任何变化都需要重新生成
+        if self.dirty or self.removed:
+            self.dirty |= {rel for rel in sources if rel == 'index.html'}
         
+        self.build_cache.sync(sources, self.build_dir, self.dirty, self.removed, self.pool)
+        
+        print(f"  ✓ 复制 {len(self.dirty)} 个文件，"
+              f"{len(sources) - len(self.dirty)} 个未变化，删除 {len(self.removed)} 个")
         print("✅ 项目文件复制完成")
     
+    def plan_bundles(self):
+        """读取 bundle 配置和 index.html 中的脚本顺序，确定分块"""
+        self.bundles = []
+        self.bundle_of = {}
+        self.deferred_bundle = None
+        bundle = self.config.get('bundle', {})
+        index_file = self.project_root / 'index.html'
+        if not bundle.get('enabled', False) or not index_file.exists():
+            return
+        
+        html = index_file.read_text(encoding='utf-8')
+        split = bundle.get('critical_split', {})
+        deferred = self.find_deferred_scripts(html, split) if split.get('enabled', False) else []
+        
+        for output, members in plan_bundles(html, bundle.get('chunks', [])):
+            members = [rel for rel in members if rel in self.sources and rel not in deferred]
+            if members:
+                self.bundles.append((output, members))
+            else:
+                print(f"  ⚠️  分块 {output} 中没有可拼接的脚本，跳过")
+        if deferred:
+            self.deferred_bundle = split.get('output', 'js/deferred.bundle.js')
+            self.bundles.append((self.deferred_bundle, deferred))
+        
+        for output, members in self.bundles:
+            for rel in members:
+                self.bundle_of[rel] = output
+    
+    def find_deferred_scripts(self, html, split):
+        """分析首帧渲染前用不到的脚本，结果按脚本内容缓存"""
+        scripts = [posixpath.normpath(match.group(1)) for match in SCRIPT_TAG.finditer(html)]
+        scripts = [rel for rel in scripts if is_local_script(rel) and rel in self.sources]
+        entry = split.get('entry', 'js/main.js')
+        if entry not in scripts:
+            # 例如源码树中没有 index.html 引用的 js/ 目录：不拆分，所有脚本照常加载
+            print(f"  ⚠️  bundle.critical_split: 入口脚本 {entry} 不在复制的脚本中，跳过首帧分析")
+            return []
+        
+        inputs = hashlib.sha256(json.dumps(
+            [split] + [(rel, self.build_cache.pending[rel]['sha256']) for rel in scripts]
+        ).encode('utf-8')).hexdigest()
+        cached = self.build_cache.stages.get('critical_split')
+        if cached and cached['inputs'] == inputs:
+            return cached['deferred']
+        
+        sources = [(rel, self.sources[rel].read_text(encoding='utf-8')) for rel in scripts]
+        try:
+            critical, deferred = critical_scripts(sources, entry,
+                                                  split.get('setup_function', 'init'),
+                                                  split.get('first_frame_call', 'animate'))
+        except Exception as e:
+            raise BuildError(f"bundle.critical_split: {e}") from e
+        
+        print(f"  ✓ 首帧前需要 {len(critical)} 个脚本，可延迟加载 {len(deferred)} 个: "
+              f"{', '.join(posixpath.basename(rel) for rel in deferred) or '无'}")
+        self.build_cache.record_stage('critical_split', {'inputs': inputs, 'deferred': deferred})
+        return deferred
+    
+    def bundle_scripts(self):
+        """把 index.html 中的脚本按配置拼接为分块，并生成 Source Map"""
+        if not self.bundles:
+            return
+        
+        print("📦 拼接脚本分块...")
+        
+        built = 0
+        for output, members in self.bundles:
+            if not any(rel in self.dirty for rel in members):
+                continue
+            contents = [(rel, (self.build_dir / rel).read_text(encoding='utf-8')) for rel in members]
+            code, source_map = concat_scripts(output, contents)
+            
+            output_path = self.build_dir / output
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_text(code, encoding='utf-8')
+            with open(output_path.with_name(output_path.name + '.map'), 'w', encoding='utf-8') as f:
+                json.dump(source_map, f, ensure_ascii=False)
+            
+            # 脚本已包含在分块中，不再单独部署
+            for rel in members:
+                (self.build_dir / rel).unlink()
+                self.build_cache.set_output(rel, output)
+            built += 1
+            print(f"  ✓ {output}: {len(members)} 个脚本，{len(code.encode('utf-8')) / 1024:.1f} KB")
+        
+        index_file = self.build_dir / 'index.html'
+        if 'index.html' in self.dirty and index_file.exists():
+            html = index_file.read_text(encoding='utf-8')
+            
+            def replace(match):
+                src = posixpath.normpath(match.group(1))
+                if src not in self.bundle_of:
+                    return match.group(0)
+                output = self.bundle_of[src]
+                members = next(m for o, m in self.bundles if o == output)
+                # 延迟分块由生成的加载脚本在首帧之后加载
+                if src != members[0] or output == self.deferred_bundle:
+                    return ''
+                return match.group(0).replace(match.group(1), output)
+            
+            html = SCRIPT_TAG.sub(replace, html)
+            if self.deferred_bundle:
+                body_end = html.rfind('</body>')
+                html = html[:body_end] + DEFERRED_LOADER.format(src=self.deferred_bundle) + html[body_end:]
+            index_file.write_text(html, encoding='utf-8')
+        
+        if built:
+            print(f"✅ 已生成 {built} 个分块 (共 {len(self.bundles)} 个)")
+        else:
+            print("⏭️  脚本未变化，跳过")
+    
+    def minify_scripts(self):
+        """压缩JavaScript文件 (optimization.minify_js)"""
+        optimization = self.config.get('optimization', {})
+        if not optimization.get('minify_js', False):
+            return
+        
+        print("🗜️  压缩JavaScript...")
+        
+        scripts = [rel for rel in sorted(self.dirty)
+                   if rel.endswith('.js') and not rel.endswith('.min.js')]
+        tasks = [(rel, (self.build_dir / rel,
+                        optimization.get('drop_console', False),
+                        optimization.get('verify_minify', True))) for rel in scripts]
+        sizes = self.pool.map(minify_file, tasks)
+        
+        total_before = total_after = 0
+        for rel, (before, after) in zip(scripts, sizes):
+            total_before += before
+            total_after += after
+            print(f"  ✓ {rel}: {before / 1024:.1f} KB → {after / 1024:.1f} KB "
+                  f"(-{(1 - after / before) * 100 if before else 0:.0f}%)")
+        
+        if scripts:
+            print(f"✅ 压缩完成: {len(scripts)} 个文件，{total_before / 1024:.1f} KB → {total_after / 1024:.1f} KB")
+        else:
+            print("⏭️  JavaScript文件未变化，跳过")
+    
+    def vendor_dependencies(self):
+        """把 index.html 引用的CDN脚本和样式表复制到构建目录 (vendor.enabled)
+
+        文件先从本地缓存 (vendor.cache_dir) 读取，缓存中没有时下载；复制到 vendor/ 下带内容哈希的文件名，
+        并改写 index.html 中的地址，所有资源都从同一个源加载。页面和 cdn 配置中的 Three.js 版本不一致时构建失败。
+        """
+        vendor = self.config.get('vendor', {})
+        if not vendor.get('enabled', False):
+            return
+        
+        print("📦 本地化CDN依赖...")
+        
+        index_file = self.build_dir / 'index.html'
+        if 'index.html' not in self.dirty or not index_file.exists():
+            print("⏭️  index.html 未变化，跳过")
+            return
+        
+        html = index_file.read_text(encoding='utf-8')
+        sources = []
+        for match in RESOURCE_TAG.finditer(html):
+            src = match.group(1)
+            if (re.match(r'^(?:https?:)?//', src) and src not in sources
+                    and (match.group(0).lower().startswith('<script') or 'stylesheet' in match.group(0))):
+                sources.append(src)
+        
+        # 同一个页面只能使用一个版本的 Three.js，否则示例脚本与核心库可能不兼容
+        urls = {src: 'https:' + src if src.startswith('//') else src for src in sources}
+        releases = {}
+        for url in list(urls.values()) + list(self.config.get('cdn', {}).values()):
+            release = three_release(url)
+            if release is not None:
+                releases.setdefault(release, []).append(url)
+        if len(releases) > 1:
+            raise BuildError("Three.js 版本不一致 (index.html 与 deploy-config.json 的 cdn):\n    " + '\n    '.join(
+                f"r{release}: {url}" for release, found in sorted(releases.items()) for url in found))
+        
+        cache_dir = self.project_root / vendor.get('cache_dir', VENDOR_CACHE_DIR)
+        output_dir = vendor.get('output_dir', 'vendor')
+        contents = self.pool.map(fetch_vendor_file, [
+            (url, (url, cache_dir, vendor.get('timeout', 30))) for url in urls.values()], cpu=False)
+        
+        outputs = {}
+        for src, content in zip(sources, contents):
+            parts = posixpath.split(urllib.parse.urlsplit(urls[src]).path)
+            stem, suffix = posixpath.splitext(parts[1])
+            # 不同目录下的同名文件加上目录名区分
+            if any(posixpath.basename(output).startswith(stem + '.') for output in outputs.values()):
+                stem = f"{posixpath.basename(parts[0])}-{stem}"
+            output = f"{output_dir}/{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{suffix}"
+            output_path = self.build_dir / output
+            if not output_path.exists():
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                output_path.write_bytes(content)
+            outputs[src] = output
+            print(f"  ✓ {urls[src]} → {output} ({len(content) / 1024:.1f} KB)")
+        
+        # 删除上次构建留下、已不再引用的文件
+        for old_file in (self.build_dir / output_dir).glob('*'):
+            if old_file.is_file() and f"{output_dir}/{old_file.name}" not in outputs.values():
+                old_file.unlink()
+        
+        for src, output in outputs.items():
+            html = html.replace(f'"{src}"', f'"{output}"')
+        index_file.write_text(html, encoding='utf-8')
+        print(f"✅ 已本地化 {len(outputs)} 个CDN文件")
+    
+    def pack_data(self):
+        """校验并压缩启动时需要的配置数据，内联到 index.html 或合并为一个预加载文件
+
+        data.mode 为 inline 时写入 <script type="application/json" id="tower-data">，页面无需额外请求；
+        为 combined 时合并为 data/tower-data.<哈希>.json 并在 head 中预加载，启动时只需一个请求。
+        内联数据超过 max_inline_kb 时改用 combined。
+        """
+        data_config = self.config.get('data', {})
+        mode = data_config.get('mode', 'off')
+        files = data_config.get('files', {})
+        if mode == 'off' or not files:
+            return
+        if mode not in ('inline', 'combined'):
+            raise BuildError(f"data.mode: 不支持的模式 {mode}")
+        
+        print("🧩 打包配置数据...")
+        
+        index_file = self.build_dir / 'index.html'
+        if 'index.html' not in self.dirty or not index_file.exists():
+            print("⏭️  配置数据未变化，跳过")
+            return
+        
+        payload = {}
+        for key, entry in files.items():
+            rel = entry['path']
+            if rel not in self.sources:
+                print(f"  ⚠️  {rel} 不存在，运行时使用默认值")
+                continue
+            # 未变化的文件上次已经校验并压缩过，位于上次的输出位置
+            data_file = self.build_dir / (rel if rel in self.dirty else self.build_cache.output_of(rel))
+            try:
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    payload[key] = json.load(f)
+            except ValueError as e:
+                raise BuildError(f"{rel}: JSON格式错误: {e}") from e
+            if rel not in self.dirty:
+                continue
+            
+            if entry.get('schema'):
+                with open(self.project_root / entry['schema'], 'r', encoding='utf-8') as f:
+                    errors = schema_errors(payload[key], json.load(f))
+                if errors:
+                    raise BuildError(f"{rel} 不符合 {entry['schema']}:\n    " + '\n    '.join(errors))
+            before = data_file.stat().st_size
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump(payload[key], f, ensure_ascii=False, separators=(',', ':'))
+            print(f"  ✓ {rel}: {before / 1024:.1f} KB → {data_file.stat().st_size / 1024:.1f} KB")
+        
+        if not payload:
+            return
+        
+        block = inline_json(payload)
+        if mode == 'inline' and len(block.encode('utf-8')) > data_config.get('max_inline_kb', 32) * 1024:
+            print(f"  ⚠️  内联数据超过 {data_config.get('max_inline_kb', 32)} KB，改为合并文件")
+            mode = 'combined'
+        
+        # 删除上次构建生成的合并文件
+        for old_bundle in (self.build_dir / 'data').glob('tower-data*.json'):
+            old_bundle.unlink()
+        
+        if mode == 'inline':
+            tag = f'<script type="application/json" id="{DATA_BLOCK_ID}">{block}</script>'
+            print(f"  ✓ 内联到 index.html: {len(block.encode('utf-8')) / 1024:.1f} KB")
+        else:
+            content = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            name = 'data/tower-data.json'
+            if self.config.get('optimization', {}).get('hash_filenames', True):
+                name = f"data/tower-data.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}.json"
+            bundle_path = self.build_dir / name
+            bundle_path.parent.mkdir(parents=True, exist_ok=True)
+            bundle_path.write_bytes(content)
+            tag = f'<link rel="preload" id="{DATA_BUNDLE_ID}" href="{name}" as="fetch" crossorigin>'
+            print(f"  ✓ {name}: {len(content) / 1024:.1f} KB")
+        
+        html = index_file.read_text(encoding='utf-8')
+        head_end = html.find('</head>')
+        if head_end == -1:
+            raise BuildError("index.html: 没有找到 </head>，无法插入配置数据")
+        index_file.write_text(html[:head_end] + '    ' + tag + '\n' + html[head_end:], encoding='utf-8')
+        print(f"✅ 配置数据打包完成 ({len(payload)} 个文件)")
+    
     def optimize_html(self):
         """优化HTML文件"""
         print("🔧 优化HTML文件...")
@@ -99,20 +1197,35 @@ class ProjectDeployer:
         if not index_file.exists():
             print("❌ index.html 文件不存在")
             return
+        if 'index.html' not in self.dirty:
+            print("⏭️  index.html 未变化，跳过")
+            return
         
         with open(index_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
+        # 首帧需要的脚本：分块时为各关键分块，否则为 main.js
+        critical = [output for output, _ in self.bundles if output != self.deferred_bundle] or ['js/main.js']
+        
         # 添加生产环境优化
         optimizations = [
             # 添加缓存控制
             '<meta http-equiv="Cache-Control" content="public, max-age=31536000">',
             # 添加预加载提示
-            '<link rel="preload" href="js/main.js" as="script">',
+            *[f'<link rel="preload" href="{src}" as="script">' for src in critical],
             '<link rel="preload" href="css/style.css" as="style">',
             # 添加性能监控
             '<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">'
         ]
+        # 延迟分块在空闲时预取
+        if self.deferred_bundle:
+            optimizations.append(f'<link rel="prefetch" href="{self.deferred_bundle}" as="script">')
+        
+        # 在 </body> 之前注册 Service Worker
+        if self.config.get('service_worker', {}).get('enabled', False):
+            body_end = content.rfind('</body>')
+            if body_end != -1:
+                content = content[:body_end] + SERVICE_WORKER_REGISTRATION.format(src=SERVICE_WORKER) + content[body_end:]
         
         # 在head标签中插入优化代码
         head_end = content.find('</head>')
@@ -124,10 +1237,172 @@ class ProjectDeployer:
             
             print("✅ HTML优化完成")
     
+    def fingerprint_assets(self):
+        """为JS/CSS/JSON文件名加上内容哈希，并更新所有引用
+
+        文件名随内容变化，nginx 才能放心地对这些文件使用一年的 immutable 缓存。
+        JS 中 fetch() 引用 JSON，index.html 引用 JS/CSS，所以按 JSON -> JS -> CSS 的顺序处理，
+        保证每个文件的哈希都基于已经改写过引用的最终内容。
+        """
+        if not self.config.get('optimization', {}).get('hash_filenames', True):
+            return
+        
+        print("🔑 生成内容哈希文件名...")
+        
+        self.asset_map = {}
+        renamed = 0
+        # 需要加哈希的文件: (构建目录中的路径, 是否需要重新处理, 对应的源文件)
+        # 拼接进分块的脚本由分块文件代替
+        assets = [(rel, rel in self.dirty, [rel]) for rel in sorted(self.sources)
+                  if '/' in rel and rel not in self.bundle_of]
+        assets += [(output, any(rel in self.dirty for rel in members), members)
+                   for output, members in self.bundles]
+        
+        # 同一类型的文件互不依赖，可以并行处理；JS 依赖 JSON 的结果
+        for suffix in ('.json', '.js', '.css'):
+            tasks = []
+            owners = {}
+            for relative, dirty, sources in sorted(assets):
+                if not relative.endswith(suffix):
+                    continue
+                if not dirty:
+                    # 未变化的文件沿用上次构建的哈希文件名
+                    self.asset_map[relative] = self.build_cache.output_of(sources[0])
+                    continue
+                references = dict(self.asset_map) if suffix == '.js' else None
+                tasks.append((relative, (self.build_dir / relative, references)))
+                owners[relative] = sources
+            
+            for (relative, _), hashed_path in zip(tasks, self.pool.map(fingerprint_file, tasks)):
+                self.asset_map[relative] = hashed_path.relative_to(self.build_dir).as_posix()
+                for source in owners[relative]:
+                    self.build_cache.set_output(source, self.asset_map[relative])
+                renamed += 1
+        
+        index_file = self.build_dir / 'index.html'
+        if index_file.exists() and 'index.html' in self.dirty:
+            index_file.write_bytes(rewrite_asset_references(index_file.read_bytes(), self.asset_map))
+        
+        print(f"✅ 已重命名 {renamed} 个资源文件 (共 {len(self.asset_map)} 个)")
+    
+    def precompress_assets(self, relatives=None):
+        """为可压缩的文本资源生成 .gz / .br 预压缩文件 (optimization.compress_assets)
+
+        nginx 通过 gzip_static 直接发送预压缩文件，不再为每个请求压缩；server.py --root dist 同样优先使用。
+        relatives 为None时处理整个构建目录，并删除原文件已不存在的预压缩文件。
+        大小和mtime未变化且预压缩文件仍在的文件沿用上次的结果。
+        """
+        optimization = self.config.get('optimization', {})
+        if not optimization.get('compress_assets', True):
+            return
+        
+        scan = relatives is None
+        if scan:
+            print("🗜️  生成预压缩文件...")
+            relatives = []
+            for file_path in sorted(self.build_dir.rglob('*')):
+                if not file_path.is_file() or file_path.name in GENERATED_FILES:
+                    continue
+                if file_path.name.endswith(SIDECAR_SUFFIXES):
+                    if not file_path.with_suffix('').exists():
+                        file_path.unlink()
+                    continue
+                relatives.append(file_path.relative_to(self.build_dir).as_posix())
+        
+        cached = self.build_cache.stages.get('precompress', {})
+        results = {}
+        tasks = []
+        for rel in relatives:
+            file_path = self.build_dir / rel
+            stat = file_path.stat()
+            if not is_compressible(str(file_path), stat):
+                # 不值得压缩的文件可能留有旧的预压缩文件
+                for suffix in SIDECAR_SUFFIXES:
+                    file_path.with_name(file_path.name + suffix).unlink(missing_ok=True)
+                continue
+            entry = cached.get(rel)
+            if (entry and entry['stat'] == [stat.st_size, stat.st_mtime_ns]
+                    and all(file_path.with_name(file_path.name + ENCODING_SUFFIXES[encoding]).exists()
+                            for encoding in entry['sizes'])):
+                results[rel] = entry
+            else:
+                results[rel] = {'stat': [stat.st_size, stat.st_mtime_ns]}
+                tasks.append((rel, (file_path, optimization.get('brotli', True))))
+        
+        for (rel, _), sizes in zip(tasks, self.pool.map(precompress_file, tasks)):
+            results[rel]['sizes'] = sizes
+        
+        if scan:
+            self.build_cache.record_stage('precompress', results)
+        else:
+            self.build_cache.record_stage('precompress', dict(cached, **results))
+            return
+        
+        original = sum(results[rel]['stat'][0] for rel in results if results[rel]['sizes'])
+        gzipped = sum(entry['sizes'].get('gzip', 0) for entry in results.values())
+        skipped = sum(1 for entry in results.values() if not entry['sizes'])
+        if tasks:
+            print(f"  ✓ 压缩 {len(tasks)} 个文件，{len(results) - len(tasks)} 个未变化，"
+                  f"{skipped} 个压缩收益不足未生成")
+        print(f"✅ 预压缩完成: {original / 1024:.1f} KB → gzip {gzipped / 1024:.1f} KB"
+              + (" (已生成 .br)" if brotli is not None and optimization.get('brotli', True) else ""))
+    
+    def asset_digests(self, relatives):
+        """构建目录中文件的哈希、SRI和压缩后大小，大小和mtime未变化的文件沿用上次的结果"""
+        cached = self.build_cache.stages.get('asset_digests', {})
+        results = {}
+        tasks = []
+        for rel in relatives:
+            stat = (self.build_dir / rel).stat()
+            entry = cached.get(rel)
+            if entry and entry['stat'] == [stat.st_size, stat.st_mtime_ns]:
+                results[rel] = entry
+            else:
+                results[rel] = {'stat': [stat.st_size, stat.st_mtime_ns]}
+                tasks.append((rel, (self.build_dir / rel,)))
+        
+        for (rel, _), (sha256, integrity, compressed) in zip(tasks, self.pool.map(asset_digest, tasks)):
+            results[rel].update(sha256=sha256, integrity=integrity, compressed=compressed)
+        
+        # 只保留构建目录中仍然存在的文件
+        cached = {rel: entry for rel, entry in cached.items() if (self.build_dir / rel).exists()}
+        cached.update(results)
+        self.build_cache.record_stage('asset_digests', cached)
+        return results
+    
+    def add_subresource_integrity(self):
+        """为 index.html 引用的本地脚本和样式加上 integrity 属性 (optimization.subresource_integrity)
+
+        必须在文件名加哈希之后运行，校验值基于最终部署的文件内容。
+        """
+        if not self.config.get('optimization', {}).get('subresource_integrity', True):
+            return
+        
+        print("🔏 添加子资源完整性校验 (SRI)...")
+        
+        index_file = self.build_dir / 'index.html'
+        if 'index.html' not in self.dirty or not index_file.exists():
+            print("⏭️  index.html 未变化，跳过")
+            return
+        
+        html = index_file.read_text(encoding='utf-8')
+        referenced = sorted(path for path in referenced_paths(html) if (self.build_dir / path).is_file())
+        digests = self.asset_digests(referenced)
+        updated = add_integrity(html, {path: digests[path]['integrity'] for path in referenced})
+        index_file.write_text(updated, encoding='utf-8')
+        
+        added = updated.count('integrity') - html.count('integrity')
+        print(f"✅ 已为 {added} 处引用添加 integrity ({len(referenced)} 个文件)")
+    
     def generate_manifest(self):
         """生成部署清单"""
         print("📋 生成部署清单...")
         
+        manifest_file = self.build_dir / 'manifest.json'
+        if not (self.dirty or self.removed) and manifest_file.exists():
+            print("⏭️  资源未变化，跳过")
+            return
+        
         manifest = {
             "name": self.config['project_name'],
             "version": self.config['version'],
@@ -137,30 +1412,281 @@ class ProjectDeployer:
         }
         
         # 遍历构建目录，记录所有文件
-        for file_path in self.build_dir.rglob('*'):
-            if file_path.is_file():
-                relative_path = file_path.relative_to(self.build_dir)
-                file_size = file_path.stat().st_size
-                
-                manifest['files'].append({
-                    "path": str(relative_path).replace('\\', '/'),
-                    "size": file_size,
-                    "type": file_path.suffix[1:] if file_path.suffix else "unknown"
-                })
-                
-                manifest['total_size'] += file_size
+        relatives = [file_path.relative_to(self.build_dir).as_posix()
+                     for file_path in sorted(self.build_dir.rglob('*'))
+                     if file_path.is_file() and file_path.name not in GENERATED_FILES]
+        # Service Worker 及其预压缩文件最后生成，上次构建留下的不能计入缓存版本
+        service_worker_files = {SERVICE_WORKER} | {SERVICE_WORKER + suffix for suffix in SIDECAR_SUFFIXES}
+        relatives = [rel for rel in relatives if rel not in service_worker_files]
+        digests = self.asset_digests(relatives)
+        # Service Worker 的缓存版本由其余文件的哈希决定，它本身也记入清单
+        if self.generate_service_worker(digests):
+            self.precompress_assets([SERVICE_WORKER])
+            generated = [SERVICE_WORKER] + [SERVICE_WORKER + suffix for suffix in SIDECAR_SUFFIXES
+                                            if (self.build_dir / (SERVICE_WORKER + suffix)).exists()]
+            relatives += generated
+            digests.update(self.asset_digests(generated))
+        
+        compressed_total = {}
+        for relative_path in sorted(relatives):
+            file_path = self.build_dir / relative_path
+            digest = digests[relative_path]
+            # 有预压缩文件时记录实际部署的大小
+            compressed = dict(digest['compressed'])
+            for encoding, suffix in ENCODING_SUFFIXES.items():
+                if relative_path + suffix in digests:
+                    compressed[encoding] = digests[relative_path + suffix]['stat'][0]
+            file_size = digest['stat'][0]
+            
+            manifest['files'].append({
+                "path": relative_path,
+                "size": file_size,
+                "type": file_path.suffix[1:] if file_path.suffix else "unknown",
+                "sha256": digest['sha256'],
+                "integrity": digest['integrity'],
+                # 各编码压缩后的大小，用于估算实际传输量
+                "compressed": compressed
+            })
+            
+            manifest['total_size'] += file_size
+            for encoding, size in compressed.items():
+                compressed_total[encoding] = compressed_total.get(encoding, 0) + size
+        manifest['compressed_size'] = compressed_total
+        
+        # 原始路径到哈希文件名的映射，供外部工具查找资源
+        if self.asset_map:
+            manifest['assets'] = dict(sorted(self.asset_map.items()))
         
         # 保存清单文件
-        manifest_file = self.build_dir / 'manifest.json'
         with open(manifest_file, 'w', encoding='utf-8') as f:
             json.dump(manifest, f, indent=2, ensure_ascii=False)
         
-        print(f"✅ 部署清单生成完成 (总大小: {manifest['total_size'] / 1024:.1f} KB)")
+        compressed = '，'.join(f"{encoding}: {size / 1024:.1f} KB" for encoding, size in compressed_total.items())
+        print(f"✅ 部署清单生成完成 (总大小: {manifest['total_size'] / 1024:.1f} KB，压缩后 {compressed})")
+    
+    def generate_service_worker(self, digests):
+        """生成 Service Worker (service_worker.enabled)，返回是否生成
+
+        安装时预缓存部署文件 (Source Map 和超过 precache_max_kb 的文件除外) 以及页面引用的CDN脚本；
+        带内容哈希的文件和CDN脚本缓存优先，HTML等其他文件网络优先、离线时使用缓存。
+        缓存版本取自所有文件的哈希，任何文件变化都会使用新缓存并删除旧缓存。
+        """
+        worker = self.config.get('service_worker', {})
+        if not worker.get('enabled', False):
+            return False
+        
+        print("⚙️  生成 Service Worker...")
+        
+        index_file = self.build_dir / 'index.html'
+        html = index_file.read_text(encoding='utf-8') if index_file.exists() else ''
+        # 页面直接加载的外部脚本和样式表
+        cdn = sorted({match.group(1) for match in RESOURCE_TAG.finditer(html)
+                      if re.match(r'^https?://', match.group(1))
+                      and (match.group(0).lower().startswith('<script') or 'stylesheet' in match.group(0))})
+        
+        max_size = worker.get('precache_max_kb', 5120) * 1024
+        precache = [rel for rel in sorted(digests)
+                    if not rel.endswith(('.map',) + SIDECAR_SUFFIXES) and digests[rel]['stat'][0] <= max_size]
+        immutable = [rel for rel in precache if HASHED_NAME.search(rel)]
+        version = hashlib.sha256(json.dumps(
+            [[rel, digests[rel]['sha256']] for rel in sorted(digests)] + cdn
+        ).encode('utf-8')).hexdigest()[:HASH_LENGTH]
+        
+        replacements = {
+            'PREFIX': f"{self.config['project_name']}-",
+            'VERSION': version,
+            # 首页按目录地址缓存，与页面导航请求的URL一致
+            'PRECACHE': ['./' if rel == 'index.html' else rel for rel in precache],
+            'IMMUTABLE': immutable,
+            'CDN': cdn,
+        }
+        content = SERVICE_WORKER_TEMPLATE
+        for name, value in replacements.items():
+            content = content.replace(f'/*__{name}__*/', json.dumps(value, ensure_ascii=False))
+        
+        with open(self.build_dir / SERVICE_WORKER, 'w', encoding='utf-8') as f:
+            f.write(content)
+        
+        size = sum(digests[rel]['stat'][0] for rel in precache)
+        print(f"  ✓ {SERVICE_WORKER}: 缓存版本 {version}，预缓存 {len(precache)} 个文件 "
+              f"({size / 1024:.1f} KB)，CDN脚本 {len(cdn)} 个")
+        return True
+    
+    def diff_manifest(self, old_manifest):
+        """与旧的部署清单比较，列出需要上传 (+ 新增, ~ 变化) 和删除 (-) 的文件"""
+        manifest_file = self.build_dir / 'manifest.json'
+        if not manifest_file.exists():
+            print(f"❌ {manifest_file} 不存在，请先运行 python deploy.py 构建")
+            sys.exit(1)
+        try:
+            with open(old_manifest, 'r', encoding='utf-8') as f:
+                old = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ 无法读取旧清单 {old_manifest}: {e}")
+            sys.exit(1)
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            new = json.load(f)
+        
+        added, changed, removed = diff_manifests(old, new)
+        sizes = {entry['path']: entry['size'] for entry in new.get('files', [])}
+        upload = sum(sizes[path] for path in added + changed)
+        print(f"📊 与 {old_manifest} 相比: 新增 {len(added)} 个，变化 {len(changed)} 个，"
+              f"删除 {len(removed)} 个 (需上传 {upload / 1024:.1f} KB)")
+        for prefix, paths in (('+', added), ('~', changed), ('-', removed)):
+            for path in paths:
+                print(f"{prefix} {path}")
+    
+    def transfer_sizes(self, relatives):
+        """构建目录中文件的 {路径: (原大小, 传输大小)}
+
+        传输大小按服务器的规则计算: 值得压缩的文件取gzip压缩后的大小 (有预压缩文件时取它的实际大小)。
+        """
+        digests = self.asset_digests(relatives)
+        sizes = {}
+        for rel in relatives:
+            path = self.build_dir / rel
+            size = digests[rel]['stat'][0]
+            sidecar = path.with_name(path.name + ENCODING_SUFFIXES['gzip'])
+            if sidecar.exists():
+                transfer = sidecar.stat().st_size
+            elif is_compressible(path, path.stat()):
+                transfer = digests[rel]['compressed'].get('gzip', size)
+            else:
+                transfer = size
+            sizes[rel] = (size, min(size, transfer))
+        return sizes
+    
+    def check_performance_budgets(self):
+        """检查构建结果是否超出性能预算 (performance.budgets)，并列出各文件的大小
+
+        total_kb / total_compressed_kb: 所有部署文件的原大小 / 传输大小之和 (不含预压缩文件和Source Map)；
+        critical_requests: index.html 及其首次渲染前必须下载的资源的请求数 (含CDN脚本)；
+        critical_kb: 其中本站文件的传输大小，CDN脚本计入 third_party_kb；
+        max_file_kb: 单个文件的原大小上限；third_party_kb: 第三方脚本 (CDN或本地化到 vendor/ 的文件) 的传输大小，
+        仍指向CDN的脚本大小取自 .vendor-cache/，缓存中没有时结果为未知。
+        mode 为 warn 时超出预算只给出警告，为 fail 时构建失败；设置了上限但结果未知也按超出处理。
+        """
+        budgets = self.config.get('performance', {}).get('budgets', {})
+        if not budgets.get('enabled', False):
+            return
+        
+        print("📏 检查性能预算...")
+        
+        relatives = [file_path.relative_to(self.build_dir).as_posix()
+                     for file_path in sorted(self.build_dir.rglob('*'))
+                     if file_path.is_file() and file_path.name not in GENERATED_FILES
+                     and not file_path.name.endswith(('.map',) + SIDECAR_SUFFIXES)]
+        sizes = self.transfer_sizes(relatives)
+        
+        # 第三方资源: 本地化的CDN文件，以及页面中仍然直接引用的CDN地址 (大小取自本地缓存)
+        vendor = self.config.get('vendor', {})
+        vendor_prefix = vendor.get('output_dir', 'vendor') + '/'
+        cache_dir = self.project_root / vendor.get('cache_dir', VENDOR_CACHE_DIR)
+        index_file = self.build_dir / 'index.html'
+        html = index_file.read_text(encoding='utf-8') if index_file.exists() else ''
+        external = {}
+        for match in RESOURCE_TAG.finditer(html):
+            src = match.group(1)
+            if re.match(r'^(?:https?:)?//', src):
+                cached = vendor_cache_path(cache_dir, 'https:' + src if src.startswith('//') else src)
+                external[src] = len(gzip.compress(cached.read_bytes(), compresslevel=6)) if cached.is_file() else None
+        third_party = [rel for rel in relatives if rel.startswith(vendor_prefix)]
+        
+        critical = ['index.html'] if 'index.html' in sizes else []
+        for src in critical_resources(html):
+            path = local_path(src)
+            if path is None and src in external:
+                critical.append(src)
+            elif path in sizes and path not in critical:
+                critical.append(path)
+        
+        # 不在本地缓存中的CDN文件大小未知 (None)，第三方资源的总大小也就无法确定
+        third_party_sizes = [sizes[rel][1] for rel in third_party] + list(external.values())
+        measured = {
+            'total_kb': sum(size for size, _ in sizes.values()),
+            'total_compressed_kb': sum(compressed for _, compressed in sizes.values()),
+            'critical_requests': len(critical),
+            'critical_kb': sum(sizes[item][1] for item in critical if item in sizes),
+            'max_file_kb': max((size for size, _ in sizes.values()), default=0),
+            'third_party_kb': None if None in third_party_sizes else sum(third_party_sizes),
+        }
+        labels = {
+            'total_kb': "总大小",
+            'total_compressed_kb': "总传输大小",
+            'critical_requests': "关键路径请求数",
+            'critical_kb': "关键路径传输大小",
+            'max_file_kb': "单个文件最大",
+            'third_party_kb': "第三方资源传输大小",
+        }
+        
+        # 各文件明细: 关键路径上的文件，以及最大的几个文件
+        max_file = budgets.get('max_file_kb')
+        largest = sorted(sizes, key=lambda rel: sizes[rel][0], reverse=True)[:BUDGET_TOP_FILES]
+        # 表头中的中文字符占两列宽
+        print(f"  {'文件':<46} {'原大小':>7} {'传输':>8}")
+        for item in critical + [rel for rel in largest if rel not in critical]:
+            notes = []
+            if item in critical:
+                notes.append("关键")
+            if item in external or item in third_party:
+                notes.append("第三方")
+            if max_file is not None and item in sizes and sizes[item][0] > max_file * 1024:
+                notes.append("🔴 超出单文件上限")
+            if item in sizes:
+                size, compressed = (f"{value / 1024:.1f} KB" for value in sizes[item])
+            else:
+                size, compressed = "-", f"{external[item] / 1024:.1f} KB" if external[item] else "未知"
+            print(f"  {item:<48} {size:>10} {compressed:>10}  {' '.join(notes)}")
+        unknown = [src for src, size in external.items() if size is None]
+        if unknown:
+            print(f"  ⚠️  {len(unknown)} 个CDN文件不在本地缓存中，第三方资源大小未知: {', '.join(unknown)}")
+        
+        violations = []
+        for name, label in labels.items():
+            limit = budgets.get(name)
+            value = measured[name]
+            if value is None:
+                # 无法确定是否超出，不能当作通过
+                shown = "未知" + (f" / {limit} KB" if limit is not None else "")
+                exceeded = limit is not None
+                mark = '❓'
+            elif name == 'critical_requests':
+                shown = f"{value}" + (f" / {limit}" if limit is not None else "")
+                exceeded = limit is not None and value > limit
+                mark = '❌' if exceeded else '✓'
+            else:
+                shown = f"{value / 1024:.1f}" + (f" / {limit}" if limit is not None else "") + " KB"
+                exceeded = limit is not None and value > limit * 1024
+                mark = '❌' if exceeded else '✓'
+            print(f"  {mark} {label}: {shown}")
+            if exceeded:
+                violations.append(f"{label} {shown}")
+        
+        if not violations:
+            print("✅ 构建结果符合性能预算")
+        elif budgets.get('mode', 'fail') == 'warn':
+            print(f"⚠️  超出性能预算 (performance.budgets.mode 为 warn，仅警告): {'，'.join(violations)}")
+        else:
+            raise BudgetError(f"超出性能预算: {'，'.join(violations)}")
     
     def create_nginx_config(self):
         """创建Nginx配置文件"""
         print("🌐 创建Nginx配置文件...")
         
+        if self.config.get('optimization', {}).get('compress_assets', True):
+            # 构建时已生成 .gz 文件，直接发送，不在请求时压缩
+            compression = """# 发送构建时生成的 .gz 预压缩文件 (precompress_assets)，不在请求时压缩
+    gzip_static on;
+    gzip_vary on;
+    # 安装 ngx_brotli 模块后可同时发送 .br 文件
+    # brotli_static on;"""
+        else:
+            compression = """# 启用Gzip压缩
+    gzip on;
+    gzip_vary on;
+    gzip_min_length 1024;
+    gzip_types text/plain text/css text/xml text/javascript application/javascript application/xml+rss application/json;"""
+        
         nginx_config = f"""# 3D脱硫塔工艺流程图 - Nginx配置
 server {{
     listen 80;
@@ -169,11 +1695,19 @@ server {{
     root /var/www/{self.config['project_name']};
     index index.html;
     
-    # 启用Gzip压缩
-    gzip on;
-    gzip_vary on;
-    gzip_min_length 1024;
-    gzip_types text/plain text/css text/xml text/javascript application/javascript application/xml+rss application/json;
+    {compression}
+    
+    # 带内容哈希的文件名 (main.3f9a1c2b.js)，内容变化时文件名随之变化，可永久缓存
+    location ~* \.[0-9a-f]{{{HASH_LENGTH}}}\.(js|css|json)$ {{
+        expires 1y;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+        add_header Access-Control-Allow-Origin "*";
+    }}
+    
+    # Service Worker 必须每次验证，浏览器才能及时发现新版本
+    location = /{SERVICE_WORKER} {{
+        add_header Cache-Control "no-cache";
+    }}
     
     # 静态资源缓存
     location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot)$ {{
@@ -356,7 +1890,7 @@ echo "🌐 访问地址: http://localhost"
 ## 性能优化
 
 - ✅ 启用Gzip压缩
-- ✅ 静态资源缓存
+- ✅ 静态资源缓存（JS/CSS/JSON 文件名带内容哈希，可永久缓存）
 - ✅ CDN加速（Three.js库）
 - ✅ 预加载关键资源
 - ✅ 移动端适配
@@ -387,23 +1921,43 @@ echo "🌐 访问地址: http://localhost"
         
         print("✅ 部署说明文档创建完成")
     
+    def run_generated_stage(self, stage, outputs):
+        """运行只依赖部署配置的生成阶段，配置未变化且输出都存在时跳过"""
+        outputs = [self.build_dir / name for name in outputs]
+        if self.build_cache.stage_fresh(stage.__name__, self.build_cache.fingerprint, outputs):
+            print(f"⏭️  {stage.__doc__} (输入未变化，跳过)")
+            return
+        stage()
+        self.build_cache.record_stage(stage.__name__, self.build_cache.fingerprint)
+    
     def build(self):
         """执行完整构建流程"""
         print("🚀 开始构建生产环境部署包...")
         print("=" * 50)
+        started = time.perf_counter()
         
         try:
             self.create_build_directory()
             self.copy_project_files()
+            self.minify_scripts()
+            self.bundle_scripts()
+            self.vendor_dependencies()
+            self.pack_data()
             self.optimize_html()
+            self.fingerprint_assets()
+            self.add_subresource_integrity()
+            self.precompress_assets()
             self.generate_manifest()
-            self.create_nginx_config()
-            self.create_docker_files()
-            self.create_deployment_scripts()
-            self.create_readme()
+            self.run_generated_stage(self.create_nginx_config, ['nginx.conf'])
+            self.run_generated_stage(self.create_docker_files, ['Dockerfile', 'docker-compose.yml'])
+            self.run_generated_stage(self.create_deployment_scripts, ['deploy.sh'])
+            self.run_generated_stage(self.create_readme, ['README_DEPLOY.md'])
+            self.check_performance_budgets()
+            self.build_cache.save()
+            self.pool.close()
             
             print("=" * 50)
-            print("🎉 构建完成！")
+            print(f"🎉 构建完成！(耗时 {time.perf_counter() - started:.2f}s)")
             print(f"📁 构建目录: {self.build_dir}")
             print("\n📋 部署选项:")
             print("  1. Docker部署: cd dist && ./deploy.sh")
@@ -411,19 +1965,35 @@ echo "🌐 访问地址: http://localhost"
             print("  3. 云服务部署: 参考 README_DEPLOY.md")
             
         except Exception as e:
+            self.pool.close()
+            if isinstance(e, BudgetError):
+                # 构建目录是完整的，保留缓存，修正后仍可增量构建
+                self.build_cache.save()
+            elif self.build_cache is not None:
+                self.build_cache.discard()
             print(f"❌ 构建失败: {e}")
             sys.exit(1)
 
 def main():
     """主函数"""
-    deployer = ProjectDeployer()
+    deployer = ProjectDeployer(clean='--clean' in sys.argv,
+                               jobs=parse_int_option('--jobs', os.cpu_count() or 1))
     
     if len(sys.argv) > 1:
         if sys.argv[1] == '--help' or sys.argv[1] == '-h':
             print("3D脱硫塔工艺流程图 - 部署工具")
             print("\n用法:")
-            print("  python deploy.py        # 构建部署包")
-            print("  python deploy.py --help # 显示帮助")
+            print("  python deploy.py         # 构建部署包 (增量构建，只处理有变化的文件)")
+            print("  python deploy.py --clean # 忽略构建缓存，完整重建")
+            print("  python deploy.py --jobs 4 # 并行任务数 (默认CPU核数，1为顺序执行)")
+            print("  python deploy.py --diff old-manifest.json # 列出与旧清单相比新增、变化和删除的文件")
+            print("  python deploy.py --help  # 显示帮助")
+            return
+        if sys.argv[1] == '--diff':
+            if len(sys.argv) < 3:
+                print("用法: python deploy.py --diff old-manifest.json")
+                sys.exit(1)
+            deployer.diff_manifest(sys.argv[2])
             return
     
     deployer.build()
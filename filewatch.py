@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - 文件监视
+Linux 上通过 ctypes 调用 inotify，其他平台批量比较 stat 快照；
+连续保存产生的一串事件合并为一次回调。
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# 不需要监视的目录 (构建输出、缓存、版本库)
+IGNORED_DIRS = {
+    '.git', '.hg', '.svn', '__pycache__', 'node_modules', 'dist',
+    '.build-cache', '.vendor-cache', '.pytest_cache', '.mypy_cache', '.venv', 'venv',
+}
+
+# 编辑器保存时产生的临时文件
+IGNORED_FILES = ('*.swp', '*.swx', '*~', '.#*', '#*#', '4913', '*.tmp', '.DS_Store')
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+def ignored(name):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in IGNORED_FILES)
+
+class PollingWatcher:
+    """定期扫描目录树，比较 (mtime, size) 快照找出变化的文件"""
+
+    def __init__(self, root, ignored_dirs=IGNORED_DIRS, interval=0.5):
+        self.root = os.path.abspath(root)
+        self.ignored_dirs = set(ignored_dirs)
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.ignored_dirs:
+                            pending.append(entry.path)
+                    elif not ignored(entry.name):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return snapshot
+
+    def changes(self, timeout):
+        """等待最多 timeout 秒，返回变化的文件 (相对路径集合)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return {os.path.relpath(path, self.root).replace(os.sep, '/') for path in changed}
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """通过 inotify 监视目录树，新建的子目录自动加入监视"""
+
+    def __init__(self, root, ignored_dirs=IGNORED_DIRS):
+        self.root = os.path.abspath(root)
+        self.ignored_dirs = set(ignored_dirs)
+        self.libc = load_inotify()
+        if self.libc is None:
+            raise OSError("inotify 不可用")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.directories = {}
+        try:
+            self.add_tree(self.root)
+        except Exception:
+            # 调用方会改用轮询，这里先关闭已经打开的 inotify 描述符
+            os.close(self.fd)
+            raise
+
+    def add_tree(self, top):
+        """为目录及其所有子目录添加监视，返回其中已有的文件 (新建目录中可能已经写入了文件)"""
+        found = set()
+        for directory, dirnames, filenames in os.walk(top):
+            dirnames[:] = [name for name in dirnames if name not in self.ignored_dirs]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                # 达到 max_user_watches 等上限时由调用方改用轮询
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch 失败: {directory}")
+            self.directories[wd] = directory
+            found |= {os.path.join(directory, name) for name in filenames if not ignored(name)}
+        return found
+
+    def changes(self, timeout):
+        """等待最多 timeout 秒，返回变化的文件 (相对路径集合)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                changed |= self.handle_event(wd, mask, name)
+        return {os.path.relpath(path, self.root).replace(os.sep, '/') for path in changed}
+
+    def handle_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            # 事件队列溢出，无法知道具体文件，按整个目录树变化处理
+            return {self.root}
+        if mask & IN_IGNORED:
+            self.directories.pop(wd, None)
+            return set()
+        directory = self.directories.get(wd)
+        if directory is None or not name:
+            return set()
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if name in self.ignored_dirs:
+                return set()
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    return self.add_tree(path)
+                except OSError:
+                    return {path}
+            return {path}
+        return set() if ignored(name) else {path}
+
+    def close(self):
+        os.close(self.fd)
+
+def load_inotify():
+    """加载提供 inotify 的 libc，不支持的平台返回None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+def create_watcher(root, ignored_dirs=IGNORED_DIRS, polling=False):
+    """优先使用 inotify，不可用时退回轮询"""
+    if not polling:
+        try:
+            return InotifyWatcher(root, ignored_dirs)
+        except OSError:
+            pass
+    return PollingWatcher(root, ignored_dirs)
+
+def watch(watcher, callback, debounce=0.2, max_delay=2.0, stop=None):
+    """持续监视，把一串连续的变化合并后调用 callback(变化的文件列表)
+
+    最后一次变化之后 debounce 秒内没有新变化才回调；持续变化时最多等待 max_delay 秒。
+    stop 为 threading.Event 时，设置后退出。
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        changed = watcher.changes(timeout=0.5)
+        if not changed:
+            continue
+        first = time.monotonic()
+        while time.monotonic() - first < max_delay:
+            more = watcher.changes(timeout=debounce)
+            if not more:
+                break
+            changed |= more
+        callback(sorted(changed))
+    watcher.close()
@@ -87,14 +87,12 @@ if not exist "dist" (
     exit /b 1
 )
 
-cd dist
-
-echo ✅ 启动增强版Python服务器...
+echo ✅ 启动增强版Python服务器 (gzip压缩)...
 echo 🌐 访问地址: http://localhost:8080
 echo 💡 按Ctrl+C停止服务器
 echo.
 
-python server-with-gzip.py 8080
+python server.py --root dist --port 8080
 
 pause
 '''
@@ -169,7 +167,7 @@ def main():
     print("💡 推荐部署方案:")
     if python_ok:
         print("1. 双击运行 safe-deploy.bat (推荐)")
-        print("2. 或运行: python dist/server-with-gzip.py 8080")
+        print("2. 或运行: python server.py --root dist --port 8080")
     
     if docker_ok:
         print("3. Docker部署 (如果网络允许)")
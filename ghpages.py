@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - GitHub Pages 发布
+用 git 底层命令直接从构建目录生成 gh-pages 分支的提交：在临时索引中写出目录树，
+再用 commit-tree 创建提交，不切换分支，也不改动工作区。
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+# GitHub Pages 默认用 Jekyll 处理站点，这个空文件用来关闭它
+NOJEKYLL = '.nojekyll'
+
+# 记录构建目录中文件的 (大小, mtime) 和对应的 blob 哈希，文件没变时不再重新计算
+BLOB_CACHE = 'gh-pages-blobs.json'
+
+FILE_MODE = '100644'
+EXECUTABLE_MODE = '100755'
+
+class GitError(RuntimeError):
+    """git 命令执行失败"""
+
+def git(repo, *args, input=None, env=None, check=True):
+    """在 repo 中执行 git 命令，返回标准输出 (bytes)"""
+    result = subprocess.run(['git', '-C', str(repo), *args], input=input, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if check and result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip()
+        raise GitError(f"git {args[0]} 失败: {message}")
+    return result.stdout if check else (result.returncode, result.stdout)
+
+def git_text(repo, *args, **kwargs):
+    return git(repo, *args, **kwargs).decode('utf-8').strip()
+
+def resolve_commit(repo, ref):
+    """返回 ref 指向的提交，不存在时返回None"""
+    code, output = git(repo, 'rev-parse', '--verify', '--quiet', f'{ref}^{{commit}}', check=False)
+    return output.decode().strip() if code == 0 else None
+
+def blob_hash(data, object_format='sha1'):
+    """计算与 git hash-object 相同的 blob 哈希"""
+    digest = hashlib.new(object_format)
+    digest.update(b'blob %d\0' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+def tree_blobs(repo, commit):
+    """提交中所有文件的 {路径: (模式, blob哈希)}"""
+    if commit is None:
+        return {}
+    blobs = {}
+    output = git(repo, 'ls-tree', '-r', '-z', '--full-tree', commit)
+    for line in output.split(b'\0'):
+        if not line:
+            continue
+        info, path = line.split(b'\t', 1)
+        mode, kind, sha = info.decode().split()
+        if kind == 'blob':
+            blobs[path.decode('utf-8', 'surrogateescape')] = (mode, sha)
+    return blobs
+
+def scan_files(root):
+    """构建目录中的文件，返回 {路径: (模式, 大小, mtime, 文件路径)}"""
+    root = Path(root)
+    files = {}
+    for path in sorted(root.rglob('*')):
+        if not path.is_file():
+            continue
+        stat = path.stat()
+        mode = EXECUTABLE_MODE if stat.st_mode & 0o111 else FILE_MODE
+        files[path.relative_to(root).as_posix()] = (mode, stat.st_size, stat.st_mtime_ns, path)
+    return files
+
+class PagesPublisher:
+    """把构建目录发布为分支上的一个提交
+
+    repo 是本地仓库，remote 可以是远程名称，也可以是另一个仓库的路径或 URL (例如本地裸仓库)。
+    """
+
+    def __init__(self, repo, dist_dir, branch='gh-pages', remote='origin'):
+        self.repo = Path(repo)
+        self.dist_dir = Path(dist_dir)
+        self.branch = branch
+        self.remote = remote
+        self.ref = f'refs/heads/{branch}'
+        self.object_format = git_text(self.repo, 'rev-parse', '--show-object-format')
+        self.cache_path = Path(git_text(self.repo, 'rev-parse', '--path-format=absolute',
+                                        '--git-path', BLOB_CACHE))
+
+    def remote_tip(self):
+        """远程分支当前的提交，把它取回本地；远程没有这个分支时返回None"""
+        if not self.remote:
+            return None
+        heads = git_text(self.repo, 'ls-remote', '--heads', self.remote, self.ref)
+        if not heads:
+            return None
+        tip = heads.split()[0]
+        if resolve_commit(self.repo, tip) is None:
+            git(self.repo, 'fetch', '--quiet', '--no-tags', self.remote, self.ref)
+        return tip
+
+    def load_cache(self):
+        try:
+            return json.loads(self.cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def hash_files(self, files, existing):
+        """计算每个文件的 blob 哈希，只把仓库中还没有的 blob 写入对象库
+
+        (大小, mtime) 没变的文件直接使用上次的哈希；与当前分支中相同的文件不需要再写入。
+        """
+        cache = self.load_cache()
+        known = {sha for _, sha in existing.values()}
+        hashes, missing = {}, []
+        for name, (mode, size, mtime, path) in files.items():
+            cached = cache.get(name)
+            if cached and cached[:2] == [size, mtime]:
+                sha = cached[2]
+            else:
+                sha = blob_hash(path.read_bytes(), self.object_format)
+            hashes[name] = sha
+            if sha not in known:
+                missing.append((name, path))
+
+        if missing:
+            # --no-filters: 按原始内容写入，不受 autocrlf 等设置影响
+            output = git(self.repo, 'hash-object', '-w', '--no-filters', '--stdin-paths',
+                         input=''.join(f'{path.resolve()}\n' for _, path in missing).encode('utf-8'))
+            for (name, _), sha in zip(missing, output.decode().split()):
+                if sha != hashes[name]:
+                    raise GitError(f"{name}: blob 哈希不一致 ({sha} != {hashes[name]})")
+
+        self.cache_path.write_text(json.dumps(
+            {name: [size, mtime, hashes[name]] for name, (_, size, mtime, _) in files.items()}),
+            encoding='utf-8')
+        return hashes, len(missing)
+
+    def write_tree(self, entries):
+        """在临时索引中写入 [(模式, 哈希, 路径), ...]，返回目录树哈希"""
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, GIT_INDEX_FILE=os.path.join(tmp, 'index'))
+            records = b''.join(f'{mode} {sha}\t{name}\0'.encode('utf-8', 'surrogateescape')
+                               for mode, sha, name in entries)
+            git(self.repo, 'update-index', '--add', '-z', '--index-info', input=records, env=env)
+            return git_text(self.repo, 'write-tree', env=env)
+
+    def publish(self, message=None, push=True):
+        """生成并推送提交
+
+        返回 (提交, 是否新建)；目录树与分支当前的提交相同时不创建提交，返回 (当前提交, False)。
+        """
+        if not self.dist_dir.is_dir():
+            raise GitError(f"构建目录不存在: {self.dist_dir}")
+        head = git(self.repo, 'symbolic-ref', '--quiet', 'HEAD', check=False)[1].decode().strip()
+        if head == self.ref:
+            raise GitError(f"当前检出的就是 {self.branch} 分支，请先切换到其他分支")
+
+        remote_tip = self.remote_tip() if push else None
+        parent = remote_tip or resolve_commit(self.repo, self.ref)
+        existing = tree_blobs(self.repo, parent)
+
+        files = scan_files(self.dist_dir)
+        hashes, written = self.hash_files(files, existing)
+        entries = [(mode, hashes[name], name) for name, (mode, *_) in files.items()]
+        if NOJEKYLL not in files:
+            empty = git_text(self.repo, 'hash-object', '-w', '--stdin', input=b'')
+            entries.append((FILE_MODE, empty, NOJEKYLL))
+        tree = self.write_tree(entries)
+
+        if parent and git_text(self.repo, 'rev-parse', f'{parent}^{{tree}}') == tree:
+            commit, created = parent, False
+            print(f"✅ 内容没有变化，跳过提交 ({parent[:10]})")
+        else:
+            message = message or f"Deploy to GitHub Pages - {time.strftime('%Y-%m-%d %H:%M:%S')}"
+            parents = ['-p', parent] if parent else []
+            commit = git_text(self.repo, 'commit-tree', tree, *parents, '-m', message)
+            created = True
+            print(f"📝 新提交 {commit[:10]}: {len(entries)} 个文件，写入 {written} 个新对象")
+
+        # 与当前值比较后再更新，避免覆盖并发写入的结果
+        old = resolve_commit(self.repo, self.ref) or '0' * len(commit)
+        if old != commit:
+            git(self.repo, 'update-ref', '-m', 'ghpages: publish', self.ref, commit, old)
+
+        if push and commit != remote_tip:
+            git(self.repo, 'push', '--quiet', self.remote, f'{self.ref}:{self.ref}')
+            print(f"📤 已推送到 {self.remote} {self.branch}")
+        return commit, created
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - 脚本依赖分析
+找出首帧渲染前 (入口函数调用 animate() 之前) 需要的脚本，其余脚本可以延迟加载
+"""
+
+from jsminify import tokenize, NAME, PUNCT, TEMPLATE, NEWLINE
+
+# 这些调用的参数 (回调) 在首帧之后才会执行
+DEFERRING_CALLS = {
+    'setTimeout', 'setInterval', 'requestAnimationFrame', 'requestIdleCallback',
+    'addEventListener',
+}
+
+def significant_tokens(source):
+    return [token for token in tokenize(source) if token[0] != NEWLINE]
+
+def depth_change(token):
+    kind, text = token
+    if kind == PUNCT:
+        if text in ('(', '[', '{'):
+            return 1
+        if text in (')', ']', '}'):
+            return -1
+    elif kind == TEMPLATE:
+        return text.endswith('${') - text.startswith('}')
+    return 0
+
+def group_end(tokens, start):
+    """返回从 start 处的括号开始、与之匹配的闭括号位置"""
+    depth = 0
+    for index in range(start, len(tokens)):
+        depth += depth_change(tokens[index])
+        if depth == 0:
+            return index
+    return len(tokens) - 1
+
+def top_level_declarations(tokens):
+    """脚本声明的全局名称: 顶层 class/function 以及 window.X = ... 赋值"""
+    names = set()
+    depth = 0
+    for index, token in enumerate(tokens):
+        if depth == 0 and token[0] == NAME and index > 0 and tokens[index - 1] in (
+                (NAME, 'class'), (NAME, 'function')):
+            names.add(token[1])
+        if (token == (NAME, 'window') and tokens[index + 1:index + 2] == [(PUNCT, '.')]
+                and index + 3 < len(tokens) and tokens[index + 2][0] == NAME
+                and tokens[index + 3] == (PUNCT, '=')):
+            names.add(tokens[index + 2][1])
+        depth += depth_change(token)
+    return names
+
+def function_bodies(tokens):
+    """顶层函数名 -> 函数体的 (起始, 结束) 标记位置"""
+    bodies = {}
+    depth = 0
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if (depth == 0 and token == (NAME, 'function') and index + 1 < len(tokens)
+                and tokens[index + 1][0] == NAME):
+            start = index + 2
+            start = group_end(tokens, start) + 1  # 跳过参数列表
+            end = group_end(tokens, start)
+            bodies[tokens[index + 1][1]] = (start, end)
+            index = end + 1
+            continue
+        depth += depth_change(token)
+        index += 1
+    return bodies
+
+def scan_region(tokens, start, end, stop_call=None):
+    """收集区域内引用的全局名称和直接调用的函数
+
+    延迟执行的回调 (setTimeout 等的参数) 被跳过；遇到 stop_call() 调用时停止。
+    """
+    references, calls = set(), set()
+    index = start
+    while index < end:
+        kind, text = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        preceding = tokens[index - 1] if index > 0 else None
+        if kind == NAME:
+            member = preceding == (PUNCT, '.')
+            global_member = member and index > 1 and tokens[index - 2] == (NAME, 'window')
+            if text in DEFERRING_CALLS and following == (PUNCT, '('):
+                index = group_end(tokens, index + 1) + 1
+                continue
+            if text == stop_call and following == (PUNCT, '(') and not member:
+                break
+            if not member or global_member:
+                references.add(text)
+                if following == (PUNCT, '('):
+                    calls.add(text)
+        index += 1
+    return references, calls
+
+def critical_scripts(scripts, entry, setup_function, first_frame_call):
+    """把脚本分为首帧前需要的和可以延迟加载的两组
+
+    scripts 为按加载顺序排列的 [(路径, 源码), ...]，entry 是入口脚本。
+    从入口脚本的 setup_function 开始，直到第一次调用 first_frame_call 为止，
+    沿着同步调用的顶层函数收集引用的名称；声明这些名称的脚本以及它们引用的脚本都是关键脚本。
+    无法识别出任何全局声明的脚本 (例如通过 IIFE 注册) 按关键脚本处理。
+    返回 (关键脚本列表, 延迟脚本列表)，均保持原有顺序。
+    """
+    tokens = {path: significant_tokens(source) for path, source in scripts}
+    entry_tokens = tokens[entry]
+    bodies = function_bodies(entry_tokens)
+    if setup_function not in bodies:
+        raise ValueError(f"{entry} 中没有找到函数 {setup_function}")
+
+    references, calls = scan_region(entry_tokens, *bodies[setup_function], stop_call=first_frame_call)
+    # 入口脚本中函数之外的顶层代码在加载时就会执行
+    position = 0
+    for start, end in sorted(bodies.values()):
+        found, called = scan_region(entry_tokens, position, start)
+        references |= found
+        calls |= called
+        position = end + 1
+    found, called = scan_region(entry_tokens, position, len(entry_tokens))
+    references |= found
+    calls |= called
+
+    visited = {setup_function}
+    pending = [name for name in calls if name in bodies]
+    while pending:
+        name = pending.pop()
+        if name in visited:
+            continue
+        visited.add(name)
+        found, called = scan_region(entry_tokens, *bodies[name])
+        references |= found
+        pending += [callee for callee in called if callee in bodies and callee not in visited]
+
+    owners = {}
+    pending = []
+    for path, _ in scripts:
+        if path == entry:
+            continue
+        declared = top_level_declarations(tokens[path])
+        if not declared:
+            pending.append(path)
+        for name in declared:
+            owners.setdefault(name, path)
+    pending += [owners[name] for name in references if name in owners]
+
+    critical = {entry}
+    while pending:
+        path = pending.pop()
+        if path in critical:
+            continue
+        critical.add(path)
+        found, _ = scan_region(tokens[path], 0, len(tokens[path]))
+        pending += [owners[name] for name in found if name in owners and owners[name] not in critical]
+
+    ordered = [path for path, _ in scripts]
+    return ([path for path in ordered if path in critical],
+            [path for path in ordered if path not in critical])
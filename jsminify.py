@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - JavaScript压缩工具
+基于词法分析删除注释和空白，正确处理字符串、模板字符串和正则表达式
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 标记类型
+NAME = 'name'            # 标识符、关键字、数字
+STRING = 'string'        # '...' 和 "..."
+TEMPLATE = 'template'    # 模板字符串片段 (`...${ / }...${ / }...`)
+REGEX = 'regex'
+PUNCT = 'punct'
+NEWLINE = 'newline'      # 包含换行的空白或注释 (可能触发自动分号插入)
+
+PUNCTUATORS = sorted([
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=', '*=',
+    '/=', '%=', '&=', '|=', '^=', '<<', '>>', '**',
+    '{', '}', '(', ')', '[', ']', ';', ',', '<', '>', '+', '-', '*', '/', '%', '&', '|',
+    '^', '!', '~', '?', ':', '=', '.', '@', '#',
+], key=len, reverse=True)
+
+# 这些关键字之后的 / 是正则表达式而不是除号
+REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+    'case', 'do', 'else', 'yield', 'await',
+}
+
+# 前一个标记是这些标点时，后面的换行不会触发自动分号插入，可以删除
+JOINING_PUNCT = {p for p in PUNCTUATORS if p not in (')', ']', '}', '++', '--')}
+
+# 这些关键字之后的换行不会开始新语句 (或者后面的语句属于它)，其后的 console.log 不能删除
+CONTINUING_KEYWORDS = REGEX_KEYWORDS | {'var', 'let', 'const', 'extends'}
+
+# 这些关键字后面的 (...) 之后是语句体
+CONTROL_KEYWORDS = {'if', 'for', 'while', 'with'}
+
+# 后一个标记是这些标点时，前面的换行可以删除
+LEADING_PUNCT = {
+    '}', ')', ']', ',', ';', '.', '?', '?.', ':', '=', '==', '===', '!=', '!==', '&&', '||',
+    '??', '*', '%', '<', '>', '<=', '>=', '&', '|', '^', '=>', '+=', '-=', '*=', '%=',
+}
+
+LINE_TERMINATORS = '\r\n\u2028\u2029'
+WHITESPACE = ' \t\f\v\u00a0\ufeff' + LINE_TERMINATORS
+
+WHITESPACE_RUN = re.compile(f'[{WHITESPACE}]+')
+STRING_TOKEN = re.compile(r"""'(?:[^'\\\n]|\\[\s\S])*'|"(?:[^"\\\n]|\\[\s\S])*\"""")
+PUNCT_TOKEN = re.compile('|'.join(re.escape(p) for p in PUNCTUATORS))
+NAME_CHARS = re.compile(r'[\w$\\\u0080-\U0010ffff]')
+NAME_TOKEN = re.compile(r'(?:[\w$\u0080-\U0010ffff]|\\u[0-9a-fA-F{}]+)+')
+NUMBER_TOKEN = re.compile(r'\.?\d(?:[\w.]|[eE][+-])*')
+
+# 词法分析容易出错的写法及其期望的压缩结果，python jsminify.py --self-test 逐个检查
+# (把正则表达式误判为除号时标记序列仍能自洽，只有与期望结果比较才能发现)
+SELF_TEST_CASES = [
+    ('x = `${/ a/.test(s)}`;', 'x=`${/ a/.test(s)}`;\n'),
+    ('const ok = `${/}/.test(x) ? 1 : 2}`;', 'const ok=`${/}/.test(x)?1:2}`;\n'),
+    ('x = `${/"/.test(s)}`; y = "a"', 'x=`${/"/.test(s)}`;y="a"\n'),
+    ('const path = `${a}/${b}/${c / 2}`;', 'const path=`${a}/${b}/${c/2}`;\n'),
+    ('let n = a / b / c, r = /[/ ]+/g.test(p);', 'let n=a/b/c,r=/[/ ]+/g.test(p);\n'),
+    ('if (x) / re/.exec(s)', 'if(x)/ re/.exec(s)\n'),
+    ('return typeof x === "string" ? x.split(/ ,/) : x / 2',
+     'return typeof x==="string"?x.split(/ ,/):x/2\n'),
+    ('value = obj[key] / 2 + (y) / 3', 'value=obj[key]/2+(y)/3\n'),
+    ('a = b\n++c\nd = e\n(f)', 'a=b\n++c\nd=e\n(f)\n'),
+    ('const t = `outer ${`inner ${x}`} done`', 'const t=`outer ${`inner ${x}`} done`\n'),
+]
+
+class MinifyError(Exception):
+    """源码无法被正确解析 (未闭合的字符串、注释等)"""
+
+def tokenize(source):
+    """把JavaScript源码拆分为 (类型, 文本) 标记
+
+    空白和普通注释被丢弃，包含换行的空白/注释产生 NEWLINE 标记，
+    /*! 开头的版权注释原样保留为 NAME 类型的标记。
+    """
+    tokens = []
+    stack = []  # 记录 { 与 ${ 的嵌套，用于判断 } 是否结束模板字符串中的表达式
+    pos = 0
+    length = len(source)
+
+    def significant():
+        for kind, text in reversed(tokens):
+            if kind != NEWLINE:
+                return kind, text
+        return None, None
+
+    def regex_allowed():
+        kind, text = significant()
+        if kind is None:
+            return True
+        if kind == NAME:
+            return text in REGEX_KEYWORDS
+        if kind == PUNCT:
+            if text == ')':
+                # if (...) /re/.test(s) 中条件之后是语句，/ 开始正则表达式
+                end = max(i for i, token in enumerate(tokens) if token[0] != NEWLINE)
+                return control_condition(tokens, end)
+            return text != ']'
+        if kind == TEMPLATE:
+            # 以 ${ 结尾的模板片段之后开始一个表达式，与 ( 相同
+            return text.endswith('${')
+        return False
+
+    def scan_template(start):
+        """从 ` 或 } 之后扫描模板字符串，返回片段结束位置，以及是否进入了 ${ 表达式"""
+        i = start
+        while i < length:
+            char = source[i]
+            if char == '\\':
+                i += 2
+            elif char == '`':
+                return i + 1, False
+            elif char == '$' and source.startswith('${', i):
+                return i + 2, True
+            else:
+                i += 1
+        raise MinifyError(f"未闭合的模板字符串 (位置 {start})")
+
+    while pos < length:
+        char = source[pos]
+
+        # 空白与注释
+        if char in WHITESPACE:
+            end = WHITESPACE_RUN.match(source, pos).end()
+            if any(c in LINE_TERMINATORS for c in source[pos:end]):
+                tokens.append((NEWLINE, '\n'))
+            pos = end
+            continue
+        if source.startswith('//', pos):
+            end = source.find('\n', pos)
+            pos = length if end == -1 else end
+            continue
+        if source.startswith('/*', pos):
+            end = source.find('*/', pos + 2)
+            if end == -1:
+                raise MinifyError(f"未闭合的注释 (位置 {pos})")
+            comment = source[pos:end + 2]
+            if comment.startswith('/*!'):
+                tokens.append((NAME, comment))
+            elif '\n' in comment:
+                tokens.append((NEWLINE, '\n'))
+            pos = end + 2
+            continue
+
+        # 字符串
+        if char in '\'"':
+            match = STRING_TOKEN.match(source, pos)
+            if match is None:
+                raise MinifyError(f"未闭合的字符串 (位置 {pos})")
+            tokens.append((STRING, match.group()))
+            pos = match.end()
+            continue
+
+        # 模板字符串
+        if char == '`':
+            end, in_expression = scan_template(pos + 1)
+            tokens.append((TEMPLATE, source[pos:end]))
+            if in_expression:
+                stack.append('${')
+            pos = end
+            continue
+        if char == '}' and stack and stack[-1] == '${':
+            stack.pop()
+            end, in_expression = scan_template(pos + 1)
+            tokens.append((TEMPLATE, source[pos:end]))
+            if in_expression:
+                stack.append('${')
+            pos = end
+            continue
+
+        # 正则表达式
+        if char == '/' and regex_allowed():
+            i = pos + 1
+            in_class = False
+            while i < length and source[i] != '\n':
+                c = source[i]
+                if c == '\\':
+                    i += 1
+                elif c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                i += 1
+            if i < length and source[i] == '/':
+                i += 1
+                while i < length and NAME_CHARS.match(source[i]):
+                    i += 1
+                tokens.append((REGEX, source[pos:i]))
+                pos = i
+                continue
+
+        # 数字、标识符
+        match = NUMBER_TOKEN.match(source, pos) if char.isdigit() or (
+            char == '.' and pos + 1 < length and source[pos + 1].isdigit()) else None
+        if match is None and NAME_CHARS.match(char):
+            match = NAME_TOKEN.match(source, pos)
+        if match is not None:
+            tokens.append((NAME, match.group()))
+            pos = match.end()
+            continue
+
+        # 标点
+        match = PUNCT_TOKEN.match(source, pos)
+        if match is None:
+            raise MinifyError(f"无法识别的字符 {char!r} (位置 {pos})")
+        punct = match.group()
+        if punct == '{':
+            stack.append('{')
+        elif punct == '}' and stack:
+            stack.pop()
+        tokens.append((PUNCT, punct))
+        pos = match.end()
+
+    if stack:
+        raise MinifyError("括号或模板字符串未闭合")
+    return tokens
+
+def drop_console_calls(tokens):
+    """删除作为独立语句出现的 console.log(...) 调用"""
+    result = []
+    i = 0
+    while i < len(tokens):
+        if (tokens[i] == (NAME, 'console') and tokens[i + 1:i + 4] == [(PUNCT, '.'), (NAME, 'log'), (PUNCT, '(')]
+                and statement_start(result)):
+            depth = 0
+            j = i + 3
+            while j < len(tokens):
+                if tokens[j][0] == PUNCT and tokens[j][1] in ('(', '[', '{'):
+                    depth += 1
+                elif tokens[j][0] == PUNCT and tokens[j][1] in (')', ']', '}'):
+                    depth -= 1
+                    if depth == 0:
+                        break
+                elif tokens[j][0] == TEMPLATE and tokens[j][1].endswith('${'):
+                    depth += 1
+                if tokens[j][0] == TEMPLATE and tokens[j][1].startswith('}'):
+                    depth -= 1
+                j += 1
+            following = next((t for t in tokens[j + 1:] if t[0] != NEWLINE), None)
+            if following in ((PUNCT, ';'), (PUNCT, '}'), None) or (
+                    j + 1 < len(tokens) and tokens[j + 1][0] == NEWLINE and following[0] != PUNCT):
+                i = j + 1
+                if following == (PUNCT, ';'):
+                    while tokens[i][0] == NEWLINE:
+                        i += 1
+                    i += 1
+                continue
+        result.append(tokens[i])
+        i += 1
+    return result
+
+def statement_start(tokens):
+    """已输出的标记之后是否是新语句的开始
+
+    ; { } 之后总是新语句；没有分号的代码中，换行前的标记结束了一个表达式时，
+    自动分号插入使换行后成为新语句。if (...) 等控制语句的条件之后是语句体，不算新语句。
+    """
+    newline = False
+    for index in range(len(tokens) - 1, -1, -1):
+        kind, text = tokens[index]
+        if kind == NEWLINE:
+            newline = True
+            continue
+        if kind == PUNCT and text in (';', '{', '}'):
+            return True
+        if not newline:
+            return False
+        if kind == PUNCT:
+            if text == ')':
+                return not control_condition(tokens, index)
+            return text == ']'
+        if kind == NAME:
+            return text not in CONTINUING_KEYWORDS
+        if kind == TEMPLATE:
+            return text.endswith('`')
+        return True
+    return True
+
+def control_condition(tokens, end):
+    """tokens[end] 处的 ) 是否结束 if/for/while/with 的条件"""
+    depth = 0
+    for index in range(end, -1, -1):
+        kind, text = tokens[index]
+        if kind == PUNCT and text in (')', ']', '}'):
+            depth += 1
+        elif kind == PUNCT and text in ('(', '[', '{'):
+            depth -= 1
+            if depth == 0:
+                previous = next((t for t in reversed(tokens[:index]) if t[0] != NEWLINE), None)
+                return previous is not None and previous[0] == NAME and previous[1] in CONTROL_KEYWORDS
+    return True
+
+def needs_space(previous, current):
+    """两个相邻标记之间是否必须保留空格"""
+    kind, previous = previous
+    if NAME_CHARS.match(previous[-1]) and NAME_CHARS.match(current[0]):
+        return True
+    # 正则表达式之后紧跟标识符会被当作标志位
+    if kind == REGEX and NAME_CHARS.match(current[0]):
+        return True
+    if previous[-1] in '+-' and current[0] == previous[-1]:
+        return True
+    if previous[-1] == '/' and current[0] in '/*':
+        return True
+    # 1 .toString() 之类的数字成员访问
+    if previous.isdigit() and current[0] == '.':
+        return True
+    return False
+
+def render(tokens):
+    """把标记重新拼接为代码，只保留必须的空格和可能影响自动分号插入的换行"""
+    parts = []
+    previous = None  # 上一个非换行标记
+    pending_newline = False
+    for kind, text in tokens:
+        if kind == NEWLINE:
+            pending_newline = previous is not None
+            continue
+        if previous is not None:
+            if pending_newline and not (
+                    (previous[0] == PUNCT and previous[1] in JOINING_PUNCT)
+                    or (kind == PUNCT and text in LEADING_PUNCT)
+                    or (kind == TEMPLATE and text.startswith('}'))
+                    or (previous[0] == TEMPLATE and previous[1].endswith('${'))):
+                parts.append('\n')
+            elif needs_space(previous, text):
+                parts.append(' ')
+        parts.append(text)
+        previous = (kind, text)
+        pending_newline = False
+    return ''.join(parts)
+
+def minify(source, drop_console=False):
+    """压缩JavaScript源码"""
+    tokens = tokenize(source)
+    if drop_console:
+        tokens = drop_console_calls(tokens)
+    return render(tokens) + '\n'
+
+def significant_tokens(tokens):
+    return [token for token in tokens if token[0] != NEWLINE]
+
+def node_syntax_error(source):
+    """用 node --check 检查语法，返回错误信息；没有安装 Node.js 时返回None"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    fd, path = tempfile.mkstemp(suffix='.cjs')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(source)
+        result = subprocess.run([node, '--check', path], capture_output=True, text=True)
+    finally:
+        os.unlink(path)
+    if result.returncode == 0:
+        return None
+    lines = [line for line in result.stderr.splitlines() if 'Error' in line]
+    return lines[0].strip() if lines else result.stderr.strip()
+
+def verify(source, minified, drop_console=False):
+    """校验压缩结果，返回None表示通过，否则返回问题的描述
+
+    先重新解析压缩结果，确认标记序列与原始代码一致。这一步使用的是同一个 tokenize，
+    只能发现输出时丢失空格、删错换行之类的问题，发现不了词法分析本身的错误；
+    因此安装了 Node.js 时还会用 node --check 独立检查压缩结果的语法
+    (原始代码本身就有语法错误时不算压缩的问题)。
+    """
+    expected = tokenize(source)
+    if drop_console:
+        expected = drop_console_calls(expected)
+    try:
+        actual = tokenize(minified)
+    except MinifyError as e:
+        return f"压缩结果无法解析: {e}"
+    expected, actual = significant_tokens(expected), significant_tokens(actual)
+    for index, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            return f"第 {index} 个标记不一致: 期望 {want[1]!r}，实际 {got[1]!r}"
+    if len(expected) != len(actual):
+        return f"标记数量不一致: 期望 {len(expected)}，实际 {len(actual)}"
+    error = node_syntax_error(minified)
+    if error and node_syntax_error(source) is None:
+        return f"node --check 报告语法错误: {error}"
+    return None
+
+def minify_file(path, drop_console=False, check=False):
+    """就地压缩文件，返回 (原始大小, 压缩后大小)；check为True时校验压缩结果"""
+    path = Path(path)
+    raw = path.read_bytes()
+    source = raw.decode('utf-8-sig')
+    minified = minify(source, drop_console)
+    if check:
+        problem = verify(source, minified, drop_console)
+        if problem:
+            raise MinifyError(f"校验失败: {problem}")
+    data = minified.encode('utf-8')
+    path.write_bytes(data)
+    return len(raw), len(data)
+
+def self_test():
+    """压缩 SELF_TEST_CASES 中的每个片段，与期望结果比较并校验，全部通过时返回True"""
+    failures = 0
+    for source, expected in SELF_TEST_CASES:
+        try:
+            minified = minify(source)
+            problem = verify(source, minified)
+        except MinifyError as e:
+            minified, problem = None, str(e)
+        if problem is None and minified != expected:
+            problem = f"期望 {expected!r}，实际 {minified!r}"
+        if problem:
+            failures += 1
+            print(f"❌ {source!r}: {problem}")
+    if shutil.which('node') is None:
+        print("⚠️  未找到 node，跳过了语法检查")
+    print(f"{'✅' if not failures else '❌'} {len(SELF_TEST_CASES) - failures}/{len(SELF_TEST_CASES)} 个片段通过")
+    return not failures
+
+def main():
+    """主函数"""
+    if '--self-test' in sys.argv:
+        sys.exit(0 if self_test() else 1)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args or '--help' in sys.argv or '-h' in sys.argv:
+        print("3D脱硫塔工艺流程图 - JavaScript压缩工具")
+        print("\n用法:")
+        print("  python jsminify.py input.js [output.js]   # 压缩并输出到文件或标准输出")
+        print("  python jsminify.py input.js --drop-console # 同时删除 console.log 调用")
+        print("  python jsminify.py input.js --verify       # 只校验，不输出")
+        print("  python jsminify.py --self-test             # 压缩并校验内置的测试片段")
+        return
+
+    drop_console = '--drop-console' in sys.argv
+    source = Path(args[0]).read_text(encoding='utf-8-sig')
+    try:
+        minified = minify(source, drop_console)
+        problem = verify(source, minified, drop_console)
+    except MinifyError as e:
+        print(f"❌ {args[0]}: {e}")
+        sys.exit(1)
+    if problem:
+        print(f"❌ {args[0]}: 校验失败: {problem}")
+        sys.exit(1)
+
+    if '--verify' in sys.argv:
+        print(f"✅ {args[0]}: {len(source.encode('utf-8'))} -> {len(minified.encode('utf-8'))} 字节")
+    elif len(args) > 1:
+        Path(args[1]).write_text(minified, encoding='utf-8')
+    else:
+        sys.stdout.write(minified)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - 多平台并发部署
+每个平台的部署命令在各自的子进程中运行 (显式指定工作目录，不调用 os.chdir)，
+输出逐行加上平台前缀，超时和失败重试按平台分别处理；总耗时接近最慢的一个平台。
+"""
+
+import asyncio
+import os
+import shutil
+import signal
+import time
+
+DEFAULT_TIMEOUT = 600   # 单次尝试的超时秒数
+DEFAULT_RETRIES = 1     # 失败后的重试次数
+RETRY_DELAY = 2         # 第 n 次重试前等待 n * RETRY_DELAY 秒
+
+class Step:
+    """部署中的一条命令；check 为 False 时忽略失败 (例如停止不存在的容器)"""
+
+    def __init__(self, args, cwd, check=True):
+        self.args = [str(arg) for arg in args]
+        self.cwd = str(cwd)
+        self.check = check
+
+class DeployTarget:
+    """一个部署平台: 依次执行的命令，以及从输出中提取访问地址的函数"""
+
+    def __init__(self, name, steps, requires=None, find_url=None,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.name = name
+        self.steps = steps
+        self.requires = requires or steps[0].args[0]
+        self.find_url = find_url
+        self.timeout = timeout
+        self.retries = retries
+
+class DeployResult:
+    def __init__(self, name):
+        self.name = name
+        self.success = False
+        self.status = ''
+        self.attempts = 0
+        self.duration = 0.0
+        self.url = None
+
+async def stream_output(stream, prefix, lines):
+    """逐行转发子进程输出并保存"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        text = line.decode('utf-8', 'replace').rstrip()
+        lines.append(text)
+        print(f"{prefix} {text}", flush=True)
+
+def kill_process(process):
+    """结束子进程及其派生的进程 (vercel/netlify 等 CLI 会启动子进程)"""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+async def run_step(step, prefix, lines):
+    """运行一条命令，返回退出码"""
+    process = await asyncio.create_subprocess_exec(
+        *step.args, cwd=step.cwd, stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        start_new_session=os.name == 'posix')
+    try:
+        await stream_output(process.stdout, prefix, lines)
+        return await process.wait()
+    finally:
+        # 超时取消时结束整个进程组
+        if process.returncode is None:
+            kill_process(process)
+            await process.wait()
+
+async def run_attempt(target, prefix, lines):
+    for step in target.steps:
+        returncode = await run_step(step, prefix, lines)
+        if returncode != 0 and step.check:
+            return f"{step.args[0]} 退出码 {returncode}"
+    return None
+
+async def deploy_target(target):
+    """部署到一个平台，失败或超时后按设置重试"""
+    result = DeployResult(target.name)
+    prefix = f"[{target.name}]"
+    start = time.perf_counter()
+    if shutil.which(target.requires) is None:
+        result.status = f"{target.requires} 未安装"
+        print(f"{prefix} ❌ {result.status}", flush=True)
+        return result
+
+    for attempt in range(1, target.retries + 2):
+        result.attempts = attempt
+        if attempt > 1:
+            await asyncio.sleep(RETRY_DELAY * (attempt - 1))
+            print(f"{prefix} 🔄 第 {attempt - 1} 次重试...", flush=True)
+        lines = []
+        try:
+            error = await asyncio.wait_for(run_attempt(target, prefix, lines), target.timeout)
+        except asyncio.TimeoutError:
+            error = f"超时 ({target.timeout}s)"
+        except OSError as e:
+            error = str(e)
+        if error is None:
+            result.success = True
+            result.status = "成功"
+            result.url = target.find_url(lines) if target.find_url else None
+            break
+        result.status = error
+        print(f"{prefix} ❌ {error}", flush=True)
+
+    result.duration = time.perf_counter() - start
+    return result
+
+async def deploy_targets(targets):
+    return await asyncio.gather(*(deploy_target(target) for target in targets))
+
+def deploy_all(targets):
+    """并发部署到所有平台并打印汇总表，返回结果列表"""
+    start = time.perf_counter()
+    results = asyncio.run(deploy_targets(targets))
+    elapsed = time.perf_counter() - start
+
+    width = max(len(result.name) for result in results)
+    print("\n" + "=" * 50)
+    print("📊 部署结果汇总:")
+    for result in results:
+        status = "✅ 成功" if result.success else f"❌ 失败 ({result.status})"
+        print(f"  {result.name:<{width}}  {result.duration:6.1f}s  尝试{result.attempts}次  {status}")
+        if result.url:
+            print(f"  {'':<{width}}  🌐 {result.url}")
+    total = sum(result.duration for result in results)
+    print(f"⏱️  总耗时: {elapsed:.1f}s (逐个部署约需 {total:.1f}s)")
+    print("=" * 50)
+    return results
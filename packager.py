@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3D脱硫塔工艺流程图 - 静态文件打包
+生成可重现的 zip / tar.gz / tar.xz 包：条目按路径排序，时间戳和权限固定，
+相同的输入总是得到逐字节相同的包。zip 条目在线程池中并行压缩，按顺序流式写出。
+"""
+
+import gzip
+import lzma
+import os
+import struct
+import sys
+import tarfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 已经压缩过的格式直接存储，再压缩只会浪费时间
+STORED_SUFFIXES = {
+    '.glb', '.gz', '.br', '.zip', '.xz', '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.woff', '.woff2', '.mp4', '.webm',
+}
+
+PACKAGE_FORMATS = ('zip', 'tar.gz', 'tar.xz')
+COMPRESS_LEVEL = 9
+FILE_MODE = 0o644
+
+# zip 格式能表示的最早时间 (1980-01-01)；设置了 SOURCE_DATE_EPOCH 时使用它
+DEFAULT_EPOCH = 315532800
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_UTF8_FLAG = 0x800
+ZIP_VERSION = 20
+ZIP_MAX_SIZE = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+
+def source_date_epoch():
+    """打包使用的固定时间戳"""
+    try:
+        return max(int(os.environ['SOURCE_DATE_EPOCH']), DEFAULT_EPOCH)
+    except (KeyError, ValueError):
+        return DEFAULT_EPOCH
+
+def collect_entries(root):
+    """列出目录中的所有文件，返回按包内路径排序的 [(包内路径, 文件路径), ...]"""
+    root = Path(root)
+    entries = [(path.relative_to(root).as_posix(), path)
+               for path in root.rglob('*') if path.is_file()]
+    return sorted(entries)
+
+def dos_datetime(epoch):
+    t = time.gmtime(epoch)
+    return (((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+            (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2))
+
+def compress_entry(name, path):
+    """读取并压缩一个 zip 条目，返回 (压缩方式, CRC32, 原大小, 数据)"""
+    data = Path(path).read_bytes()
+    crc = zlib.crc32(data)
+    if Path(name).suffix.lower() in STORED_SUFFIXES:
+        return ZIP_STORED, crc, len(data), data
+    # wbits=-15: 不带头部的 raw deflate，zip 条目需要这种格式
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    deflated = compressor.compress(data) + compressor.flush()
+    if len(deflated) >= len(data):
+        return ZIP_STORED, crc, len(data), data
+    return ZIP_DEFLATED, crc, len(data), deflated
+
+def write_zip(entries, out, jobs=None):
+    """把 [(包内路径, 文件路径), ...] 写成 zip 并返回写出的字节数
+
+    条目在线程池中并行压缩 (zlib 压缩时释放GIL)，按顺序写出；同时在途的条目数有上限，
+    不需要先把整个包放在内存或临时文件中，out 可以是不支持 seek 的流 (如标准输出)。
+    """
+    if len(entries) > ZIP_MAX_ENTRIES:
+        raise ValueError(f"文件数超过 {ZIP_MAX_ENTRIES}，zip 需要 ZIP64 格式")
+    jobs = jobs or os.cpu_count() or 1
+    date, clock = dos_datetime(source_date_epoch())
+    central = []
+    offset = 0
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = []
+        queued = iter(entries)
+
+        def submit():
+            entry = next(queued, None)
+            if entry is not None:
+                pending.append((entry[0], executor.submit(compress_entry, *entry)))
+
+        for _ in range(jobs * 2):
+            submit()
+        while pending:
+            name, future = pending.pop(0)
+            submit()
+            method, crc, size, data = future.result()
+            if offset > ZIP_MAX_SIZE or size > ZIP_MAX_SIZE:
+                raise ValueError(f"{name}: 超过4GB，zip 需要 ZIP64 格式")
+
+            encoded = name.encode('utf-8')
+            flags = 0 if encoded.isascii() else ZIP_UTF8_FLAG
+            fields = (ZIP_VERSION, flags, method, clock, date, crc, len(data), size, len(encoded))
+            header = struct.pack('<4s5HL2L2H', b'PK\x03\x04', *fields, 0)
+            out.write(header)
+            out.write(encoded)
+            out.write(data)
+            central.append(struct.pack('<4s6HL2L5H2L', b'PK\x01\x02', (3 << 8) | ZIP_VERSION,
+                                       *fields, 0, 0, 0, 0, (0o100000 | FILE_MODE) << 16, offset) + encoded)
+            offset += len(header) + len(encoded) + len(data)
+
+    directory = b''.join(central)
+    out.write(directory)
+    out.write(struct.pack('<4s4H2LH', b'PK\x05\x06', 0, 0, len(central), len(central),
+                          len(directory), offset, 0))
+    return offset + len(directory) + 22
+
+def write_tar(entries, out, compression):
+    """把 [(包内路径, 文件路径), ...] 写成 tar.gz / tar.xz，所有者、权限和时间戳固定"""
+    epoch = source_date_epoch()
+    if compression == 'gz':
+        # tarfile 的 'w|gz' 会把当前时间写入gzip头部，这里自己创建 GzipFile
+        compressed = gzip.GzipFile(filename='', mode='wb', fileobj=out,
+                                   compresslevel=COMPRESS_LEVEL, mtime=epoch)
+    elif compression == 'xz':
+        compressed = lzma.LZMAFile(out, 'wb', preset=COMPRESS_LEVEL)
+    else:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+
+    with compressed, tarfile.open(fileobj=compressed, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+        for name, path in entries:
+            info = tarfile.TarInfo(name)
+            info.size = Path(path).stat().st_size
+            info.mtime = epoch
+            info.mode = FILE_MODE
+            with open(path, 'rb') as f:
+                tar.addfile(info, f)
+
+def write_package(root, package_format, out, jobs=None):
+    """把目录打包写入 out"""
+    entries = collect_entries(root)
+    if package_format == 'zip':
+        write_zip(entries, out, jobs)
+    elif package_format in ('tar.gz', 'tar.xz'):
+        write_tar(entries, out, package_format.split('.')[1])
+    else:
+        raise ValueError(f"不支持的打包格式: {package_format}")
+    return len(entries)
+
+def build_package(root, output, package_format, jobs=None):
+    """打包到文件 (先写临时文件再替换)，output 为 '-' 时写到标准输出，返回文件数"""
+    if output == '-':
+        count = write_package(root, package_format, sys.stdout.buffer, jobs)
+        sys.stdout.buffer.flush()
+        return count
+    output = Path(output)
+    tmp_path = output.with_name(output.name + '.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            count = write_package(root, package_format, f, jobs)
+        os.replace(tmp_path, output)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return count
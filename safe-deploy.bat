@@ -21,13 +21,11 @@ if not exist "dist" (
     exit /b 1
 )
 
-cd dist
-
-echo ✅ 启动增强版Python服务器...
+echo ✅ 启动增强版Python服务器 (gzip压缩)...
 echo 🌐 访问地址: http://localhost:8080
 echo 💡 按Ctrl+C停止服务器
 echo.
 
-python server-with-gzip.py 8080
+python server.py --root dist --port 8080
 
 pause
@@ -6,52 +6,1694 @@
 """
 
 import http.server
+import http.client
 import socketserver
+import socket
+import signal
+import subprocess
+import errno
+import asyncio
+import atexit
+import contextlib
+import email.utils
+import gzip
+import hashlib
+import html
+import io
+import json
+import mimetypes
+import mmap
 import os
+import posixpath
+import queue
+import re
+import secrets
 import sys
+import threading
+import time
+import urllib.parse
 import webbrowser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
 from pathlib import Path
 
+import filewatch
+
 # 服务器配置
 PORT = 8000
 HOST = 'localhost'
+THREADS = 16    # 每个进程的请求处理线程数
+WORKERS = 1     # 预派生进程数 (>1 时使用 SO_REUSEPORT)
+ENGINE = 'threaded'         # 服务引擎: threaded | asyncio
+KEEPALIVE_TIMEOUT = 15      # 空闲连接的超时秒数
+MAX_HEADER_BYTES = 64 * 1024
+CACHE_SIZE_MB = 64          # 内存资源缓存上限 (MB)，0 表示关闭缓存
+STATS_PATH = '/__stats'     # 服务器统计信息接口
+CACHE_CONTROL = 'dev'       # 浏览器缓存策略: dev | production
+
+MIN_COMPRESS_SIZE = 1024    # 小于该大小的文件不压缩 (与nginx gzip_min_length一致)
+MIN_COMPRESSION_GAIN = 0.9  # 压缩后不小于原大小90%时直接发送原文件
+ROOT = None                 # 服务目录，默认为项目根目录
+ZERO_COPY = 'auto'          # 大文件发送方式: auto | sendfile | mmap | off
+ZERO_COPY_THRESHOLD_KB = 256  # 超过该大小的文件走零拷贝路径
+MAX_RANGES = 16             # 单个请求允许的最大区间数，超出时忽略Range
+MAX_PENDING = 256           # 排队等待线程池处理的连接上限，超出时直接返回503
+COPY_CHUNK_SIZE = 64 * 1024
+OPEN_BROWSER = True         # 启动后自动打开浏览器 (--no-browser 关闭)
+ACCESS_LOG_MODE = 'stdout'  # 访问日志: stdout | buffered | background | off
+MAX_TIMED_PATHS = 512       # 按路径统计耗时的最大路径数，超出部分归入 (other)
+WATCH = False               # 监视文件变化，自动重新构建并通知页面刷新 (--watch)
+WATCH_BUILD = 'auto'        # 文件变化后的构建: auto (服务构建目录时运行deploy.py) | deploy | off
+WATCH_POLLING = False       # 不使用inotify，改为轮询 (--watch-polling)
+LIVE_RELOAD_PATH = '/__livereload'  # 页面刷新事件 (Server-Sent Events)
+LIVE_RELOAD_PING = 15       # SSE连接的保活间隔 (秒)
+
+# 可压缩的内容类型 (glb、图片、字体等已压缩格式不在此列)
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+    'model/gltf+json',
+)
+
+# 构建时生成的预压缩文件后缀，按优先级排列
+ENCODING_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# deploy.py 生成的带内容哈希的文件名 (main.3f9a1c2b.js)，内容变化时文件名随之变化
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8}\.(?:js|mjs|css|json)$')
+
+# deploy.py 生成的 Service Worker，浏览器必须每次验证才能及时发现新版本
+SERVICE_WORKER = 'sw.js'
+
+# 按扩展名的 Cache-Control 策略，'*' 为默认值
+CACHE_CONTROL_PROFILES = {
+    # 开发环境：每次刷新都向服务器验证，文件未修改时返回304
+    'dev': {
+        '*': 'no-cache',
+    },
+    # 与 netlify.toml / vercel.json 以及部署用的nginx配置保持一致
+    'production': {
+        '.js': IMMUTABLE,
+        '.mjs': IMMUTABLE,
+        '.css': IMMUTABLE,
+        '.glb': IMMUTABLE,
+        '.gltf': IMMUTABLE,
+        '.png': IMMUTABLE,
+        '.jpg': IMMUTABLE,
+        '.jpeg': IMMUTABLE,
+        '.gif': IMMUTABLE,
+        '.ico': IMMUTABLE,
+        '.svg': IMMUTABLE,
+        '.woff': IMMUTABLE,
+        '.woff2': IMMUTABLE,
+        '.ttf': IMMUTABLE,
+        '.eot': IMMUTABLE,
+        '.json': 'public, max-age=3600',
+        '.html': 'no-cache, no-store, must-revalidate',
+        'hashed': IMMUTABLE,
+        '*': 'public, max-age=0, must-revalidate',
+    },
+}
+
+# 所有响应都附带的CORS头部
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+]
+
+# 为JavaScript模块和3D模型设置正确的MIME类型
+MIME_OVERRIDES = {
+    '.js': 'application/javascript',
+    '.mjs': 'application/javascript',
+    '.json': 'application/json',
+    '.glb': 'model/gltf-binary',
+    '.gltf': 'model/gltf+json',
+}
+
+def guess_content_type(path):
+    """改进MIME类型检测，两种服务引擎共用"""
+    for suffix, content_type in MIME_OVERRIDES.items():
+        if path.endswith(suffix):
+            return content_type
+    
+    # 与 SimpleHTTPRequestHandler.guess_type 的查找顺序保持一致
+    extensions_map = http.server.SimpleHTTPRequestHandler.extensions_map
+    base, ext = posixpath.splitext(path)
+    if ext in extensions_map:
+        return extensions_map[ext]
+    ext = ext.lower()
+    if ext in extensions_map:
+        return extensions_map[ext]
+    guess, _ = mimetypes.guess_type(path)
+    return guess or 'application/octet-stream'
+
+def log_date_time_string():
+    """与 BaseHTTPRequestHandler 相同的日志时间格式"""
+    year, month, day, hh, mm, ss, _, _, _ = time.localtime()
+    monthname = http.server.BaseHTTPRequestHandler.monthname
+    return "%02d/%3s/%04d %02d:%02d:%02d" % (day, monthname[month], year, hh, mm, ss)
+
+class AccessLog:
+    """访问日志输出
+
+    stdout 与原来一样逐行打印；buffered 攒够一批或超过1秒再写出；
+    background 交给后台线程写出，请求线程只做一次入队；off 不输出。
+    """
+    
+    BATCH_LINES = 64
+    FLUSH_INTERVAL = 1.0
+    
+    def __init__(self, mode='stdout'):
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.queue = None
+        self.thread = None
+        self.owner_pid = None
+    
+    def write(self, line):
+        if self.mode == 'stdout':
+            print(line)
+        elif self.mode == 'buffered':
+            with self.lock:
+                self.buffer.append(line)
+                if (len(self.buffer) >= self.BATCH_LINES
+                        or time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL):
+                    self.flush_locked()
+        elif self.mode == 'background':
+            self.ensure_writer()
+            self.queue.put(line)
+    
+    def flush_locked(self):
+        if self.buffer:
+            sys.stdout.write('\n'.join(self.buffer) + '\n')
+            sys.stdout.flush()
+            self.buffer = []
+        self.last_flush = time.monotonic()
+    
+    def ensure_writer(self):
+        """按需启动写日志线程 (fork之后的子进程需要重新启动)"""
+        with self.lock:
+            if self.thread is not None and self.owner_pid == os.getpid():
+                return
+            self.queue = queue.SimpleQueue()
+            self.thread = threading.Thread(target=self.run_writer, name='access-log', daemon=True)
+            self.owner_pid = os.getpid()
+            self.thread.start()
+    
+    def run_writer(self):
+        while True:
+            lines = [self.queue.get()]
+            # 一次取出队列中积压的所有行，合并写出
+            while len(lines) < self.BATCH_LINES:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in lines
+            lines = [line for line in lines if line is not None]
+            if lines:
+                sys.stdout.write('\n'.join(lines) + '\n')
+                sys.stdout.flush()
+            if stop:
+                return
+    
+    def close(self):
+        """写出尚未输出的日志"""
+        with self.lock:
+            self.flush_locked()
+        if self.thread is not None and self.owner_pid == os.getpid():
+            self.queue.put(None)
+            self.thread.join(timeout=2)
+            self.thread = None
+
+ACCESS_LOG = AccessLog()
+atexit.register(ACCESS_LOG.close)
+
+def log_line(message):
+    """输出一行服务器日志"""
+    ACCESS_LOG.write(f"[{log_date_time_string()}] {message}")
+
+# --watch 时插入到每个HTML页面 </body> 之前的刷新脚本
+LIVE_RELOAD_SCRIPT = """<script>
+// 开发服务器 --watch: 文件变化后自动刷新页面，只有样式表变化时直接替换样式
+(function () {
+    var source = new EventSource('%s');
+    source.addEventListener('reload', function (event) {
+        var data = JSON.parse(event.data);
+        if (!data.css_only) {
+            location.reload();
+            return;
+        }
+        document.querySelectorAll('link[rel="stylesheet"]').forEach(function (link) {
+            var url = new URL(link.href);
+            url.searchParams.set('livereload', event.lastEventId);
+            link.href = url.href;
+        });
+    });
+    source.addEventListener('build-error', function (event) {
+        console.error('重新构建失败:\\n' + JSON.parse(event.data).output);
+    });
+})();
+</script>
+""" % LIVE_RELOAD_PATH
+
+class LiveReload:
+    """页面刷新事件的广播 (--watch)
+
+    线程池引擎的SSE连接在条件变量上等待，asyncio引擎的连接注册 asyncio.Event；
+    连接只关心最新一次事件，期间的多次事件合并为一次。
+    """
+    
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.message = None
+        self.closed = False
+        self.waiters = set()    # asyncio连接: (事件循环, asyncio.Event)
+    
+    def publish(self, event, data):
+        with self.condition:
+            self.version += 1
+            payload = json.dumps(data, ensure_ascii=False)
+            self.message = f"id: {self.version}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')
+            self.condition.notify_all()
+            waiters = list(self.waiters)
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(wakeup.set)
+    
+    def latest(self, version):
+        """返回 (最新版本, 比 version 新的事件消息或None)，调用时需持有锁"""
+        if self.version == version:
+            return version, None
+        return self.version, self.message
+    
+    def wait(self, version, timeout):
+        """等待比 version 新的事件，超时或关闭时消息为None"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version or self.closed, timeout)
+            return self.latest(version)
+    
+    async def wait_async(self, version, timeout):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.condition:
+            if self.version != version or self.closed:
+                return self.latest(version)
+            self.waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.condition:
+                self.waiters.discard(waiter)
+        with self.condition:
+            return self.latest(version)
+    
+    def close(self):
+        """唤醒所有等待中的连接，让它们结束"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            waiters = list(self.waiters)
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(wakeup.set)
+
+LIVE_RELOAD = LiveReload()
+
+def is_live_reload_request(url_path):
+    return WATCH and urllib.parse.urlsplit(url_path).path == LIVE_RELOAD_PATH
+
+class RequestTimings:
+    """单个请求各阶段的耗时 (排队、stat、读取、压缩、发送)"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+    
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+    
+    @contextlib.contextmanager
+    def measure(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+    
+    def elapsed(self):
+        return time.perf_counter() - self.started
+    
+    def server_timing(self):
+        """Server-Timing 头部，浏览器开发者工具的 Timing 面板会显示这些阶段"""
+        entries = [f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in self.phases.items()]
+        entries.append(f"app;dur={self.elapsed() * 1000:.3f}")
+        return ', '.join(entries)
+
+class LatencyHistogram:
+    """HDR风格的对数-线性直方图 (微秒)
+
+    每个2的幂区间再等分为16个桶，任意量级下的相对误差都不超过约6%，
+    内存占用与记录次数无关。
+    """
+    
+    SUB_BUCKET_BITS = 4
+    
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+    
+    def bucket(self, value):
+        """返回value所在桶的下界"""
+        shift = value.bit_length() - 1 - self.SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return (value >> shift) << shift
+    
+    def record(self, seconds):
+        value = max(1, int(seconds * 1e6))
+        key = self.bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def percentile(self, pct):
+        if not self.total:
+            return 0
+        threshold = max(1, -(-self.total * pct // 100))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= threshold:
+                return min(key, self.max)
+        return self.max
+    
+    def summary(self):
+        def ms(micros):
+            return round(micros / 1000, 3)
+        return {
+            'count': self.total,
+            'mean_ms': ms(self.sum / self.total) if self.total else 0.0,
+            'min_ms': ms(self.min or 0),
+            'p50_ms': ms(self.percentile(50)),
+            'p90_ms': ms(self.percentile(90)),
+            'p99_ms': ms(self.percentile(99)),
+            'max_ms': ms(self.max),
+        }
+
+class RequestMetrics:
+    """按阶段、扩展名和路径汇总请求耗时"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.by_extension = {}
+        self.by_path = {}
+    
+    def record(self, url_path, timings, total):
+        path = urllib.parse.urlsplit(url_path).path
+        ext = posixpath.splitext(path)[1].lower() or '(none)'
+        with self.lock:
+            for phase, seconds in timings.phases.items():
+                self.phases.setdefault(phase, LatencyHistogram()).record(seconds)
+            self.phases.setdefault('total', LatencyHistogram()).record(total)
+            self.by_extension.setdefault(ext, LatencyHistogram()).record(total)
+            if path not in self.by_path and len(self.by_path) >= MAX_TIMED_PATHS:
+                path = '(other)'
+            self.by_path.setdefault(path, LatencyHistogram()).record(total)
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'phases': {name: h.summary() for name, h in self.phases.items()},
+                'by_extension': {name: h.summary() for name, h in sorted(self.by_extension.items())},
+                'by_path': {name: h.summary() for name, h in sorted(self.by_path.items())},
+            }
+
+METRICS = RequestMetrics()
 
 class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """自定义HTTP请求处理器，支持CORS和正确的MIME类型"""
     
+    # 连接空闲超时，客户端打开连接后不发送请求时不会一直占用线程
+    timeout = KEEPALIVE_TIMEOUT
+    
     def end_headers(self):
         # 添加CORS头部
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        for keyword, value in CORS_HEADERS:
+            self.send_header(keyword, value)
         super().end_headers()
     
     def guess_type(self, path):
         """改进MIME类型检测"""
-        # 为JavaScript模块设置正确的MIME类型
-        if path.endswith('.js'):
-            return 'application/javascript'
-        elif path.endswith('.mjs'):
-            return 'application/javascript'
-        elif path.endswith('.json'):
-            return 'application/json'
-        elif path.endswith('.glb'):
-            return 'model/gltf-binary'
-        elif path.endswith('.gltf'):
-            return 'model/gltf+json'
-        
-        # 使用父类方法处理其他类型
-        return super().guess_type(path)
+        return guess_content_type(path)
     
     def log_message(self, format, *args):
         """自定义日志格式"""
-        print(f"[{self.log_date_time_string()}] {format % args}")
+        log_line(format % args)
+    
+    def do_GET(self):
+        if is_live_reload_request(self.path):
+            self.stream_live_reload()
+            return
+        super().do_GET()
+        self.record_timings()
+    
+    def stream_live_reload(self):
+        """以 Server-Sent Events 推送刷新事件，直到页面关闭或服务器停止
+
+        每个打开的页面占用线程池中的一个线程。
+        """
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        version = LIVE_RELOAD.version
+        try:
+            self.wfile.write(b'retry: 1000\n\n')
+            while not LIVE_RELOAD.closed:
+                version, message = LIVE_RELOAD.wait(version, LIVE_RELOAD_PING)
+                self.wfile.write(message or b': ping\n\n')
+                self.wfile.flush()
+        except OSError:
+            pass
+    
+    def do_HEAD(self):
+        super().do_HEAD()
+        self.record_timings()
+    
+    def record_timings(self):
+        timings = getattr(self, 'request_timings', None)
+        if timings is not None:
+            METRICS.record(self.path, timings, timings.elapsed())
+            self.request_timings = None
+    
+    def send_head(self):
+        """通过共享的静态资源解析逻辑发送响应头，命中缓存时不再读取磁盘"""
+        self.static_response = None
+        timings = self.request_timings = RequestTimings()
+        context = getattr(self.server, 'request_context', None)
+        if context is not None and getattr(context, 'queue_wait', None) is not None:
+            timings.add('queue', context.queue_wait)
+            context.queue_wait = None
+        
+        response = resolve_static(self.directory, self.path,
+                                  getattr(self.server, 'asset_cache', None), self.headers,
+                                  timings)
+        if response is None:
+            # 没有index.html的目录仍由父类生成目录列表
+            return super().send_head()
+        if response.status >= 400:
+            # 与 send_error 相同的日志和连接处理，但保留额外的响应头 (如416的Content-Range)
+            self.log_error("code %d, message %s", response.status, response.message)
+            self.send_response(response.status, response.message)
+            self.send_header('Connection', 'close')
+        else:
+            self.send_response(response.status)
+        for keyword, value in response.headers:
+            self.send_header(keyword, value)
+        self.send_header('Server-Timing', timings.server_timing())
+        self.end_headers()
+        self.static_response = response
+        
+        if response.file_path is None:
+            return io.BytesIO(response.body)
+        try:
+            f = open(response.file_path, 'rb')
+        except OSError:
+            return None
+        f.seek(response.offset)
+        return f
+    
+    def copyfile(self, source, outputfile):
+        """发送响应体：大文件走 os.sendfile / mmap，跳过Python层的读写循环"""
+        response = getattr(self, 'static_response', None)
+        timings = getattr(self, 'request_timings', None) or RequestTimings()
+        with timings.measure('send'):
+            if response is None or response.file_path is None:
+                super().copyfile(source, outputfile)
+            else:
+                self.send_segments(response, source, outputfile)
+    
+    def send_segments(self, response, source, outputfile):
+        """依次发送文件区间，按大小选择 sendfile / mmap / 普通复制"""
+        for segment in response.file_segments():
+            if isinstance(segment, bytes):
+                # multipart/byteranges 的分段头部
+                outputfile.write(segment)
+                continue
+            offset, length = segment
+            method = zero_copy_method(length)
+            started = time.perf_counter()
+            if method == 'sendfile':
+                sent = sendfile_all(self.connection, source, offset, length)
+            elif method == 'mmap':
+                sent = send_mmap(self.connection, source, offset, length)
+            else:
+                sent = copy_region(source, outputfile, offset, length)
+            TRANSFERS.record(method, sent, time.perf_counter() - started)
+
+def zero_copy_method(length):
+    """根据文件大小和配置选择发送方式: sendfile | mmap | copy"""
+    if ZERO_COPY == 'off' or length < ZERO_COPY_THRESHOLD_KB * 1024:
+        return 'copy'
+    if ZERO_COPY in ('auto', 'sendfile') and hasattr(os, 'sendfile'):
+        return 'sendfile'
+    return 'mmap'
+
+def copy_region(f, outputfile, offset, count):
+    """普通读写循环，只复制文件中的指定区间"""
+    f.seek(offset)
+    remaining = count
+    while remaining > 0:
+        chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        outputfile.write(chunk)
+        remaining -= len(chunk)
+    return count - remaining
+
+def sendfile_all(sock, f, offset, count):
+    """用 os.sendfile 在内核中把文件区间直接写入套接字"""
+    out_fd = sock.fileno()
+    in_fd = f.fileno()
+    sent = 0
+    while sent < count:
+        n = os.sendfile(out_fd, in_fd, offset + sent, count - sent)
+        if n == 0:
+            break
+        sent += n
+    return sent
+
+def send_mmap(sock, f, offset, count):
+    """不支持 sendfile 的平台上从mmap缓冲区发送，避免逐块复制到Python字节串"""
+    if count == 0:
+        return 0
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            sock.sendall(view[offset:offset + count])
+    return count
+
+class TransferStats:
+    """各发送路径的响应数、字节数与耗时，用于比较吞吐量"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+    
+    def record(self, method, sent_bytes, seconds):
+        with self.lock:
+            counter = self.counters.setdefault(method, [0, 0, 0.0])
+            counter[0] += 1
+            counter[1] += sent_bytes
+            counter[2] += seconds
+    
+    def stats(self):
+        with self.lock:
+            result = {}
+            for method, (responses, sent_bytes, seconds) in self.counters.items():
+                result[method] = {
+                    'responses': responses,
+                    'bytes': sent_bytes,
+                    'seconds': round(seconds, 6),
+                    'mb_per_s': round(sent_bytes / seconds / 1e6, 2) if seconds else None,
+                }
+            return result
+
+TRANSFERS = TransferStats()
+
+class CachedAsset:
+    """缓存中的单个静态资源"""
+    
+    def __init__(self, path, stat, body, headers):
+        self.path = path
+        self.signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        self.body = body
+        self.headers = headers
+        self.variants = {}      # 压缩变体: encoding -> (bytes, headers)，不值得压缩时为None
+    
+    @property
+    def nbytes(self):
+        return len(self.body) + sum(len(variant[0]) for variant in self.variants.values() if variant)
+
+class AssetCache:
+    """按路径索引、有字节上限的LRU静态资源缓存
+
+    每次命中都会用 stat 结果中的 mtime/inode/size 重新校验，
+    文件被编辑或替换后下一次请求立即重新加载。
+    """
+    
+    def __init__(self, max_bytes, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        # 单个文件最多占用预算的1/4，避免大模型文件把热点脚本挤出缓存
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 4
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def cacheable(self, stat):
+        return 0 < self.max_bytes and stat.st_size <= self.max_entry_bytes
+    
+    def get(self, path, stat):
+        """返回仍然有效的缓存条目，失效条目会被移除"""
+        signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        with self.lock:
+            asset = self.entries.get(path)
+            if asset is not None:
+                if asset.signature == signature:
+                    self.entries.move_to_end(path)
+                    self.hits += 1
+                    return asset
+                self.remove(path)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+    
+    def load(self, path, headers_for):
+        """从磁盘读取文件并放入缓存，headers_for(stat, body) 生成预计算的响应头"""
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            body = f.read()
+        asset = CachedAsset(path, stat, body, headers_for(stat, body))
+        self.store(asset)
+        return asset
+    
+    def store(self, asset):
+        with self.lock:
+            if asset.path in self.entries:
+                self.remove(asset.path)
+            self.entries[asset.path] = asset
+            self.current_bytes += asset.nbytes
+            self.evict()
+    
+    def add_variant(self, asset, encoding, variant):
+        """为已缓存的资源追加压缩变体 (bytes, headers) 并计入预算"""
+        with self.lock:
+            if encoding in asset.variants:
+                return
+            asset.variants[encoding] = variant
+            if variant and self.entries.get(asset.path) is asset:
+                self.current_bytes += len(variant[0])
+                self.evict()
+    
+    def remove(self, path):
+        asset = self.entries.pop(path)
+        self.current_bytes -= asset.nbytes
+    
+    def evict(self):
+        """按最近最少使用顺序淘汰，直到回到预算以内"""
+        while self.current_bytes > self.max_bytes and self.entries:
+            path = next(iter(self.entries))
+            self.remove(path)
+            self.evictions += 1
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+class ETagIndex:
+    """记录每个文件的内容哈希 (强ETag)
+
+    以 mtime/inode/size 为签名，文件不变时直接复用已计算的ETag，
+    条件请求只需一次 stat 就能判断是否返回304。只用于进入内存缓存的文件，
+    其余文件使用 stat_etag。
+    """
+    
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def lookup(self, path, stat):
+        """返回已知的ETag，文件变化或未计算过时返回None"""
+        signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(path)
+                return entry[1]
+        return None
+    
+    def etag(self, path, stat, body=None):
+        """返回文件的ETag，必要时根据 body 或文件内容计算"""
+        etag = self.lookup(path, stat)
+        if etag is not None:
+            return etag
+        
+        digest = hashlib.sha256()
+        if body is not None:
+            digest.update(body)
+        else:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+        
+        signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        with self.lock:
+            self.entries[path] = (signature, etag)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return etag
+
+ETAGS = ETagIndex()
+
+def stat_etag(stat):
+    """不读取文件内容的ETag (mtime-大小，与nginx的格式相同)
+
+    用于不进入内存缓存的文件 (大文件或 --cache-size 0)：对它们计算内容哈希需要读完整个文件，
+    在asyncio引擎中会阻塞事件循环。
+    """
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+class CompressionStats:
+    """压缩响应计数：原始字节数与实际发送字节数"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+    
+    def record(self, source, raw_bytes, sent_bytes):
+        """source 为 'static' (预压缩文件) 或 'memory' (运行时压缩)"""
+        with self.lock:
+            counter = self.counters.setdefault(source, [0, 0, 0])
+            counter[0] += 1
+            counter[1] += raw_bytes
+            counter[2] += sent_bytes
+    
+    def stats(self):
+        with self.lock:
+            result = {}
+            for source, (responses, raw_bytes, sent_bytes) in self.counters.items():
+                result[source] = {
+                    'responses': responses,
+                    'raw_bytes': raw_bytes,
+                    'sent_bytes': sent_bytes,
+                    'ratio': round(sent_bytes / raw_bytes, 4) if raw_bytes else 0.0,
+                }
+            return result
+
+COMPRESSION = CompressionStats()
+
+def create_asset_cache():
+    """按当前配置创建资源缓存，缓存关闭时返回None"""
+    if CACHE_SIZE_MB <= 0:
+        return None
+    return AssetCache(CACHE_SIZE_MB * 1024 * 1024)
+
+class StaticResponse:
+    """静态资源响应：状态码、响应头，以及内存中的响应体或待发送的文件区间
+
+    多区间响应的 segments 由分段头部 (bytes) 和文件区间 (offset, length) 交替组成。
+    """
+    
+    def __init__(self, status, headers=None, body=b'', file_path=None, offset=0, length=0,
+                 message=None, segments=None):
+        self.status = status
+        self.message = message
+        self.headers = headers or []
+        self.body = body
+        self.file_path = file_path
+        self.offset = offset
+        self.length = length
+        self.segments = segments
+    
+    def file_segments(self):
+        """需要依次发送的分段列表"""
+        if self.segments is not None:
+            return self.segments
+        return [(self.offset, self.length)]
+
+def translate_url_path(url_path, root):
+    """把URL路径映射为root下的文件路径，规则与 SimpleHTTPRequestHandler.translate_path 相同"""
+    url_path = url_path.split('?', 1)[0].split('#', 1)[0]
+    trailing_slash = url_path.rstrip().endswith('/')
+    try:
+        url_path = urllib.parse.unquote(url_path, errors='surrogatepass')
+    except UnicodeDecodeError:
+        url_path = urllib.parse.unquote(url_path)
+    url_path = posixpath.normpath(url_path)
+    path = str(root)
+    for word in filter(None, url_path.split('/')):
+        if os.path.dirname(word) or word in (os.curdir, os.pardir):
+            continue
+        path = os.path.join(path, word)
+    if trailing_slash:
+        path += '/'
+    return path
+
+def error_response(status, message=None):
+    """生成与 SimpleHTTPRequestHandler.send_error 相同格式的错误页"""
+    short, long = http.server.BaseHTTPRequestHandler.responses.get(status, ('???', '???'))
+    body = (http.server.DEFAULT_ERROR_MESSAGE % {
+        'code': status,
+        'message': html.escape(message or short, quote=False),
+        'explain': html.escape(long, quote=False),
+    }).encode('UTF-8', 'replace')
+    headers = [
+        ('Content-Type', http.server.DEFAULT_ERROR_CONTENT_TYPE),
+        ('Content-Length', str(len(body))),
+    ]
+    return StaticResponse(status, headers, body, message=message or short)
+
+def cache_control_for(path):
+    """按扩展名返回当前策略下的 Cache-Control"""
+    profile = CACHE_CONTROL_PROFILES[CACHE_CONTROL]
+    if posixpath.basename(path) == SERVICE_WORKER:
+        return 'no-cache'
+    if 'hashed' in profile and HASHED_NAME.search(path):
+        return profile['hashed']
+    ext = posixpath.splitext(path)[1].lower()
+    return profile.get(ext, profile['*'])
+
+def validator_headers(path, stat, etag):
+    """304 与 200 响应共有的校验和缓存头部"""
+    return [
+        ('Last-Modified', email.utils.formatdate(stat.st_mtime, usegmt=True)),
+        ('ETag', etag),
+        ('Cache-Control', cache_control_for(path)),
+    ]
+
+def static_headers(path, stat, etag):
+    """静态文件的基础响应头"""
+    return [
+        ('Content-Type', guess_content_type(path)),
+        ('Content-Length', str(stat.st_size)),
+        ('Accept-Ranges', 'bytes'),
+    ] + validator_headers(path, stat, etag)
+
+def header_value(headers, keyword):
+    """从响应头列表中取出指定头部的值"""
+    for name, value in headers:
+        if name == keyword:
+            return value
+    return None
+
+def is_compressible(path, stat):
+    """文本类资源且大小超过阈值时才值得压缩"""
+    return (stat.st_size >= MIN_COMPRESS_SIZE
+            and guess_content_type(path).startswith(COMPRESSIBLE_TYPES))
+
+def accepted_encodings(request_headers):
+    """解析 Accept-Encoding，按服务端优先级返回客户端接受的编码"""
+    if request_headers is None:
+        return []
+    qualities = {}
+    for item in (request_headers.get('Accept-Encoding') or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            qualities[name] = quality
+    wildcard = qualities.get('*', 0.0)
+    return [encoding for encoding in ENCODING_SUFFIXES
+            if qualities.get(encoding, wildcard) > 0]
+
+def find_sidecar(path, stat, encoding):
+    """查找构建时生成的预压缩文件，源文件更新后过期的预压缩文件会被忽略"""
+    sidecar = path + ENCODING_SUFFIXES[encoding]
+    try:
+        sidecar_stat = os.stat(sidecar)
+    except OSError:
+        return None
+    if sidecar_stat.st_mtime < stat.st_mtime:
+        return None
+    return sidecar, sidecar_stat
+
+def gzip_variant(cache, asset, content_path, extra_headers):
+    """返回缓存资源的gzip变体 (bytes, headers)，压缩收益不足时返回None"""
+    if 'gzip' not in asset.variants:
+        data = gzip.compress(asset.body, compresslevel=6, mtime=0)
+        variant = None
+        if len(data) < len(asset.body) * MIN_COMPRESSION_GAIN:
+            # 不同编码是不同的表示，ETag必须区分
+            etag = header_value(asset.headers, 'ETag')[:-1] + '-gzip"'
+            headers = [
+                ('Content-Type', guess_content_type(content_path)),
+                ('Content-Length', str(len(data))),
+                ('Accept-Ranges', 'bytes'),
+                ('Last-Modified', header_value(asset.headers, 'Last-Modified')),
+                ('ETag', etag),
+                ('Cache-Control', cache_control_for(content_path)),
+                ('Content-Encoding', 'gzip'),
+            ] + extra_headers
+            variant = (data, headers)
+        cache.add_variant(asset, 'gzip', variant)
+    return asset.variants['gzip']
+
+def is_not_modified(request_headers, etag, mtime):
+    """按 If-None-Match / If-Modified-Since 判断客户端缓存是否仍然有效"""
+    if request_headers is None:
+        return False
+    
+    if_none_match = request_headers.get('If-None-Match')
+    if if_none_match is not None:
+        # 存在 If-None-Match 时忽略 If-Modified-Since (RFC 7232)
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == '*' or tag == etag:
+                return True
+        return False
+    
+    if_modified_since = request_headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(mtime) <= since.timestamp()
+    return False
+
+def stats_response(cache):
+    """生成统计信息接口的JSON响应"""
+    stats = {
+        'pid': os.getpid(),
+        'engine': ENGINE,
+        'cache': cache.stats() if cache else None,
+        'compression': COMPRESSION.stats(),
+        'transfers': TRANSFERS.stats(),
+        'timings': METRICS.stats(),
+    }
+    body = json.dumps(stats, indent=2, ensure_ascii=False).encode('utf-8')
+    headers = [
+        ('Content-Type', 'application/json'),
+        ('Content-Length', str(len(body))),
+        ('Cache-Control', 'no-store'),
+    ]
+    return StaticResponse(200, headers, body)
+
+def parse_byte_ranges(range_header, size):
+    """解析 Range: bytes=... 头部，返回可满足的 (first, last) 列表
+
+    语法错误或区间过多时返回None (忽略Range，按200处理)；
+    返回空列表表示所有区间都不可满足 (416)。
+    """
+    unit, _, spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    items = [item.strip() for item in spec.split(',') if item.strip()]
+    if not items or len(items) > MAX_RANGES:
+        return None
+    
+    ranges = []
+    for item in items:
+        start, sep, end = item.partition('-')
+        start, end = start.strip(), end.strip()
+        if not sep or not (start or end):
+            return None
+        if (start and not start.isdigit()) or (end and not end.isdigit()):
+            return None
+        if not start:
+            # 后缀区间: 最后N个字节
+            suffix = int(end)
+            if suffix > 0 and size > 0:
+                ranges.append((max(size - suffix, 0), size - 1))
+            continue
+        first = int(start)
+        if end and int(end) < first:
+            return None
+        if first < size:
+            last = min(int(end), size - 1) if end else size - 1
+            ranges.append((first, last))
+    return ranges
+
+def if_range_matches(if_range, headers):
+    """If-Range 与当前表示一致时才返回部分内容 (ETag需强匹配，日期需完全相同)"""
+    if_range = if_range.strip()
+    if if_range.startswith('W/'):
+        return False
+    if if_range.startswith('"'):
+        return if_range == header_value(headers, 'ETag')
+    return if_range == header_value(headers, 'Last-Modified')
+
+def range_response(response, request_headers):
+    """按 Range / If-Range 把完整的200响应转换为206或416"""
+    range_header = request_headers.get('Range') if request_headers is not None else None
+    if not range_header or response.status != 200:
+        return response
+    if_range = request_headers.get('If-Range')
+    if if_range and not if_range_matches(if_range, response.headers):
+        return response
+    
+    size = int(header_value(response.headers, 'Content-Length'))
+    ranges = parse_byte_ranges(range_header, size)
+    if ranges is None:
+        return response
+    if not ranges:
+        unsatisfiable = error_response(416)
+        unsatisfiable.headers.append(('Content-Range', f'bytes */{size}'))
+        return unsatisfiable
+    
+    headers = [(keyword, value) for keyword, value in response.headers
+               if keyword != 'Content-Length']
+    if len(ranges) == 1:
+        first, last = ranges[0]
+        length = last - first + 1
+        headers += [
+            ('Content-Length', str(length)),
+            ('Content-Range', f'bytes {first}-{last}/{size}'),
+        ]
+        if response.file_path is None:
+            return StaticResponse(206, headers, response.body[first:last + 1])
+        return StaticResponse(206, headers, file_path=response.file_path,
+                              offset=response.offset + first, length=length)
+    
+    # 多区间: multipart/byteranges
+    content_type = header_value(response.headers, 'Content-Type')
+    boundary = secrets.token_hex(12)
+    segments = []
+    for first, last in ranges:
+        part_header = (f'--{boundary}\r\n'
+                       f'Content-Type: {content_type}\r\n'
+                       f'Content-Range: bytes {first}-{last}/{size}\r\n\r\n')
+        segments.append(part_header.encode('latin-1'))
+        segments.append((response.offset + first, last - first + 1))
+        segments.append(b'\r\n')
+    segments.append(f'--{boundary}--\r\n'.encode('latin-1'))
+    
+    length = sum(len(segment) if isinstance(segment, bytes) else segment[1]
+                 for segment in segments)
+    headers = [(keyword, value) for keyword, value in headers if keyword != 'Content-Type']
+    headers += [
+        ('Content-Type', f'multipart/byteranges; boundary={boundary}'),
+        ('Content-Length', str(length)),
+    ]
+    if response.file_path is None:
+        body = b''.join(segment if isinstance(segment, bytes)
+                        else response.body[segment[0]:segment[0] + segment[1]]
+                        for segment in segments)
+        return StaticResponse(206, headers, body)
+    return StaticResponse(206, headers, file_path=response.file_path, segments=segments)
+
+def not_modified(content_path, stat, etag, extra_headers):
+    """304响应只携带校验和缓存相关头部"""
+    return StaticResponse(304, validator_headers(content_path, stat, etag) + extra_headers)
+
+def file_response(path, stat, cache, request_headers, content_path=None, extra_headers=(),
+                  compress=False, timings=None):
+    """生成单个文件表示的响应
+
+    content_path 为决定MIME类型的原始路径 (预压缩文件与源文件不同)；
+    compress 为True时在内存中生成并缓存gzip变体，只对可缓存的文件生效。
+    """
+    content_path = content_path or path
+    extra_headers = list(extra_headers)
+    cacheable = cache is not None and cache.cacheable(stat)
+    compress = compress and cacheable
+    
+    # 已知ETag时条件请求直接返回304，不打开文件
+    if not compress:
+        etag = ETAGS.lookup(path, stat) if cacheable else stat_etag(stat)
+        if etag is not None and is_not_modified(request_headers, etag, stat.st_mtime):
+            return not_modified(content_path, stat, etag, extra_headers)
+    
+    timings = timings or RequestTimings()
+    try:
+        if cacheable:
+            asset = cache.get(path, stat)
+            if asset is None:
+                with timings.measure('read'):
+                    asset = cache.load(path, lambda loaded, body: static_headers(
+                        content_path, loaded, ETAGS.etag(path, loaded, body)) + extra_headers)
+            body, headers = asset.body, asset.headers
+            if compress:
+                with timings.measure('compress'):
+                    variant = gzip_variant(cache, asset, content_path, extra_headers)
+                if variant is not None:
+                    body, headers = variant
+            response = StaticResponse(200, list(headers), body)
+        else:
+            headers = static_headers(content_path, stat, stat_etag(stat)) + extra_headers
+            response = StaticResponse(200, headers, file_path=path, length=stat.st_size)
+    except OSError:
+        return error_response(404, "File not found")
+    
+    etag = header_value(response.headers, 'ETag')
+    if is_not_modified(request_headers, etag, stat.st_mtime):
+        return not_modified(content_path, stat, etag, extra_headers)
+    return range_response(response, request_headers)
+
+def resolve_static(root, url_path, cache=None, request_headers=None, timings=None):
+    """解析GET/HEAD请求对应的静态资源响应
+
+    没有index.html的目录返回None，由调用方决定是否生成目录列表。
+    timings 为 RequestTimings 时记录 stat / read / compress 各阶段耗时。
+    """
+    if urllib.parse.urlsplit(url_path).path == STATS_PATH:
+        return stats_response(cache)
+    
+    timings = timings or RequestTimings()
+    with timings.measure('stat'):
+        target = locate_file(root, url_path)
+    if not isinstance(target, tuple):
+        return target
+    path, stat = target
+    
+    if WATCH and path.endswith(('.html', '.htm')):
+        return live_reload_page(path)
+    
+    if not is_compressible(path, stat):
+        return file_response(path, stat, cache, request_headers, timings=timings)
+    
+    vary = [('Vary', 'Accept-Encoding')]
+    accepted = accepted_encodings(request_headers)
+    
+    # 优先使用构建时生成的 .br / .gz 预压缩文件
+    for encoding in accepted:
+        with timings.measure('stat'):
+            sidecar = find_sidecar(path, stat, encoding)
+        if sidecar is None:
+            continue
+        sidecar_path, sidecar_stat = sidecar
+        response = file_response(sidecar_path, sidecar_stat, cache, request_headers,
+                                 content_path=path,
+                                 extra_headers=[('Content-Encoding', encoding)] + vary,
+                                 timings=timings)
+        if response.status == 200:
+            COMPRESSION.record('static', stat.st_size, sidecar_stat.st_size)
+        return response
+    
+    # 其次在内存中压缩并随资源一起缓存
+    response = file_response(path, stat, cache, request_headers, extra_headers=vary,
+                             compress='gzip' in accepted, timings=timings)
+    if response.status == 200 and header_value(response.headers, 'Content-Encoding'):
+        COMPRESSION.record('memory', stat.st_size, len(response.body))
+    return response
+
+def live_reload_page(path):
+    """--watch 时在HTML页面中插入刷新脚本，不缓存、不压缩"""
+    try:
+        with open(path, 'rb') as f:
+            body = f.read()
+    except OSError:
+        return error_response(404, "File not found")
+    script = LIVE_RELOAD_SCRIPT.encode('utf-8')
+    body_end = body.lower().rfind(b'</body>')
+    body = body[:body_end] + script + body[body_end:] if body_end != -1 else body + script
+    return StaticResponse(200, [
+        ('Content-Type', guess_content_type(path)),
+        ('Content-Length', str(len(body))),
+        ('Cache-Control', 'no-cache'),
+    ], body)
+
+def locate_file(root, url_path):
+    """把URL映射到文件，返回 (path, stat)，或者重定向/错误响应 (目录列表时为None)"""
+    path = translate_url_path(url_path, root)
+    if os.path.isdir(path):
+        parts = urllib.parse.urlsplit(url_path)
+        if not parts.path.endswith('/'):
+            # 目录请求补全结尾斜杠
+            location = urllib.parse.urlunsplit(
+                (parts[0], parts[1], parts[2] + '/', parts[3], parts[4]))
+            return StaticResponse(301, [('Location', location), ('Content-Length', '0')])
+        for index in ('index.html', 'index.htm'):
+            index_path = os.path.join(path, index)
+            if os.path.isfile(index_path):
+                path = index_path
+                break
+        else:
+            return None
+    if path.endswith('/'):
+        return error_response(404, "File not found")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return error_response(404, "File not found")
+    if not os.path.isfile(path):
+        return error_response(404, "File not found")
+    return path, stat
+
+class RequestError(ValueError):
+    """无法处理的请求，status 为返回给客户端的状态码"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class AsyncStaticServer:
+    """基于asyncio的静态文件服务引擎
+
+    使用HTTP/1.1长连接，同一连接上的流水线请求按顺序应答；
+    文件内容通过 loop.sendfile 非阻塞发送，不需要为每个客户端占用一个线程。
+    """
+    
+    server_version = f"{http.server.SimpleHTTPRequestHandler.server_version} asyncio"
+    
+    def __init__(self, root, host, port, reuse_port=False):
+        self.root = Path(root)
+        self.host = host
+        self.port = port
+        self.reuse_port = reuse_port
+        self.asset_cache = create_asset_cache()
+        # 打开的客户端连接，停止服务器时关闭
+        self.writers = set()
+    
+    async def serve_forever(self, on_ready=None):
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port,
+            reuse_address=True, reuse_port=self.reuse_port or None,
+            limit=MAX_HEADER_BYTES, backlog=512)
+        if on_ready:
+            on_ready()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for writer in list(self.writers):
+                writer.close()
+    
+    async def read_request(self, reader):
+        """读取一个请求头，返回 (method, target, version, headers)；连接结束时返回None"""
+        try:
+            data = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise ValueError("Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise ValueError("Request header too large")
+        
+        request_line, _, header_block = data.partition(b'\r\n')
+        words = request_line.decode('iso-8859-1').split()
+        if len(words) != 3 or not words[2].startswith('HTTP/'):
+            raise ValueError(f"Bad request syntax ({request_line!r})")
+        headers = http.client.parse_headers(io.BytesIO(header_block))
+        
+        # 不支持分块请求体：无法确定请求体的结束位置，剩余数据会被当作下一个请求解析
+        if headers.get('Transfer-Encoding'):
+            raise RequestError(501, "Transfer-Encoding not supported")
+        # 丢弃请求体，保证流水线中下一个请求能被正确解析
+        length = int(headers.get('Content-Length') or 0)
+        if length:
+            await reader.readexactly(length)
+        return words[0], words[1], words[2], headers
+    
+    def keep_alive(self, version, headers):
+        """按HTTP版本和Connection头判断是否保持连接"""
+        connection = (headers.get('Connection') or '').lower()
+        if version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+    
+    async def send_response(self, writer, response, send_body, keep_alive):
+        """写出状态行、响应头和响应体"""
+        reason = http.server.BaseHTTPRequestHandler.responses.get(response.status, ('',))[0]
+        lines = [
+            f"HTTP/1.1 {response.status} {reason}",
+            f"Server: {self.server_version}",
+            f"Date: {email.utils.formatdate(usegmt=True)}",
+        ]
+        lines += [f"{keyword}: {value}" for keyword, value in response.headers]
+        lines += [f"{keyword}: {value}" for keyword, value in CORS_HEADERS]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'strict'))
+        
+        if not send_body:
+            await writer.drain()
+            return
+        if response.file_path is None:
+            writer.write(response.body)
+            await writer.drain()
+            return
+        
+        loop = asyncio.get_running_loop()
+        with open(response.file_path, 'rb') as f:
+            for segment in response.file_segments():
+                if isinstance(segment, bytes):
+                    writer.write(segment)
+                    continue
+                await writer.drain()
+                offset, length = segment
+                started = time.perf_counter()
+                sent = await loop.sendfile(writer.transport, f, offset, length)
+                TRANSFERS.record('loop.sendfile', sent, time.perf_counter() - started)
+        await writer.drain()
+    
+    async def stream_live_reload(self, reader, writer):
+        """以 Server-Sent Events 推送刷新事件，直到页面关闭或服务器停止"""
+        lines = [
+            "HTTP/1.1 200 OK",
+            f"Server: {self.server_version}",
+            "Content-Type: text/event-stream; charset=utf-8",
+            "Cache-Control: no-cache",
+            "Connection: close",
+        ]
+        lines += [f"{keyword}: {value}" for keyword, value in CORS_HEADERS]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\nretry: 1000\n\n').encode('latin-1'))
+        await writer.drain()
+        version = LIVE_RELOAD.version
+        # 页面关闭时连接读到EOF，立即结束而不是等到下一次保活
+        disconnected = asyncio.ensure_future(reader.read())
+        try:
+            while not LIVE_RELOAD.closed:
+                waiter = asyncio.ensure_future(LIVE_RELOAD.wait_async(version, LIVE_RELOAD_PING))
+                await asyncio.wait((waiter, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    waiter.cancel()
+                    break
+                version, message = waiter.result()
+                writer.write(message or b': ping\n\n')
+                await writer.drain()
+        finally:
+            disconnected.cancel()
+    
+    async def handle_connection(self, reader, writer):
+        """处理一个客户端连接上的全部请求"""
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except (ValueError, http.client.HTTPException) as e:
+                    status = getattr(e, 'status', 400)
+                    log_line(f"code {status}, message {e}")
+                    await self.send_response(writer, error_response(status, str(e)), True, False)
+                    break
+                if request is None:
+                    break
+                
+                method, target, version, headers = request
+                if method == 'GET' and is_live_reload_request(target):
+                    log_line(f'"{method} {target} {version}" 200 -')
+                    await self.stream_live_reload(reader, writer)
+                    break
+                keep_alive = self.keep_alive(version, headers)
+                timings = RequestTimings()
+                if method in ('GET', 'HEAD'):
+                    response = resolve_static(self.root, target, self.asset_cache, headers,
+                                              timings)
+                    if response is None:
+                        response = error_response(404, "No permission to list directory")
+                else:
+                    response = error_response(501, f"Unsupported method ({method!r})")
+                    keep_alive = False
+                response.headers.append(('Server-Timing', timings.server_timing()))
+                
+                if response.status >= 400:
+                    log_line(f"code {response.status}, message {response.message}")
+                log_line(f'"{method} {target} {version}" {response.status} -')
+                with timings.measure('send'):
+                    await self.send_response(writer, response, method != 'HEAD', keep_alive)
+                METRICS.record(target, timings, timings.elapsed())
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            pass
+        except asyncio.CancelledError:
+            # 服务器停止 (Ctrl+C) 时仍打开的连接被取消，安静地关闭即可
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError, asyncio.CancelledError):
+                pass
+
+class ThreadPoolHTTPServer(socketserver.TCPServer):
+    """有界线程池HTTP服务器
+
+    index.html 会并行请求约40个脚本，单线程 TCPServer 只能逐个处理。
+    这里把每个连接交给固定大小的线程池，避免无限制地创建线程。
+    """
+    
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, max_workers=THREADS, reuse_port=False):
+        self.max_workers = max_workers
+        self.reuse_port = reuse_port
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='http-worker')
+        self.asset_cache = create_asset_cache()
+        self.request_context = threading.local()
+        # 正在处理的连接，关闭服务器时中断它们，线程池的线程才能结束
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+        # 已提交但还没有线程处理的连接数，线程池的队列本身没有上限
+        self.pending = 0
+        try:
+            super().__init__(server_address, handler_class)
+        except Exception:
+            self.executor.shutdown(wait=False)
+            raise
+    
+    def server_bind(self):
+        """绑定端口，多进程模式下启用 SO_REUSEPORT 由内核分发连接"""
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+    
+    def process_request(self, request, client_address):
+        with self.connections_lock:
+            full = self.pending >= MAX_PENDING
+            if not full:
+                self.pending += 1
+        if full:
+            self.reject_request(request)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address,
+                             time.perf_counter())
+    
+    def reject_request(self, request):
+        """排队的连接过多时直接返回503并关闭连接，不再交给线程池"""
+        response = error_response(503, "Server busy")
+        reason = http.server.BaseHTTPRequestHandler.responses[503][0]
+        head = ''.join(f"{keyword}: {value}\r\n" for keyword, value in response.headers)
+        try:
+            # 在接受连接的线程中发送，设置超时避免被慢客户端阻塞
+            request.settimeout(1)
+            request.sendall(f"HTTP/1.1 503 {reason}\r\n{head}Retry-After: 1\r\n"
+                            f"Connection: close\r\n\r\n".encode('latin-1') + response.body)
+        except OSError:
+            pass
+        log_line("code 503, message Server busy")
+        self.shutdown_request(request)
+    
+    def process_request_thread(self, request, client_address, queued_at):
+        """在线程池中处理单个连接，queued_at 用于统计连接在队列中的等待时间"""
+        self.request_context.queue_wait = time.perf_counter() - queued_at
+        with self.connections_lock:
+            self.pending -= 1
+            self.connections.add(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self.connections_lock:
+                self.connections.discard(request)
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        super().server_close()
+        # 让SSE连接所在的线程结束，线程池才能退出
+        LIVE_RELOAD.close()
+        # 中断仍在等待请求的空闲连接 (例如浏览器保持的连接)，否则退出时会一直等待这些线程
+        with self.connections_lock:
+            connections = list(self.connections)
+        for request in connections:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def supports_prefork():
+    """检查当前平台是否支持预派生多进程模式"""
+    return hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')
+
+def create_server(reuse_port=False):
+    """按当前配置创建HTTP服务器"""
+    return ThreadPoolHTTPServer((HOST, PORT), CustomHTTPRequestHandler,
+                                max_workers=THREADS, reuse_port=reuse_port)
+
+def describe_mode():
+    """当前服务引擎的简短描述"""
+    if ENGINE == 'asyncio':
+        return "asyncio引擎, HTTP/1.1长连接"
+    return f"线程池: {THREADS}"
+
+def serve(reuse_port=False, on_ready=None):
+    """按当前引擎绑定端口并持续处理请求，绑定成功后调用 on_ready"""
+    if ENGINE == 'asyncio':
+        engine = AsyncStaticServer(Path.cwd(), HOST, PORT, reuse_port=reuse_port)
+        asyncio.run(engine.serve_forever(on_ready))
+        return
+    with create_server(reuse_port=reuse_port) as httpd:
+        if on_ready:
+            on_ready()
+        httpd.serve_forever()
+
+def report_bind_error(e):
+    """输出端口绑定失败的提示"""
+    if e.errno in (errno.EADDRINUSE, 10048):  # 10048: Windows 端口占用
+        print(f"❌ 端口 {PORT} 已被占用")
+        print(f"💡 请尝试使用其他端口: python server.py --port {PORT + 1}")
+    else:
+        print(f"❌ 服务器启动失败: {e}")
+
+def run_worker():
+    """预派生子进程入口：独立绑定端口并处理请求，退出时不返回调用方"""
+    # 父进程通过 SIGTERM 通知子进程退出
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    exit_code = 0
+    try:
+        serve(reuse_port=True)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    except OSError as e:
+        report_bind_error(e)
+        exit_code = 1
+    finally:
+        ACCESS_LOG.close()
+        sys.stdout.flush()
+        os._exit(exit_code)
+
+def serve_prefork(workers):
+    """启动多个预派生进程，共享同一端口 (SO_REUSEPORT)"""
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            run_worker()
+        children.append(pid)
+    
+    print(f"✅ 已启动 {workers} 个工作进程 ({describe_mode()}): "
+          f"{', '.join(str(pid) for pid in children)}")
+    
+    # SIGTERM 与 Ctrl+C 一样，先通知子进程退出再返回
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    failed = 0
+    try:
+        while children:
+            pid, status = os.waitpid(-1, 0)
+            if pid in children:
+                children.remove(pid)
+                if os.WIFEXITED(status) and os.WEXITSTATUS(status) != 0:
+                    failed += 1
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+    return failed == 0
+
+def start_watch(source_root, serve_root):
+    """--watch: 在后台线程中监视源文件，变化后按需增量构建并通知页面刷新
+
+    服务构建目录 (--root dist) 时运行 deploy.py，它的增量构建缓存只处理有变化的文件和受影响的阶段；
+    构建输出没有变化时不刷新页面。直接服务源文件时只推送刷新事件。
+    """
+    build = WATCH_BUILD
+    if build == 'auto':
+        build = 'off' if serve_root == source_root else 'deploy'
+    ignored_dirs = set(filewatch.IGNORED_DIRS)
+    if serve_root != source_root and source_root in serve_root.parents:
+        ignored_dirs.add(serve_root.name)
+    watcher = filewatch.create_watcher(source_root, ignored_dirs, polling=WATCH_POLLING)
+    manifest = serve_root / 'manifest.json'
+    
+    def output_version():
+        try:
+            return manifest.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def on_change(paths):
+        shown = ', '.join(paths[:5]) + (f" 等 {len(paths)} 个文件" if len(paths) > 5 else '')
+        print(f"👀 文件变化: {shown}")
+        if build == 'deploy':
+            before = output_version()
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, str(source_root / 'deploy.py')], cwd=source_root,
+                                    capture_output=True, text=True, encoding='utf-8', errors='replace')
+            if result.returncode != 0:
+                output = '\n'.join((result.stdout + result.stderr).strip().splitlines()[-20:])
+                print(f"❌ 重新构建失败:\n{output}")
+                LIVE_RELOAD.publish('build-error', {'output': output})
+                return
+            print(f"🔁 增量构建完成 ({time.perf_counter() - started:.2f}s)")
+            if before is not None and output_version() == before:
+                print("⏭️  构建输出未变化，不刷新页面")
+                return
+        css_only = build == 'off' and all(path.endswith('.css') for path in paths)
+        LIVE_RELOAD.publish('reload', {'paths': paths, 'css_only': css_only})
+    
+    threading.Thread(target=filewatch.watch, args=(watcher, on_change),
+                     name='file-watcher', daemon=True).start()
+    mode = 'inotify' if isinstance(watcher, filewatch.InotifyWatcher) else '轮询'
+    print(f"👀 监视文件变化 ({mode}): {source_root}" + (" → deploy.py 增量构建" if build == 'deploy' else ''))
+
+def open_browser():
+    """自动打开浏览器"""
+    if not OPEN_BROWSER:
+        return
+    try:
+        webbrowser.open(f'http://{HOST}:{PORT}/index.html')
+        print("🌐 已自动打开浏览器")
+    except Exception as e:
+        print(f"⚠️  无法自动打开浏览器: {e}")
+        print(f"请手动访问: http://{HOST}:{PORT}/index.html")
 
 def main():
     """启动HTTP服务器"""
     
-    # 确保在项目根目录运行
-    project_root = Path(__file__).parent
+    # 确保在项目根目录 (或 --root 指定的目录，如 dist) 运行
+    project_root = Path(ROOT).resolve() if ROOT else Path(__file__).parent
+    if not project_root.is_dir():
+        print(f"❌ 服务目录不存在: {project_root}")
+        sys.exit(1)
     os.chdir(project_root)
     
     print(f"🚀 启动3D脱硫塔工艺流程图服务器...")
@@ -70,55 +1712,123 @@ def main():
     print("💡 按 Ctrl+C 停止服务器")
     print("=" * 60)
     
+    prefork = WORKERS > 1 and supports_prefork()
+    if WORKERS > 1 and not prefork:
+        print("⚠️  当前平台不支持 fork/SO_REUSEPORT，改用单进程线程池模式")
+    if WATCH:
+        if prefork:
+            # 刷新事件只在当前进程内广播
+            print("⚠️  --watch 只支持单进程模式，忽略 --workers")
+            prefork = False
+        start_watch(Path(__file__).parent.resolve(), project_root.resolve())
+    
     try:
-        # 创建服务器
-        with socketserver.TCPServer((HOST, PORT), CustomHTTPRequestHandler) as httpd:
-            print(f"✅ 服务器已启动在 http://{HOST}:{PORT}")
+        if prefork:
+            # 子进程只负责处理请求，浏览器和日志提示由父进程输出
+            print(f"✅ 服务器已启动在 http://{HOST}:{PORT} (多进程模式)")
+            open_browser()
+            print("\n📊 服务器日志:")
+            print("-" * 40)
+            if not serve_prefork(WORKERS):
+                sys.exit(1)
+            print("\n\n🛑 服务器已停止")
+            sys.exit(0)
+        
+        def announce():
+            print(f"✅ 服务器已启动在 http://{HOST}:{PORT} ({describe_mode()})")
             
             # 自动打开浏览器
-            try:
-                webbrowser.open(f'http://{HOST}:{PORT}/index.html')
-                print("🌐 已自动打开浏览器")
-            except Exception as e:
-                print(f"⚠️  无法自动打开浏览器: {e}")
-                print(f"请手动访问: http://{HOST}:{PORT}/index.html")
+            open_browser()
             
             print("\n📊 服务器日志:")
             print("-" * 40)
-            
-            # 启动服务器
-            httpd.serve_forever()
+        
+        # 创建服务器并启动
+        serve(on_ready=announce)
             
     except KeyboardInterrupt:
         print("\n\n🛑 服务器已停止")
         sys.exit(0)
     except OSError as e:
-        if e.errno == 10048:  # Windows: Address already in use
-            print(f"❌ 端口 {PORT} 已被占用")
-            print(f"💡 请尝试使用其他端口: python server.py --port 8001")
-        else:
-            print(f"❌ 服务器启动失败: {e}")
+        report_bind_error(e)
         sys.exit(1)
     except Exception as e:
         print(f"❌ 未知错误: {e}")
         sys.exit(1)
 
+def parse_int_option(name, default, minimum=1):
+    """解析形如 --name N 的整数参数"""
+    if name not in sys.argv:
+        return default
+    try:
+        value = int(sys.argv[sys.argv.index(name) + 1])
+    except (ValueError, IndexError):
+        value = None
+    if value is None or value < minimum:
+        print(f"❌ 无效的参数值: {name}")
+        sys.exit(1)
+    return value
+
+def parse_value_option(name, default):
+    """解析形如 --name VALUE 的字符串参数"""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name) + 1
+    if index >= len(sys.argv):
+        print(f"❌ 缺少参数值: {name}")
+        sys.exit(1)
+    return sys.argv[index]
+
+def parse_choice_option(name, default, choices):
+    """解析形如 --name VALUE 的枚举参数"""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name) + 1
+    value = sys.argv[index] if index < len(sys.argv) else None
+    if value not in choices:
+        print(f"❌ 无效的参数值: {name}，可选: {', '.join(choices)}")
+        sys.exit(1)
+    return value
+
 if __name__ == '__main__':
-    # 支持命令行参数指定端口
-    if len(sys.argv) > 1:
-        if '--port' in sys.argv:
-            try:
-                port_index = sys.argv.index('--port') + 1
-                PORT = int(sys.argv[port_index])
-            except (ValueError, IndexError):
-                print("❌ 无效的端口号")
-                sys.exit(1)
-        elif '--help' in sys.argv or '-h' in sys.argv:
-            print("3D脱硫塔工艺流程图 - Python服务器")
-            print("\n用法:")
-            print("  python server.py              # 使用默认端口8000")
-            print("  python server.py --port 8001  # 使用指定端口")
-            print("  python server.py --help       # 显示帮助信息")
-            sys.exit(0)
+    # 支持命令行参数指定端口、线程数和进程数
+    if '--help' in sys.argv or '-h' in sys.argv:
+        print("3D脱硫塔工艺流程图 - Python服务器")
+        print("\n用法:")
+        print("  python server.py               # 使用默认端口8000")
+        print("  python server.py --port 8001   # 使用指定端口")
+        print(f"  python server.py --threads 32  # 每个进程的线程池大小 (默认{THREADS})")
+        print("  python server.py --workers 4   # 预派生4个进程 (Linux/macOS, SO_REUSEPORT)")
+        print("  python server.py --engine asyncio  # asyncio引擎 (HTTP/1.1长连接, sendfile)")
+        print(f"  python server.py --cache-size 128 # 内存资源缓存上限MB (默认{CACHE_SIZE_MB}, 0为关闭)")
+        print("  python server.py --cache-control production  # 使用与netlify.toml一致的浏览器缓存策略")
+        print("  python server.py --root dist   # 服务构建目录 (优先发送 .br/.gz 预压缩文件)")
+        print(f"  python server.py --zero-copy mmap  # 大于{ZERO_COPY_THRESHOLD_KB}KB的文件发送方式: auto|sendfile|mmap|off")
+        print("  python server.py --zero-copy-threshold 512  # 零拷贝路径的文件大小阈值KB")
+        print("  python server.py --no-browser  # 不自动打开浏览器 (压测/远程环境)")
+        print("  python server.py --access-log background  # 访问日志: stdout|buffered|background|off")
+        print("  python server.py --watch       # 文件变化后自动刷新页面 (配合 --root dist 时先增量构建)")
+        print("  python server.py --watch-build off  # 文件变化后的构建: auto|deploy|off")
+        print("  python server.py --watch-polling  # 不使用inotify，轮询文件变化")
+        print("  python server.py --help        # 显示帮助信息")
+        sys.exit(0)
+    
+    PORT = parse_int_option('--port', PORT, minimum=0)
+    THREADS = parse_int_option('--threads', THREADS)
+    WORKERS = parse_int_option('--workers', WORKERS)
+    ENGINE = parse_choice_option('--engine', ENGINE, ('threaded', 'asyncio'))
+    CACHE_SIZE_MB = parse_int_option('--cache-size', CACHE_SIZE_MB, minimum=0)
+    CACHE_CONTROL = parse_choice_option('--cache-control', CACHE_CONTROL,
+                                        tuple(CACHE_CONTROL_PROFILES))
+    ROOT = parse_value_option('--root', ROOT)
+    OPEN_BROWSER = '--no-browser' not in sys.argv
+    ACCESS_LOG.mode = parse_choice_option('--access-log', ACCESS_LOG_MODE,
+                                          ('stdout', 'buffered', 'background', 'off'))
+    ZERO_COPY = parse_choice_option('--zero-copy', ZERO_COPY, ('auto', 'sendfile', 'mmap', 'off'))
+    ZERO_COPY_THRESHOLD_KB = parse_int_option('--zero-copy-threshold', ZERO_COPY_THRESHOLD_KB,
+                                              minimum=0)
+    WATCH = '--watch' in sys.argv
+    WATCH_BUILD = parse_choice_option('--watch-build', WATCH_BUILD, ('auto', 'deploy', 'off'))
+    WATCH_POLLING = '--watch-polling' in sys.argv
     
-    main()
\ No newline at end of file
+    main()
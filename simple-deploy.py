@@ -14,6 +14,10 @@ import webbrowser
 import time
 from pathlib import Path
 
+from deploy import BuildCache, build_fingerprint, collect_sources
+from packager import PACKAGE_FORMATS, build_package
+from server import parse_int_option, parse_value_option
+
 class SimpleDeployer:
     """简化部署器 - 无需外部CLI工具"""
     
@@ -40,14 +44,20 @@ class SimpleDeployer:
         except (FileNotFoundError, UnicodeDecodeError):
             return False
     
-    def build_project(self):
-        """构建项目（复制文件到dist目录）"""
+    def build_project(self, clean=False):
+        """构建项目（复制文件到dist目录）
+
+        使用单独的增量构建缓存 (.build-cache/state-simple.json)，只复制有变化的文件；
+        dist目录上次由 deploy.py 构建，或 clean 为True时删除dist目录完整重建。
+        """
         print("🏗️  构建项目...")
         
-        # 创建dist目录
-        if self.dist_dir.exists():
+        cache = BuildCache(self.project_root, build_fingerprint('simple', {}, __file__),
+                           name='state-simple')
+        if self.dist_dir.exists() and (clean or not cache.valid):
             shutil.rmtree(self.dist_dir)
-        self.dist_dir.mkdir()
+            cache.reset()
+        self.dist_dir.mkdir(exist_ok=True)
         
         # 复制必要文件
         files_to_copy = [
@@ -60,24 +70,25 @@ class SimpleDeployer:
         ]
         
         for item in files_to_copy:
-            src = self.project_root / item
-            if src.exists():
-                if src.is_file():
-                    shutil.copy2(src, self.dist_dir)
-                else:
-                    shutil.copytree(src, self.dist_dir / item)
+            if (self.project_root / item).exists():
                 print(f"✅ 复制: {item}")
             else:
                 print(f"⚠️  跳过: {item} (不存在)")
+        sources = collect_sources(self.project_root, files_to_copy)
         
         # 复制部署相关文件
         deploy_files = ['Dockerfile', 'nginx.conf', 'docker-compose.yml']
         for file in deploy_files:
             src = self.project_root / file
             if src.exists():
-                shutil.copy2(src, self.dist_dir)
+                sources[file] = src
                 print(f"✅ 复制部署文件: {file}")
         
+        changed, removed = cache.scan(sources, self.dist_dir)
+        cache.sync(sources, self.dist_dir, changed, removed)
+        cache.save()
+        print(f"  ✓ 更新 {len(changed)} 个文件，{len(sources) - len(changed)} 个未变化，删除 {len(removed)} 个")
+        
         print("✅ 项目构建完成！")
         return True
     
@@ -154,41 +165,64 @@ class SimpleDeployer:
                 return True
             else:
                 print(f"❌ Docker容器启动失败: {result.stderr}")
-                print("💡 建议: 使用增强版Python服务器 (dist/server-with-gzip.py)")
+                print("💡 建议: 使用增强版Python服务器 (python server.py --root dist)")
                 return False
                 
         except Exception as e:
             print(f"❌ Docker部署异常: {str(e)}")
-            print("💡 替代方案: 运行 python dist/server-with-gzip.py 8080")
+            print("💡 替代方案: 运行 python server.py --root dist --port 8080")
             return False
     
-    def create_static_package(self):
-        """创建静态文件包"""
-        print("📦 创建静态文件包...")
+    def create_static_package(self, formats=('zip',), output=None, jobs=None):
+        """创建静态文件包
+
+        包内条目按路径排序、时间戳固定，相同的构建结果总是得到逐字节相同的包。
+        zip 条目按CPU核数并行压缩；output 为 '-' 时直接写到标准输出 (只能有一种格式)，
+        此时提示信息输出到标准错误。
+        """
+        to_stdout = output == '-'
+        if to_stdout and len(formats) != 1:
+            print("❌ 输出到标准输出时只能指定一种打包格式", file=sys.stderr)
+            return False
+        log = sys.stderr if to_stdout else sys.stdout
+        print("📦 创建静态文件包...", file=log)
         
-        if not self.build_project():
+        if to_stdout:
+            # 构建过程的输出不能混进包的内容
+            stdout, sys.stdout = sys.stdout, sys.stderr
+            try:
+                built = self.build_project()
+            finally:
+                sys.stdout = stdout
+        else:
+            built = self.build_project()
+        if not built:
             return False
         
-        # 创建压缩包
         package_name = '3d-desulfurization-tower-static'
-        package_path = self.project_root / f'{package_name}.zip'
-        
         try:
-            import zipfile
-            
-            with zipfile.ZipFile(package_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(self.dist_dir):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arc_name = file_path.relative_to(self.dist_dir)
-                        zipf.write(file_path, arc_name)
+            for package_format in formats:
+                if to_stdout:
+                    package_path = output
+                elif output:
+                    # 指定了多种格式时按格式加上后缀
+                    package_path = Path(output if len(formats) == 1 else f"{output}.{package_format}")
+                else:
+                    package_path = self.project_root / f'{package_name}.{package_format}'
+                started = time.perf_counter()
+                count = build_package(self.dist_dir, package_path, package_format, jobs)
+                elapsed = time.perf_counter() - started
+                if to_stdout:
+                    print(f"✅ 已输出 {package_format} 包: {count} 个文件 ({elapsed:.2f}s)", file=log)
+                else:
+                    print(f"✅ 静态文件包创建成功: {package_path} "
+                          f"({count} 个文件，{Path(package_path).stat().st_size / 1024:.1f} KB，{elapsed:.2f}s)")
             
-            print(f"✅ 静态文件包创建成功: {package_path}")
-            print("💡 您可以将此文件上传到任何静态托管服务")
+            print("💡 您可以将此文件上传到任何静态托管服务", file=log)
             return True
             
         except Exception as e:
-            print(f"❌ 创建静态文件包失败: {e}")
+            print(f"❌ 创建静态文件包失败: {e}", file=log)
             return False
     
     def show_menu(self):
@@ -269,8 +303,24 @@ def main():
             print("  ✅ 支持静态文件打包")
             print("\n用法:")
             print("  python simple-deploy.py        # 交互式部署")
+            print("  python simple-deploy.py --package  # 构建并创建静态文件包 (zip)")
+            print("  python simple-deploy.py --package --formats zip,tar.xz  # 同时生成 tar.xz / tar.gz")
+            print("  python simple-deploy.py --package --output -  # 把包写到标准输出")
+            print("  python simple-deploy.py --package --jobs 4   # 并行压缩的线程数 (默认CPU核数)")
             print("  python simple-deploy.py --help # 显示帮助")
             return
+        if sys.argv[1] == '--package':
+            formats = parse_value_option('--formats', 'zip').split(',')
+            for package_format in formats:
+                if package_format not in PACKAGE_FORMATS:
+                    print(f"❌ 不支持的打包格式: {package_format}，可选: {', '.join(PACKAGE_FORMATS)}",
+                          file=sys.stderr)
+                    sys.exit(1)
+            deployer = SimpleDeployer()
+            if not deployer.create_static_package(formats, parse_value_option('--output', None),
+                                                  parse_int_option('--jobs', os.cpu_count() or 1)):
+                sys.exit(1)
+            return
     
     deployer = SimpleDeployer()
     deployer.run()